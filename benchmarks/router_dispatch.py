@@ -0,0 +1,41 @@
+"""
+Microbenchmark of :class:`ApiRouter` dispatching.
+
+Per-request routing cost must stay constant while number of routes grows.
+
+Usage: PYTHONPATH=. python benchmarks/router_dispatch.py
+"""
+import timeit
+
+from viburnum.application.handlers import ApiHandler
+from viburnum.application.router import ApiRouter
+
+ROUTES_COUNTS = (10, 100, 1_000, 10_000)
+NUMBER = 100_000
+
+
+def dummy(request):
+    pass
+
+
+def build_router(routes_count: int) -> ApiRouter:
+    handlers = []
+    for i in range(routes_count // 2):
+        handlers.append(ApiHandler(dummy, f"/resource{i}", ["GET", "POST"]))
+        handlers.append(ApiHandler(dummy, f"/resource{i}/{{id}}/items", ["GET"]))
+    return ApiRouter(handlers)
+
+
+def main():
+    for routes_count in ROUTES_COUNTS:
+        router = build_router(routes_count)
+        # The last added route is the worst case for linear matching
+        path = f"/resource{routes_count // 2 - 1}/42/items"
+        seconds = min(
+            timeit.repeat(lambda: router.match("GET", path), number=NUMBER, repeat=5)
+        )
+        print(f"{routes_count:>6} routes: {seconds / NUMBER * 1e9:6.0f} ns/request")
+
+
+if __name__ == "__main__":
+    main()
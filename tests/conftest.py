@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from viburnum.local.events import sqs_record
+
+
+@pytest.fixture
+def sqs_event():
+    """Factory of SQS events, records have `{"id": i}` body and `m{i}` message id."""
+
+    def make(count: int, fifo: bool = False) -> dict:
+        return {
+            "Records": [
+                sqs_record(
+                    {"id": i},
+                    "Queue",
+                    message_id=f"m{i}",
+                    message_group_id="group" if fifo else None,
+                )
+                for i in range(count)
+            ]
+        }
+
+    return make
+
+
+@pytest.fixture
+def failed_ids():
+    """Sorted ids of `batchItemFailures` response."""
+
+    def get(response: dict) -> list[str]:
+        return sorted(f["itemIdentifier"] for f in response["batchItemFailures"])
+
+    return get
+
+
+@pytest.fixture
+def processed() -> list[int]:
+    return []
+
+
+@pytest.fixture
+def sqs_worker(processed):
+    """
+    Factory of SQS functions, that append ids of records to `processed`
+    and raise for ids in `poison`. Records of `async` function finish
+    in reversed order, if they are processed concurrently.
+    """
+
+    def make(poison=(), is_async: bool = False, batch: bool = False):
+        def process(event):
+            processed.append(event.body["id"])
+            if event.body["id"] in poison:
+                raise ValueError("poison")
+
+        def batch_worker(events):
+            for event in events:
+                process(event)
+
+        async def async_worker(event):
+            await asyncio.sleep(0.01 * max(0, 5 - event.body["id"]))
+            process(event)
+
+        if batch:
+            return batch_worker
+        return async_worker if is_async else process
+
+    return make
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+os.environ.setdefault("JSII_SILENCE_WARNING_DEPRECATED_NODE_VERSION", "1")
+pytest.importorskip("aws_cdk")
+
+from viburnum.application import route  # noqa: E402
+from viburnum.deployer.builders import ApiHandlerBuilder, BuilderException  # noqa: E402
+
+
+def cache_key_parameters(path: str, **kwargs) -> list[str]:
+    handler = route(path, ["GET"], cache_ttl=60, **kwargs)(lambda request: None)
+    return ApiHandlerBuilder(None, handler)._get_cache_key_parameters()
+
+
+def test_path_parameters_are_cache_keys():
+    assert cache_key_parameters("/items/{id}/tags/{tag}") == [
+        "method.request.path.id",
+        "method.request.path.tag",
+    ]
+
+
+def test_greedy_path_parameter_is_cache_key():
+    assert cache_key_parameters("/files/{proxy+}") == ["method.request.path.proxy"]
+
+
+def test_explicit_cache_key_parameters():
+    parameters = cache_key_parameters(
+        "/files/{proxy+}",
+        cache_key_params=["page", "query.limit", "header.Accept", "path.proxy+"],
+    )
+
+    assert parameters == [
+        "method.request.path.proxy",
+        "method.request.querystring.page",
+        "method.request.querystring.limit",
+        "method.request.header.Accept",
+    ]
+
+
+def test_wrong_cache_key_parameter():
+    with pytest.raises(BuilderException):
+        cache_key_parameters("/items", cache_key_params=["body.id"])
+
+
+def test_no_cache_key_parameters_without_cache():
+    handler = route("/items/{id}", ["GET"])(lambda request: None)
+
+    assert ApiHandlerBuilder(None, handler)._get_cache_key_parameters() == []
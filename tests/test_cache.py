@@ -0,0 +1,68 @@
+from viburnum.application import Response, ResponseCache, cache_response, route
+from viburnum.local.events import api_event
+
+
+def test_cached_response_is_copied():
+    @cache_response(60)
+    @route("/items", ["GET"])
+    def handler(request):
+        return Response(200, {"items": []}, {"X-Count": "0"})
+
+    first = handler(api_event("/items"), None)
+    first["headers"]["X-Changed"] = "1"
+    second = handler(api_event("/items"), None)
+    second["headers"]["X-Changed"] = "2"
+    third = handler(api_event("/items"), None)
+
+    assert handler.response_cache.hits == 2
+    assert "X-Changed" not in third["headers"]
+    assert third["body"] == first["body"]
+
+
+def test_non_proxy_result_isnt_cached():
+    calls = []
+
+    @cache_response(60)
+    @route("/items", ["GET"])
+    def handler(request):
+        calls.append(request)
+        return ["item"]
+
+    assert handler(api_event("/items"), None) == ["item"]
+    assert handler(api_event("/items"), None) == ["item"]
+    assert len(calls) == 2
+    assert len(handler.response_cache) == 0
+
+
+def test_error_response_isnt_cached():
+    @cache_response(60)
+    @route("/items", ["GET"])
+    def handler(request):
+        return Response(500, {"message": "error"})
+
+    handler(api_event("/items"), None)
+
+    assert len(handler.response_cache) == 0
+
+
+def test_size_is_counted_in_bytes():
+    cache = ResponseCache(60, max_bytes=10)
+    response = {"statusCode": 200, "headers": {}, "body": "ї" * 4}
+
+    cache.set("key", response)
+    assert cache.size == 8
+    cache.set("key", {**response, "body": "ї" * 6})
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_lru_eviction():
+    cache = ResponseCache(60, max_entries=2)
+    for key in ("a", "b"):
+        cache.set(key, {"statusCode": 200, "body": key})
+    cache.get("a")
+    cache.set("c", {"statusCode": 200, "body": "c"})
+
+    assert cache.get("b") is None
+    assert cache.get("a")["body"] == "a"
+    assert cache.evictions == 1
@@ -0,0 +1,78 @@
+import pytest
+
+from viburnum.application import clients
+from viburnum.application.clients import (
+    ClientConfig,
+    configure_clients,
+    get_client,
+    get_resource,
+    reset_clients,
+)
+
+
+class FakeResource:
+    def __init__(self, client) -> None:
+        self.meta = type("Meta", (), {"client": client})()
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.created = []
+
+    def get_available_resources(self):
+        return ["s3", "sqs"]
+
+    def client(self, service_name, region_name, config):
+        self.created.append(("client", service_name, region_name))
+        return object()
+
+    def resource(self, service_name, region_name, config):
+        self.created.append(("resource", service_name, region_name))
+        return FakeResource(object())
+
+
+@pytest.fixture(autouse=True)
+def session(monkeypatch):
+    monkeypatch.setenv("AWS_REGION", "eu-west-1")
+    monkeypatch.setattr(clients, "_default_config", ClientConfig())
+    reset_clients()
+    session = FakeSession()
+    monkeypatch.setattr(clients, "_session", session)
+    yield session
+    reset_clients()
+
+
+def test_client_is_cached_by_service_region_and_config(session):
+    client = get_client("lambda")
+
+    assert get_client("lambda") is client
+    assert get_client("lambda", "eu-west-1", ClientConfig()) is client
+    assert get_client("lambda", "us-east-1") is not client
+    assert get_client("lambda", config=ClientConfig(max_attempts=5)) is not client
+    assert get_client("events") is not client
+    assert len(session.created) == 4
+
+
+def test_client_of_resource_shares_connection_pool(session):
+    resource = get_resource("sqs")
+
+    assert get_client("sqs") is resource.meta.client
+    assert session.created == [("resource", "sqs", "eu-west-1")]
+
+
+def test_configure_clients_changes_cache_key(session):
+    client = get_client("lambda")
+
+    config = configure_clients(max_pool_connections=50)
+
+    assert config == ClientConfig(max_pool_connections=50)
+    assert get_client("lambda") is not client
+    assert get_client("lambda", config=ClientConfig()) is client
+
+
+def test_reset_clients_drops_cache(session):
+    client = get_client("lambda")
+    reset_clients()
+    clients._session = session
+
+    assert get_client("lambda") is not client
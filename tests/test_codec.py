@@ -0,0 +1,30 @@
+from datetime import date
+
+import pytest
+
+from viburnum.application import codec
+from viburnum.application.codec import JsonCodec, set_json_codec
+
+
+@pytest.fixture(autouse=True)
+def reset_codec(monkeypatch):
+    monkeypatch.setattr(codec, "_codec", None)
+
+
+def test_codec_instance_is_used_as_is():
+    instance = JsonCodec(default=str)
+
+    assert set_json_codec(instance) is instance
+    assert codec.get_json_codec() is instance
+
+
+def test_default_with_codec_instance_raises():
+    with pytest.raises(ValueError):
+        set_json_codec(JsonCodec(), default=str)
+    assert codec._codec is None
+
+
+def test_default_with_codec_name():
+    json_codec = set_json_codec("json", default=lambda obj: "custom")
+
+    assert json_codec.dumps({"date": date(2020, 1, 1)}) == '{"date": "custom"}'
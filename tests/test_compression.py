@@ -0,0 +1,43 @@
+import base64
+import gzip
+
+from viburnum.application import Request
+from viburnum.application.compression import compress_response
+from viburnum.local.events import api_event
+
+
+def test_response_is_compressed():
+    response = {"statusCode": 200, "headers": {}, "body": "a" * 2048}
+
+    compressed = compress_response(response, "gzip")
+
+    assert compressed["headers"]["Content-Encoding"] == "gzip"
+    assert compressed["isBase64Encoded"]
+    assert gzip.decompress(base64.b64decode(compressed["body"])) == b"a" * 2048
+
+
+def test_non_proxy_response_is_passed_as_is():
+    assert compress_response("a" * 2048, "gzip") == "a" * 2048
+    assert compress_response(None, "gzip") is None
+    assert compress_response(["a" * 2048], "gzip") == ["a" * 2048]
+
+
+def make_request(body: bytes) -> Request:
+    event = api_event(
+        "/",
+        "POST",
+        body=base64.b64encode(body).decode("ascii"),
+        is_base64_encoded=True,
+    )
+    return Request(event, None)
+
+
+def test_base64_text_body_is_decoded():
+    assert make_request("текст".encode()).body == "текст"
+
+
+def test_binary_body_falls_back_to_bytes():
+    request = make_request(b"\x89PNG\xff\x00")
+
+    assert request.body == b"\x89PNG\xff\x00"
+    assert request.body_bytes == b"\x89PNG\xff\x00"
@@ -0,0 +1,201 @@
+import io
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from viburnum.application import ResourceConnector, SqsPermission, sqs, sqs_handler
+from viburnum.application.base import Handler
+from viburnum.application.connectors import BucketClient, QueueClient
+from viburnum.local.stubs import LocalQueue
+
+
+class FailingConnector(ResourceConnector):
+    def after_invocation(self, failed: bool = False) -> None:
+        raise RuntimeError("after invocation")
+
+
+def make_handler(func, failing_connector: bool = False) -> tuple[Handler, LocalQueue]:
+    handler = sqs("Queue", SqsPermission.write)(Handler(func))
+    if failing_connector:
+        FailingConnector(handler, "Other")
+    queue = LocalQueue("Queue")
+    handler.set_resource_clients({"Queue": QueueClient(queue), "Other": None})
+    return handler, queue
+
+
+def send_messages(event, Queue, **kwargs):
+    Queue.batch_writer.send({"id": 1})
+    Queue.batch_writer.send({"id": 2})
+    if event.event.get("fail"):
+        raise ValueError("handler")
+    return "ok"
+
+
+def test_buffer_is_flushed_after_successful_invocation():
+    handler, queue = make_handler(send_messages)
+
+    assert handler({}, None) == "ok"
+    assert queue.sent == 2
+
+
+def test_buffer_is_dropped_after_failed_invocation():
+    handler, queue = make_handler(send_messages)
+
+    with pytest.raises(ValueError, match="handler"):
+        handler({"fail": True}, None)
+    assert queue.sent == 0
+    # Retry sends messages once
+    handler({}, None)
+    assert queue.sent == 2
+
+
+def test_resource_error_does_not_hide_handler_exception():
+    handler, queue = make_handler(send_messages, failing_connector=True)
+
+    with pytest.raises(ValueError, match="handler"):
+        handler({"fail": True}, None)
+    assert queue.sent == 0
+
+
+def test_resource_error_is_raised_after_all_resources():
+    handler, queue = make_handler(send_messages, failing_connector=True)
+
+    with pytest.raises(RuntimeError, match="after invocation"):
+        handler({}, None)
+    assert queue.sent == 2
+
+
+class CountingConnector(ResourceConnector):
+    built = 0
+
+    def get_resource_client(self):
+        CountingConnector.built += 1
+        return object()
+
+
+def collect_kwargs(calls):
+    def handler(event, **kwargs):
+        calls.append(kwargs)
+
+    return handler
+
+
+@pytest.fixture
+def built(monkeypatch):
+    monkeypatch.setattr(CountingConnector, "built", 0)
+    return lambda: CountingConnector.built
+
+
+def test_resource_kwargs_are_built_once(built):
+    calls = []
+    handler = Handler(collect_kwargs(calls))
+    CountingConnector(handler, "Resource")
+
+    handler({}, None)
+    handler({}, None)
+
+    assert built() == 1
+    assert list(calls[0]) == ["Resource"]
+    assert calls[0]["Resource"] is calls[1]["Resource"]
+
+
+def test_added_resource_rebuilds_kwargs(built):
+    calls = []
+    handler = Handler(collect_kwargs(calls))
+    CountingConnector(handler, "First")
+    handler({}, None)
+
+    CountingConnector(handler, "Second")
+    handler({}, None)
+
+    assert sorted(calls[1]) == ["First", "Second"]
+
+
+@pytest.mark.parametrize("in_lambda, expected", [(False, 0), (True, 1)])
+def test_eager_clients_are_built_in_lambda_only(
+    built, monkeypatch, in_lambda, expected
+):
+    monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+    if in_lambda:
+        monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "handler")
+    handler = Handler(collect_kwargs([]), eager_clients=True)
+
+    CountingConnector(handler, "Resource")
+
+    assert built() == expected
+    handler({}, None)
+    assert built() == 1
+
+
+@pytest.mark.parametrize("max_workers, is_async", [(1, False), (4, False), (4, True)])
+def test_messages_of_failed_record_are_dropped(
+    sqs_event, failed_ids, max_workers, is_async
+):
+    def fan_out(event, Queue):
+        Queue.batch_writer.send({"source": event.body["id"]})
+        Queue.batch_writer.send({"source": event.body["id"]})
+        if event.body["id"] == 1:
+            raise ValueError("poison")
+
+    async def async_fan_out(event, Queue):
+        fan_out(event, Queue)
+
+    handler = sqs("Queue", SqsPermission.write)(
+        sqs_handler("Queue", per_record=True, max_workers=max_workers)(
+            async_fan_out if is_async else fan_out
+        )
+    )
+    queue = LocalQueue("Queue")
+    handler.set_resource_clients({"Queue": QueueClient(queue)})
+
+    assert failed_ids(handler(sqs_event(3), None)) == ["m1"]
+    sources = sorted(json.loads(m["body"])["source"] for m in queue.messages)
+    assert sources == [0, 0, 2, 2]
+
+
+class StubS3Client:
+    """Client of `BucketClient`, that records requested ranges."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.ranges: list[tuple[int, int]] = []
+        self._lock = threading.Lock()
+
+    def head_object(self, Bucket: str, Key: str) -> dict:
+        return {"ContentLength": len(self.data)}
+
+    def get_object(self, Bucket: str, Key: str, Range: str) -> dict:
+        start, end = map(int, Range[len("bytes=") :].split("-"))
+        with self._lock:
+            self.ranges.append((start, end))
+        return {"Body": io.BytesIO(self.data[start : end + 1])}
+
+
+def make_bucket(data: bytes, **kwargs) -> tuple[BucketClient, StubS3Client]:
+    client = StubS3Client(data)
+    bucket = SimpleNamespace(name="Bucket", meta=SimpleNamespace(client=client))
+    return BucketClient(bucket, **kwargs), client
+
+
+def test_download_part_size_is_limited_by_max_memory():
+    data = bytes(range(256)) * 4
+    bucket, client = make_bucket(data, part_size=1000, max_memory=100)
+
+    target = bucket.download("key", bytearray(len(data)))
+
+    assert target == data
+    assert max(end - start + 1 for start, end in client.ranges) == 100
+    assert sorted(client.ranges)[0] == (0, 99)
+    assert sorted(client.ranges)[-1] == (1000, 1023)
+
+
+def test_download_into_file(tmp_path):
+    data = b"0123456789" * 10
+    bucket, client = make_bucket(data, part_size=30)
+
+    path = bucket.download("key", tmp_path / "object", max_concurrency=2)
+
+    assert path.read_bytes() == data
+    assert sorted(client.ranges) == [(0, 29), (30, 59), (60, 89), (90, 99)]
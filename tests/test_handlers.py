@@ -0,0 +1,393 @@
+import asyncio
+import base64
+import io
+import threading
+from datetime import datetime
+
+import pytest
+
+from viburnum.application import (
+    BinaryResponse,
+    RawJsonResponse,
+    Request,
+    Response,
+    S3EventSequence,
+    StreamResponse,
+    TextResponse,
+    route,
+)
+from viburnum.application.codec import get_json_codec
+from viburnum.application.handlers import S3Event
+from viburnum.application.http import MultipartError
+from viburnum.local.events import api_event, api_v2_event, s3_event, s3_record
+
+# ____________________ Request _____________________________
+
+BOUNDARY = "boundary"
+
+
+def multipart_body(*parts: bytes, closed: bool = True) -> bytes:
+    body = b"".join(
+        b"--" + BOUNDARY.encode() + b"\r\n" + part + b"\r\n" for part in parts
+    )
+    if closed:
+        body += b"--" + BOUNDARY.encode() + b"--\r\n"
+    return body
+
+
+def multipart_request(body: bytes, base64_encoded: bool = True) -> Request:
+    event = api_event(
+        "/upload",
+        "POST",
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+        body=base64.b64encode(body).decode("ascii") if base64_encoded else body,
+        is_base64_encoded=base64_encoded,
+    )
+    return Request(event, None)
+
+
+TEXT_PART = b'Content-Disposition: form-data; name="title"\r\n\r\nHello'
+FILE_PART = (
+    b'Content-Disposition: form-data; name="file"; filename="a.png"\r\n'
+    b"Content-Type: image/png\r\n\r\n\x89PNG\r\n\x00\xff"
+)
+
+
+def test_multipart_form_with_file_and_text():
+    request = multipart_request(multipart_body(TEXT_PART, FILE_PART))
+
+    assert request.form() == {"title": "Hello"}
+    file = request.files()["file"]
+    assert file.filename == "a.png"
+    assert file.content_type == "image/png"
+    assert bytes(file.data) == b"\x89PNG\r\n\x00\xff"
+    assert file.size == 8
+
+
+def test_multipart_crlf_and_boundary_like_data():
+    data = b"line\r\n--boundaryless\r\n--boundary-ish"
+    part = b'Content-Disposition: form-data; name="file"; filename="a.txt"\r\n\r\n'
+    request = multipart_request(multipart_body(part + data, TEXT_PART))
+
+    assert bytes(request.files()["file"].data) == data
+    assert request.form() == {"title": "Hello"}
+
+
+def test_multipart_missing_closing_boundary():
+    request = multipart_request(TEXT_PART.join([b"--boundary\r\n", b""]))
+
+    with pytest.raises(MultipartError):
+        request.form()
+
+
+def test_multipart_parts_are_iterated_lazily():
+    body = multipart_body(TEXT_PART, FILE_PART, closed=False)[:-2]
+    parts = multipart_request(body).iter_multipart()
+
+    assert next(parts).name == "title"
+    with pytest.raises(MultipartError):
+        next(parts)
+
+
+def test_multipart_from_not_encoded_body():
+    request = multipart_request(multipart_body(TEXT_PART), base64_encoded=False)
+
+    assert request.form() == {"title": "Hello"}
+
+
+def test_not_multipart_body():
+    request = Request(api_event("/upload", "POST", body={"a": 1}), None)
+
+    assert request.form() == {}
+    with pytest.raises(MultipartError):
+        request.iter_multipart()
+
+
+def test_urlencoded_form():
+    event = api_event(
+        "/form",
+        "POST",
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        body="a=1&b=&c=%D1%97",
+    )
+
+    assert Request(event, None).form() == {"a": "1", "b": "", "c": "ї"}
+
+
+def test_base64_encoded_body():
+    event = api_event(
+        "/items",
+        "POST",
+        body=base64.b64encode(b'{"a": 1}').decode("ascii"),
+        is_base64_encoded=True,
+    )
+    request = Request(event, None)
+
+    assert request.body_bytes == b'{"a": 1}'
+    assert request.body == '{"a": 1}'
+    assert request.json() == {"a": 1}
+
+
+def test_cookies_of_v1_event():
+    event = api_event("/", headers={"Cookie": 'session=abc; theme="dark%20blue"'})
+    event["multiValueHeaders"]["Cookie"] = ["session=abc", "lang=uk"]
+
+    assert Request(event, None).cookies == {"session": "abc", "lang": "uk"}
+
+
+def test_cookies_of_v2_event():
+    event = api_v2_event("/", headers={"Cookie": 'session=abc; theme="dark%20blue"'})
+
+    assert event["cookies"] == ["session=abc", 'theme="dark%20blue"']
+    assert Request(event, None).cookies == {"session": "abc", "theme": "dark blue"}
+
+
+def test_headers_are_case_insensitive():
+    event = api_event("/", headers={"X-Request-Id": "1"})
+    event["multiValueHeaders"]["X-Tag"] = ["a", "b"]
+    headers = Request(event, None).headers
+
+    assert headers["x-request-id"] == headers["X-REQUEST-ID"] == "1"
+    assert "x-tag" in headers
+    assert headers.get("X-Tag") == "b"
+    assert headers.get_all("x-tag") == ["a", "b"]
+    assert headers.get_all("missing") == []
+    assert Request(event, None).content_type is None
+
+
+# ____________________ Responses _____________________________
+
+
+def test_json_response():
+    response = Response(201, {"id": 1}, {"X-Id": "1"}).as_response()
+
+    assert response == {
+        "statusCode": 201,
+        # Content type of JSON response isn't set, as before response variants
+        "headers": {"X-Id": "1"},
+        "isBase64Encoded": False,
+        "body": get_json_codec().dumps({"id": 1}),
+    }
+
+
+def test_text_response():
+    response = TextResponse(200, "ok").as_response()
+
+    assert response["body"] == "ok"
+    assert not response["isBase64Encoded"]
+    assert response["headers"]["Content-Type"] == "text/plain; charset=utf-8"
+
+
+def test_content_type_header_takes_precedence():
+    response = TextResponse(
+        200, "<p>ok</p>", {"content-type": "text/html"}, content_type="text/csv"
+    ).as_response()
+
+    assert response["headers"] == {"content-type": "text/html"}
+    response = TextResponse(200, "a,b", content_type="text/csv").as_response()
+    assert response["headers"] == {"Content-Type": "text/csv"}
+
+
+@pytest.mark.parametrize("body", ['{"a": 1}', b'{"a": 1}'])
+def test_raw_json_response(body):
+    response = RawJsonResponse(200, body).as_response()
+
+    assert response["body"] == '{"a": 1}'
+    assert not response["isBase64Encoded"]
+    assert response["headers"]["Content-Type"] == "application/json"
+
+
+def test_binary_response():
+    response = BinaryResponse(200, b"\x89PNG", content_type="image/png").as_response()
+
+    assert base64.b64decode(response["body"]) == b"\x89PNG"
+    assert response["isBase64Encoded"]
+    assert response["headers"]["Content-Type"] == "image/png"
+
+
+@pytest.mark.parametrize(
+    "body", [io.BytesIO(b"abc"), iter([b"a", b"bc"])], ids=["file", "iterator"]
+)
+def test_binary_stream_response(body):
+    response = StreamResponse(200, body).as_response()
+
+    assert base64.b64decode(response["body"]) == b"abc"
+    assert response["isBase64Encoded"]
+    assert response["headers"]["Content-Type"] == "application/octet-stream"
+
+
+@pytest.mark.parametrize(
+    "body", [io.StringIO("abc"), iter(["a", "bc"])], ids=["file", "iterator"]
+)
+def test_text_stream_response(body):
+    response = StreamResponse(200, body, content_type="text/csv").as_response()
+
+    assert response["body"] == "abc"
+    assert not response["isBase64Encoded"]
+
+
+def test_multi_value_headers_are_kept_for_v1_event():
+    response = Response(
+        200, {}, {"X-A": "1"}, multi_value_headers={"Set-Cookie": ["a=1", "b=2"]}
+    ).as_response()
+
+    assert response["headers"] == {"X-A": "1"}
+    assert response["multiValueHeaders"] == {"Set-Cookie": ["a=1", "b=2"]}
+
+
+# ____________________ Http Api (payload 2.0) _____________________________
+
+
+def test_v2_event_round_trip():
+    @route("/items/{id}", ["GET"])
+    def get_item(request: Request):
+        return Response(
+            200,
+            {
+                "path": request.path,
+                "method": request.method,
+                "id": request.path_params["id"],
+                "query": request.query_params,
+                "multi_query": request.multi_query_params,
+                "cookies": request.cookies,
+            },
+            {"X-A": "1"},
+            multi_value_headers={"X-B": ["1", "2"], "Set-Cookie": ["a=1", "b=2"]},
+        )
+
+    event = api_v2_event(
+        "/items/42",
+        resource="/items/{id}",
+        path_params={"id": "42"},
+        headers={"Cookie": "session=abc"},
+    )
+    event["rawQueryString"] = "tag=a&tag=b&page=2"
+
+    response = get_item(event, None)
+
+    assert get_json_codec().loads(response["body"]) == {
+        "path": "/items/42",
+        "method": "GET",
+        "id": "42",
+        "query": {"tag": "b", "page": "2"},
+        "multi_query": {"tag": ["a", "b"], "page": ["2"]},
+        "cookies": {"session": "abc"},
+    }
+    assert "multiValueHeaders" not in response
+    assert response["headers"] == {"X-A": "1", "X-B": "1,2"}
+    assert response["cookies"] == ["a=1", "b=2"]
+
+
+def test_v1_event_response_keeps_multi_value_headers():
+    @route("/items", ["GET"])
+    def get_items(request: Request):
+        return Response(200, [], multi_value_headers={"Set-Cookie": ["a=1"]})
+
+    response = get_items(api_event("/items"), None)
+
+    assert response["multiValueHeaders"] == {"Set-Cookie": ["a=1"]}
+    assert "cookies" not in response
+
+
+@pytest.mark.parametrize("result", [{"items": []}, ["item"], "text", None])
+def test_v2_non_proxy_result_is_passed_as_is(result):
+    @route("/items", ["GET"])
+    def get_items(request: Request):
+        return result
+
+    assert get_items(api_v2_event("/items"), None) == result
+
+
+# ____________________ S3 _____________________________
+
+
+def test_s3_object_key_is_url_decoded():
+    record = s3_record("Bucket", "reports/2023 Q1/звіт+1.csv", size=10, etag="abc")
+
+    assert record["s3"]["object"]["key"] == (
+        "reports/2023+Q1/%D0%B7%D0%B2%D1%96%D1%82%2B1.csv"
+    )
+    s3_object = S3Event(record).object
+    assert s3_object.key == "reports/2023 Q1/звіт+1.csv"
+    assert s3_object.size == 10
+    assert s3_object.eTag == "abc"
+
+
+def test_s3_event_values():
+    record = s3_record("Bucket", "a.json", event_name="ObjectRemoved:Delete")
+    record["eventTime"] = "2023-01-02T03:04:05.678Z"
+    event = S3Event(record)
+
+    assert event.event_name == "ObjectRemoved:Delete"
+    assert event.event_time == datetime(2023, 1, 2, 3, 4, 5, 678000)
+    assert event.bucket.name == "Bucket"
+    assert event.bucket.arn == "arn:aws:s3:::Bucket"
+    # Nested views are created once
+    assert event.object is event.object
+    assert event == S3Event(record)
+
+
+def test_s3_event_without_optional_values():
+    event = S3Event({"s3": {"bucket": {"name": "Bucket"}, "object": {"key": "a"}}})
+
+    assert event.event_name is None
+    assert event.object.size is None
+    assert event.object.eTag is None
+
+
+def test_s3_event_sequence_iterates_over_records():
+    keys = ["a.json", "b c.json", "d/e.json"]
+
+    events = S3EventSequence(s3_event("Bucket", keys), None)
+
+    assert len(events) == 3
+    assert [e.object.key for e in events] == keys
+    assert all(isinstance(e, S3Event) for e in events)
+    assert events[1].bucket.name == "Bucket"
+
+
+# ____________________ Async handlers _____________________________
+
+
+def loop_recorder(loops):
+    async def handler(request):
+        await asyncio.sleep(0)
+        loops.append(asyncio.get_running_loop())
+        return TextResponse(200, "ok")
+
+    handler.__name__ = "get_loop"
+    return route("/loop", ["GET"])(handler)
+
+
+def test_async_handler_reuses_event_loop():
+    loops = []
+    handler = loop_recorder(loops)
+
+    responses = [handler(api_event("/loop"), None) for _ in range(3)]
+
+    assert [r["body"] for r in responses] == ["ok"] * 3
+    assert len(set(map(id, loops))) == 1
+    assert not loops[0].is_closed()
+
+
+def test_async_handler_uses_loop_per_thread():
+    loops = []
+    handler = loop_recorder(loops)
+
+    handler(api_event("/loop"), None)
+    thread = threading.Thread(target=handler, args=(api_event("/loop"), None))
+    thread.start()
+    thread.join()
+
+    assert loops[0] is not loops[1]
+
+
+def test_closed_event_loop_is_replaced():
+    loops = []
+    handler = loop_recorder(loops)
+    handler(api_event("/loop"), None)
+
+    loops[0].close()
+    handler(api_event("/loop"), None)
+
+    assert loops[1] is not loops[0]
@@ -0,0 +1,128 @@
+import pytest
+
+from viburnum.application import (
+    IdempotencyState,
+    MemoryIdempotencyStore,
+    MessageInFlight,
+    SqliteIdempotencyStore,
+    idempotent,
+    sqs_handler,
+)
+
+
+@pytest.fixture(params=[MemoryIdempotencyStore, SqliteIdempotencyStore])
+def store(request):
+    return request.param()
+
+
+def make_handler(store, worker, **kwargs):
+    return idempotent(store)(sqs_handler("Queue", **kwargs)(worker))
+
+
+def begin_key(handler, message_id: str) -> str:
+    key = f"{handler.idempotency.prefix}{message_id}"
+    assert handler.idempotency.store.begin(key, 60) is IdempotencyState.new
+    return key
+
+
+def test_store_states(store):
+    assert store.begin("key", 60) is IdempotencyState.new
+    assert store.begin("key", 60) is IdempotencyState.in_flight
+    store.complete("key", 60)
+    assert store.begin("key", 60) is IdempotencyState.completed
+    # Completed key isn't released
+    store.release("key")
+    assert store.begin("key", 60) is IdempotencyState.completed
+
+
+def test_store_release(store):
+    store.begin("key", 60)
+    store.release("key")
+
+    assert store.begin("key", 60) is IdempotencyState.new
+
+
+def test_store_expired_keys(store):
+    store.begin("in_flight", 0)
+    store.begin("completed", 60)
+    store.complete("completed", 0)
+
+    assert store.begin("in_flight", 60) is IdempotencyState.new
+    assert store.begin("completed", 60) is IdempotencyState.new
+
+
+@pytest.mark.parametrize("is_async", [False, True])
+def test_per_record_completed_is_skipped(
+    store, is_async, sqs_worker, sqs_event, failed_ids, processed
+):
+    handler = make_handler(store, sqs_worker(is_async=is_async), per_record=True)
+
+    assert failed_ids(handler(sqs_event(2), None)) == []
+    assert failed_ids(handler(sqs_event(3), None)) == []
+    assert sorted(processed) == [0, 1, 2]
+
+
+@pytest.mark.parametrize("is_async", [False, True])
+def test_per_record_in_flight_is_reported(
+    store, is_async, sqs_worker, sqs_event, failed_ids, processed
+):
+    handler = make_handler(store, sqs_worker(is_async=is_async), per_record=True)
+    key = begin_key(handler, "m1")
+
+    assert failed_ids(handler(sqs_event(3), None)) == ["m1"]
+    assert sorted(processed) == [0, 2]
+    # Redelivered message is processed after other worker releases it
+    handler.idempotency.release(key)
+    assert failed_ids(handler(sqs_event(3), None)) == []
+    assert sorted(processed) == [0, 1, 2]
+
+
+@pytest.mark.parametrize("is_async", [False, True])
+def test_per_record_failed_is_released(
+    store, is_async, sqs_worker, sqs_event, failed_ids, processed
+):
+    poison = {1}
+    handler = make_handler(store, sqs_worker(poison, is_async), per_record=True)
+
+    assert failed_ids(handler(sqs_event(2), None)) == ["m1"]
+    poison.clear()
+    assert failed_ids(handler(sqs_event(2), None)) == []
+    assert sorted(processed) == [0, 1, 1]
+
+
+def test_batch_in_flight_is_reported(
+    store, sqs_worker, sqs_event, failed_ids, processed
+):
+    handler = make_handler(
+        store, sqs_worker(batch=True), report_batch_item_failures=True
+    )
+    begin_key(handler, "m0")
+
+    assert failed_ids(handler(sqs_event(2), None)) == ["m0"]
+    assert processed == [1]
+
+
+def test_batch_in_flight_fails_invocation_without_failure_reports(
+    store, sqs_worker, sqs_event, processed
+):
+    handler = make_handler(store, sqs_worker(batch=True))
+    key = begin_key(handler, "m0")
+
+    with pytest.raises(MessageInFlight):
+        handler(sqs_event(2), None)
+    assert processed == [1]
+    # Completed messages of retried batch are skipped
+    handler.idempotency.release(key)
+    handler(sqs_event(2), None)
+    assert processed == [1, 0]
+
+
+def test_batch_failure_releases_keys(store, sqs_worker, sqs_event, processed):
+    poison = {0}
+    handler = make_handler(store, sqs_worker(poison, batch=True))
+
+    with pytest.raises(ValueError):
+        handler(sqs_event(2), None)
+    poison.clear()
+    handler(sqs_event(2), None)
+    assert processed == [0, 0, 1]
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+from pathlib import Path
+
+BOTO3_FREE_IMPORT = (
+    "import sys, viburnum.application; "
+    "assert not any(m.startswith(('boto3', 'botocore')) for m in sys.modules)"
+)
+
+
+def test_application_import_is_boto3_free():
+    result = subprocess.run(
+        [sys.executable, "-c", BOTO3_FREE_IMPORT],
+        cwd=Path(__file__).parents[1],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+CLI_IMPORT = (
+    "import sys, viburnum.cli; "
+    "loaded = [m for m in sys.modules if m.startswith('viburnum.local.')]; "
+    "assert loaded == ['viburnum.local.modes'], loaded"
+)
+
+
+def test_cli_import_doesnt_load_local_runtime():
+    result = subprocess.run(
+        [sys.executable, "-c", CLI_IMPORT],
+        cwd=Path(__file__).parents[1],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_cli_uses_server_mode_of_local_server():
+    from viburnum.cli import ServerMode as CliServerMode
+    from viburnum.local.server import ServerMode
+
+    assert CliServerMode is ServerMode
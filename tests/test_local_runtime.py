@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from viburnum.application.base import is_local_load
+from viburnum.local import load_application
+
+os.environ.setdefault("JSII_SILENCE_WARNING_DEPRECATED_NODE_VERSION", "1")
+
+APP = """
+import aws_cdk as cdk
+from viburnum.application import Application, route
+from viburnum.deployer import AppStack
+
+app = Application("TestApp")
+app.add_handler(route("/items", ["GET"])(lambda request: None))
+
+cdk_app = cdk.App(outdir="cdk.out")
+AppStack(cdk_app, app)
+cdk_app.synth()
+"""
+
+
+def test_load_application_stops_before_stack_is_built(tmp_path, monkeypatch):
+    pytest.importorskip("aws_cdk")
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "app.py").write_text(APP)
+
+    app = load_application(tmp_path / "app.py")
+
+    assert app.name == "TestApp"
+    assert [h.path for h in app.handlers] == ["/items"]
+    assert not (tmp_path / "cdk.out").exists()
+    # Child processes, e.g. `cdk synth`, build the stack as usual
+    assert not is_local_load()
+    assert not any(name.startswith("VIBURNUM") for name in os.environ)
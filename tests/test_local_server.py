@@ -0,0 +1,51 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from viburnum.application import Application, Response, route
+from viburnum.local import LocalApi, ServerMode, create_server
+
+
+@pytest.fixture
+def server():
+    @route("/items", ["GET"])
+    def get_items(request):
+        return Response(200, {"items": []})
+
+    app = Application("TestApp")
+    app.add_handler(get_items)
+    server = create_server(LocalApi(app), port=0, mode=ServerMode.thread, workers=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_keep_alive_connections_dont_hold_workers(server):
+    host, port = server.server_address
+    connections = [http.client.HTTPConnection(host, port, timeout=5) for _ in range(4)]
+    try:
+        # Every connection stays open after its request
+        for _ in range(2):
+            for connection in connections:
+                connection.request("GET", "/items")
+                response = connection.getresponse()
+                assert response.status == 200
+                assert json.loads(response.read()) == {"items": []}
+                assert not response.will_close
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def test_idle_connection_doesnt_block_shutdown(server):
+    host, port = server.server_address
+    connection = http.client.HTTPConnection(host, port, timeout=5)
+    connection.request("GET", "/items")
+    connection.getresponse().read()
+    # Connection is left open, fixture checks that server stops
@@ -0,0 +1,515 @@
+import importlib.util
+import os
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+os.environ.setdefault("JSII_SILENCE_WARNING_DEPRECATED_NODE_VERSION", "1")
+pytest.importorskip("aws_cdk")
+
+from viburnum.application import Application, Architecture  # noqa: E402
+from viburnum.deployer import AppStack, packaging  # noqa: E402
+from viburnum.deployer.packaging import (  # noqa: E402
+    DEFAULT_EXCLUDES,
+    ApiRouterPackage,
+    FunctionPackage,
+    LibLayerPackage,
+    SharedLayerPackage,
+    compile_file,
+    sync_folder,
+)
+
+
+@pytest.fixture
+def requirements(tmp_path):
+    path = tmp_path / "requirements.txt"
+    path.write_text("requests==2.28.1\n")
+    return path
+
+
+@pytest.fixture
+def host_platform(monkeypatch):
+    def set_platform(platform: str) -> None:
+        monkeypatch.setattr(packaging.sysconfig, "get_platform", lambda: platform)
+
+    return set_platform
+
+
+def layer(requirements, architecture=Architecture.x86_64) -> LibLayerPackage:
+    return LibLayerPackage(requirements, architecture, requirements.parent / ".layers")
+
+
+def test_x86_64_layer_is_built_for_linux_host(requirements, host_platform):
+    host_platform("linux-x86_64")
+    package = layer(requirements)
+
+    assert package.platform.startswith("host-linux-x86_64-")
+    assert package._platform_options() == []
+
+
+@pytest.mark.parametrize("platform", ["macosx-11.0-arm64", "linux-aarch64"])
+def test_x86_64_layer_is_cross_installed_on_other_hosts(
+    requirements, host_platform, platform
+):
+    host_platform("linux-x86_64")
+    host_hash = layer(requirements).asset_hash
+    host_platform(platform)
+    package = layer(requirements)
+
+    assert package.platform == "manylinux2014_x86_64"
+    options = package._platform_options()
+    assert options[options.index("--platform") + 1] == "manylinux2014_x86_64"
+    assert "--only-binary=:all:" in options
+    assert package.asset_hash != host_hash
+
+
+def test_arm64_layer_is_always_cross_installed(requirements, host_platform):
+    host_platform("linux-x86_64")
+    package = layer(requirements, Architecture.arm64)
+
+    assert package.platform == "manylinux2014_aarch64"
+    assert "--only-binary=:all:" in package._platform_options()
+
+
+class StubPip:
+    """Records pip commands, wheelhouse provides only `available` wheels."""
+
+    def __init__(self, available: bool = True) -> None:
+        self.available = available
+        self.calls: list[str] = []
+
+    def __call__(self, *args: str, capture_output: bool = False) -> bool:
+        command = args[0]
+        self.calls.append(f"{command} quiet" if capture_output else command)
+        if command == "install":
+            target = Path(args[args.index("--target") + 1])
+            wheelhouse = Path(args[args.index("--find-links") + 1])
+            if not any(wheelhouse.glob("*.whl")):
+                return False
+            (target / "requests").mkdir(parents=True)
+            return self.available
+        wheelhouse = Path(args[2])
+        (wheelhouse / "requests-2.28.1-py3-none-any.whl").touch()
+        self.available = True
+        return True
+
+
+@pytest.fixture
+def pip(monkeypatch, host_platform) -> StubPip:
+    host_platform("linux-x86_64")
+    stub = StubPip()
+    monkeypatch.setattr(LibLayerPackage, "_pip", staticmethod(stub))
+    return stub
+
+
+def test_empty_wheelhouse_is_filled_before_install(requirements, pip):
+    package = layer(requirements, Architecture.arm64)
+
+    folder = package.prepare()
+
+    assert pip.calls == ["download", "install"]
+    # Temporary build folder is renamed
+    assert [p.name for p in folder.parent.iterdir()] == [folder.name]
+    assert (folder / "python" / "requests").is_dir()
+
+
+def test_layer_is_installed_from_wheelhouse(requirements, pip):
+    layer(requirements).prepare()
+    pip.calls.clear()
+    requirements.write_text("requests==2.28.1\nurllib3\n")
+
+    layer(requirements).prepare()
+
+    assert pip.calls == ["install quiet"]
+
+
+def test_wheelhouse_is_filled_with_missing_requirements(requirements, pip):
+    layer(requirements).prepare()
+    pip.calls.clear()
+    pip.available = False
+    requirements.write_text("requests==2.28.1\nurllib3\n")
+
+    layer(requirements).prepare()
+
+    assert pip.calls == ["install quiet", "wheel", "install"]
+
+
+def test_prepared_layer_is_reused_and_outdated_is_pruned(requirements, pip):
+    first = layer(requirements).prepare()
+    assert layer(requirements).prepare() == first
+    assert pip.calls == ["wheel", "install"]
+
+    requirements.write_text("requests==2.31.0\n")
+    second = layer(requirements).prepare()
+
+    assert second != first
+    assert not first.exists()
+
+
+def test_layer_hash_depends_on_requirements_runtime_and_architecture(
+    requirements, host_platform, monkeypatch
+):
+    host_platform("linux-x86_64")
+    initial = layer(requirements).asset_hash
+    requirements.write_text("# Pinned\nrequests==2.28.1\n\n")
+    assert layer(requirements).asset_hash == initial
+
+    requirements.write_text("requests==2.31.0\n")
+    changed_requirements = layer(requirements).asset_hash
+    requirements.write_text("requests==2.28.1\n")
+    arm64 = layer(requirements, Architecture.arm64).asset_hash
+    monkeypatch.setattr(packaging, "LAMBDA_RUNTIME", "python3.12")
+    changed_runtime = layer(requirements).asset_hash
+
+    hashes = {initial, changed_requirements, arm64, changed_runtime}
+    assert len(hashes) == 4
+
+
+# ____________________ Sync _____________________________
+
+
+def write_files(root, files: dict[str, str]) -> None:
+    for relative_path, content in files.items():
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def list_files(root) -> list[str]:
+    return sorted(
+        p.relative_to(root).as_posix() for p in root.rglob("*") if p.is_file()
+    )
+
+
+@pytest.fixture
+def copies(monkeypatch) -> list[str]:
+    """Names of files copied by `sync_folder`."""
+    copied = []
+    copyfile = packaging.shutil.copyfile
+
+    def record_copy(source, target):
+        copied.append(Path(source).name)
+        return copyfile(source, target)
+
+    monkeypatch.setattr(packaging.shutil, "copyfile", record_copy)
+    return copied
+
+
+@pytest.fixture
+def source(tmp_path):
+    source = tmp_path / "shared"
+    write_files(
+        source,
+        {
+            "__init__.py": "",
+            "utils.py": "VALUE = 1\n",
+            "data/config.json": "{}",
+            "README.md": "docs",
+            "__pycache__/utils.cpython-39.pyc": "bytecode",
+            ".env": "SECRET=1",
+            "tests/test_utils.py": "",
+            "test_module.py": "",
+            "module_test.py": "",
+            "conftest.py": "",
+        },
+    )
+    return source
+
+
+def sync(source, target, **kwargs) -> str:
+    return sync_folder(
+        source, target, manifest_path=target.with_suffix(".json"), **kwargs
+    )
+
+
+def test_sync_drops_caches_hidden_files_and_tests(source, tmp_path):
+    target = tmp_path / "build"
+
+    sync(source, target, excludes=(*DEFAULT_EXCLUDES, "*.md"))
+
+    assert list_files(target) == ["__init__.py", "data/config.json", "utils.py"]
+
+
+def test_sync_includes(source, tmp_path):
+    target = tmp_path / "build"
+
+    sync(source, target, includes=["utils.py", "data"])
+
+    assert list_files(target) == ["data/config.json", "utils.py"]
+
+
+def test_second_sync_copies_nothing(source, tmp_path, copies):
+    target = tmp_path / "build"
+    first_hash = sync(source, target)
+    assert sorted(copies) == ["README.md", "__init__.py", "config.json", "utils.py"]
+    copies.clear()
+
+    assert sync(source, target) == first_hash
+    assert copies == []
+    # Touched file is hashed again, but isn't copied
+    os.utime(source / "utils.py")
+    assert sync(source, target) == first_hash
+    assert copies == []
+
+
+def test_sync_copies_changed_and_removes_deleted_files(source, tmp_path, copies):
+    target = tmp_path / "build"
+    first_hash = sync(source, target)
+    copies.clear()
+
+    (source / "utils.py").write_text("VALUE = 2\n")
+    (source / "data" / "config.json").unlink()
+    (source / "data").rmdir()
+    second_hash = sync(source, target)
+
+    assert copies == ["utils.py"]
+    assert (target / "utils.py").read_text() == "VALUE = 2\n"
+    assert list_files(target) == ["README.md", "__init__.py", "utils.py"]
+    assert not (target / "data").exists()
+    assert second_hash != first_hash
+
+
+def test_sync_normalizes_mtime_and_permissions(source, tmp_path):
+    (source / "run.sh").write_text("#!/bin/sh\n")
+    (source / "run.sh").chmod(0o700)
+    (source / "utils.py").chmod(0o600)
+    target = tmp_path / "build"
+
+    sync(source, target)
+
+    for path in [target, *target.rglob("*")]:
+        assert path.stat().st_mtime == packaging.NORMALIZED_MTIME
+    assert (target / "utils.py").stat().st_mode & 0o777 == 0o644
+    assert (target / "run.sh").stat().st_mode & 0o777 == 0o755
+    assert (target / "data").stat().st_mode & 0o777 == 0o755
+
+
+def test_hash_depends_only_on_content(source, tmp_path):
+    first_hash = sync(source, tmp_path / "first")
+    for path in source.rglob("*"):
+        os.utime(path, (0, 0))
+
+    assert sync(source, tmp_path / "second") == first_hash
+
+
+def test_shared_layer_asset_hash_is_stable(source, tmp_path):
+    layers_folder = tmp_path / ".layers"
+    layer = SharedLayerPackage(source, layers_folder=layers_folder)
+    layer.prepare()
+    first_hash = layer.asset_hash
+    os.utime(source / "utils.py")
+
+    layer = SharedLayerPackage(source, layers_folder=layers_folder)
+    folder = layer.prepare()
+
+    assert layer.asset_hash == first_hash
+    assert (folder / "python" / "shared" / "utils.py").exists()
+
+
+# ____________________ Function packages _____________________________
+
+HANDLER_MODULE = """
+from viburnum.application import package_config, route
+
+
+@package_config(include=["templates/*"], exclude=["*.draft"])
+@route("/items", ["GET"])
+def handler(request):
+    return None
+"""
+
+
+@pytest.fixture
+def handler_folder(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "functions" / "get_items"
+    write_files(
+        folder,
+        {
+            "handler.py": HANDLER_MODULE,
+            "helpers.py": "",
+            "templates/item.html": "<p></p>",
+            "templates/item.draft": "",
+            "notes.md": "",
+            "__pycache__/handler.cpython-39.pyc": "",
+        },
+    )
+    return folder
+
+
+def import_handler(folder):
+    spec = importlib.util.spec_from_file_location("handler", folder / "handler.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.handler
+
+
+def test_package_config_narrows_function_package(handler_folder):
+    handler = import_handler(handler_folder)
+    app = Application("TestApp", package_excludes=["*.md"])
+    stack = SimpleNamespace(_app=app, package_sizes={})
+    stack.get_package_excludes = partial(AppStack.get_package_excludes, stack)
+
+    AppStack.build_function_code(stack, handler)
+
+    folder = Path(".build", "functions", handler.name)
+    # Module of handler is deployed, even if it isn't included
+    assert list_files(folder) == ["handler.py", "templates/item.html"]
+    assert stack.package_sizes[handler.name]["files"] == 2
+
+
+def test_function_package_without_config(handler_folder):
+    package = FunctionPackage("get_items", handler_folder)
+    package.prepare()
+
+    assert list_files(package.folder) == [
+        "handler.py",
+        "helpers.py",
+        "notes.md",
+        "templates/item.draft",
+        "templates/item.html",
+    ]
+
+
+def test_function_package_bytecode(handler_folder, monkeypatch):
+    monkeypatch.setattr(packaging, "can_compile_bytecode", lambda: True)
+    first = FunctionPackage(
+        "first", handler_folder, compile_bytecode=True, build_folder=Path("first")
+    )
+    first.prepare()
+    second = FunctionPackage(
+        "second", handler_folder, compile_bytecode=True, build_folder=Path("second")
+    )
+    second.prepare()
+
+    bytecode = [p for p in list_files(first.folder) if p.endswith(".pyc")]
+    assert len(bytecode) == 2
+    assert first.asset_hash == second.asset_hash
+    for path in bytecode:
+        assert (first.folder / path).read_bytes() == (second.folder / path).read_bytes()
+        assert (first.folder / path).stat().st_mtime == packaging.NORMALIZED_MTIME
+
+
+def test_bytecode_isnt_compiled_by_other_python(handler_folder, monkeypatch):
+    monkeypatch.setattr(packaging, "can_compile_bytecode", lambda: False)
+    package = FunctionPackage("get_items", handler_folder, compile_bytecode=True)
+    plain = FunctionPackage("plain", handler_folder)
+
+    package.prepare()
+    plain.prepare()
+
+    assert not any(p.endswith(".pyc") for p in list_files(package.folder))
+    assert package.asset_hash == plain.asset_hash
+
+
+def test_compiled_bytecode_is_deterministic(tmp_path):
+    module = tmp_path / "module.py"
+    module.write_text("VALUE = 1\n")
+
+    first = compile_file(module, "module.py").read_bytes()
+    os.utime(module, (0, 0))
+    cache_path = compile_file(module, "module.py")
+
+    assert cache_path.read_bytes() == first
+    assert cache_path.stat().st_mtime == packaging.NORMALIZED_MTIME
+
+
+# ____________________ Api router package _____________________________
+
+
+def router_package(tmp_path, handlers, **kwargs) -> ApiRouterPackage:
+    package = ApiRouterPackage("Router", build_folder=tmp_path / ".build", **kwargs)
+    for relative_path, includes in handlers:
+        package.add_package(relative_path, tmp_path / relative_path, includes)
+    package.add_module("functions/__init__.py", "")
+    package.add_module("router.py", "handlers = []\n")
+    package.prepare()
+    return package
+
+
+@pytest.fixture
+def handler_packages(tmp_path):
+    write_files(
+        tmp_path / "functions",
+        {
+            "get_item/handler.py": "",
+            "get_item/template.html": "",
+            "get_item/notes.md": "",
+            "list_items/handler.py": "",
+        },
+    )
+    return [("functions/get_item", None), ("functions/list_items", None)]
+
+
+def test_router_package_is_synced_incrementally(tmp_path, handler_packages, copies):
+    first = router_package(tmp_path, handler_packages)
+    assert list_files(first.folder) == [
+        "functions/__init__.py",
+        "functions/get_item/handler.py",
+        "functions/get_item/notes.md",
+        "functions/get_item/template.html",
+        "functions/list_items/handler.py",
+        "router.py",
+    ]
+    copies.clear()
+    router = first.folder / "router.py"
+    os.utime(router, (0, 0))
+
+    second = router_package(tmp_path, handler_packages)
+
+    assert copies == []
+    # Unchanged module isn't written again
+    assert router.stat().st_mtime == packaging.NORMALIZED_MTIME
+    assert second.asset_hash == first.asset_hash
+
+
+def test_router_package_hash_depends_on_content(tmp_path, handler_packages):
+    first = router_package(tmp_path, handler_packages)
+    (tmp_path / "functions" / "list_items" / "handler.py").write_text("VALUE = 1")
+
+    second = router_package(tmp_path, handler_packages)
+
+    assert second.asset_hash != first.asset_hash
+
+
+def test_router_package_merges_handlers_of_same_folder(tmp_path, handler_packages):
+    package = router_package(
+        tmp_path,
+        [
+            ("functions/get_item", ["handler.py"]),
+            ("functions/get_item", ["*.html"]),
+        ],
+    )
+
+    assert list_files(package.folder / "functions" / "get_item") == [
+        "handler.py",
+        "template.html",
+    ]
+
+
+def test_router_package_removes_outdated_files(tmp_path, handler_packages):
+    package = router_package(tmp_path, handler_packages)
+    (package.folder / "stale.py").touch()
+
+    package = router_package(tmp_path, handler_packages[:1])
+
+    assert not (package.folder / "stale.py").exists()
+    assert not (package.folder / "functions" / "list_items").exists()
+    assert [p.name for p in package.manifests_folder.iterdir()] == [
+        "functions.get_item.json"
+    ]
+
+
+def test_router_package_bytecode(tmp_path, handler_packages, monkeypatch):
+    monkeypatch.setattr(packaging, "can_compile_bytecode", lambda: True)
+    plain = router_package(tmp_path, handler_packages)
+
+    package = router_package(tmp_path, handler_packages, compile_bytecode=True)
+    router_package(tmp_path, handler_packages, compile_bytecode=True)
+
+    bytecode = [p for p in list_files(package.folder) if p.endswith(".pyc")]
+    assert len(bytecode) == 4
+    assert any(p.startswith("__pycache__/router.") for p in bytecode)
+    assert package.asset_hash != plain.asset_hash
@@ -0,0 +1,100 @@
+import pytest
+
+from viburnum.application import route
+from viburnum.application.router import ApiRouter
+from viburnum.local.events import api_event
+
+
+def make_handler(path: str, methods=("GET",)):
+    def handler(request):
+        return {"path": path, "params": request.path_params}
+
+    return route(path, methods)(handler)
+
+
+@pytest.fixture
+def router():
+    return ApiRouter(
+        [
+            make_handler("/items"),
+            make_handler("/items/special"),
+            make_handler("/items/{id}", ["GET", "DELETE"]),
+            make_handler("/items/{id}/tags"),
+            make_handler("/files/{path+}", ["ANY"]),
+            make_handler("/files/readme"),
+        ]
+    )
+
+
+def test_static_route_takes_precedence(router):
+    match = router.match("GET", "/items/special")
+
+    assert match.handler.path == "/items/special"
+    assert match.path_params == {}
+
+
+def test_param_route(router):
+    match = router.match("GET", "/items/42/tags")
+
+    assert match.handler.path == "/items/{id}/tags"
+    assert match.path_params == {"id": "42"}
+
+
+def test_backtracks_to_param_route_when_method_isnt_allowed(router):
+    match = router.match("DELETE", "/items/special")
+
+    assert match.handler.path == "/items/{id}"
+    assert match.path_params == {"id": "special"}
+
+
+def test_greedy_route(router):
+    match = router.match("PUT", "/files/docs/a/b.txt")
+
+    assert match.handler.path == "/files/{path+}"
+    assert match.path_params == {"path": "docs/a/b.txt"}
+
+
+def test_backtracks_to_greedy_route(router):
+    assert router.match("GET", "/files/readme").handler.path == "/files/readme"
+    match = router.match("POST", "/files/readme")
+
+    assert match.handler.path == "/files/{path+}"
+    assert match.path_params == {"path": "readme"}
+
+
+def test_trailing_slash_is_ignored(router):
+    assert router.match("GET", "/items/").handler.path == "/items"
+    assert router.match("GET", "/items/42/").path_params == {"id": "42"}
+
+
+def test_not_found(router):
+    assert router.match("GET", "/unknown") is None
+    assert router.match("GET", "/items/42/unknown") is None
+    assert router.error_response(None)["statusCode"] == 404
+
+
+def test_method_not_allowed_lists_methods_of_all_matching_routes(router):
+    match = router.match("POST", "/items/special")
+
+    assert match.handler is None
+    assert set(match.allowed_methods) == {"GET", "DELETE"}
+    response = router.error_response(match)
+    assert response["statusCode"] == 405
+    assert response["headers"]["Allow"] == "DELETE, GET"
+
+
+def test_dispatch_event(router):
+    event = api_event("/items/special", "DELETE")
+
+    response = router(event, None)
+
+    assert response == {"path": "/items/{id}", "params": {"id": "special"}}
+
+
+def test_conflicting_routes():
+    router = ApiRouter([make_handler("/items/{id}")])
+
+    with pytest.raises(ValueError):
+        router.add(make_handler("/items/{name}/tags"))
+    with pytest.raises(ValueError):
+        router.add(make_handler("/items/{id}"))
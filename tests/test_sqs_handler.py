@@ -0,0 +1,74 @@
+import pytest
+
+from viburnum.application import sqs_handler
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_standard_queue_reports_only_failed_records(
+    max_workers, sqs_worker, sqs_event, failed_ids, processed
+):
+    handler = sqs_handler("Queue", per_record=True, max_workers=max_workers)(
+        sqs_worker({0})
+    )
+
+    response = handler(sqs_event(3), None)
+
+    assert failed_ids(response) == ["m0"]
+    assert sorted(processed) == [0, 1, 2]
+
+
+def test_single_record_failure(sqs_worker, sqs_event, failed_ids):
+    handler = sqs_handler("Queue", per_record=True)(sqs_worker({0}))
+
+    assert failed_ids(handler(sqs_event(1), None)) == ["m0"]
+
+
+def test_fifo_queue_fails_records_after_failed_one(
+    sqs_worker, sqs_event, failed_ids, processed
+):
+    handler = sqs_handler("Queue", per_record=True, max_workers=4)(sqs_worker({1}))
+
+    response = handler(sqs_event(4, fifo=True), None)
+
+    assert failed_ids(response) == ["m1", "m2", "m3"]
+    assert processed == [0, 1]
+
+
+def test_async_standard_queue_processes_records_concurrently(
+    sqs_worker, sqs_event, failed_ids, processed
+):
+    handler = sqs_handler("Queue", per_record=True)(sqs_worker({0}, is_async=True))
+
+    response = handler(sqs_event(3), None)
+
+    assert failed_ids(response) == ["m0"]
+    assert processed == [2, 1, 0]
+
+
+def test_async_fifo_queue_processes_records_in_order(
+    sqs_worker, sqs_event, failed_ids, processed
+):
+    handler = sqs_handler("Queue", per_record=True)(sqs_worker({1}, is_async=True))
+
+    response = handler(sqs_event(4, fifo=True), None)
+
+    assert failed_ids(response) == ["m1", "m2", "m3"]
+    assert processed == [0, 1]
+
+
+def test_successful_batch_has_no_failures(sqs_worker, sqs_event, failed_ids):
+    handler = sqs_handler("Queue", per_record=True, max_workers=4)(sqs_worker())
+
+    assert failed_ids(handler(sqs_event(5), None)) == []
+
+
+def test_per_record_requires_failure_reports(sqs_worker):
+    with pytest.raises(ValueError):
+        sqs_handler("Queue", per_record=True, report_batch_item_failures=False)(
+            sqs_worker()
+        )
+
+    handler = sqs_handler("Queue", per_record=True, report_batch_item_failures=True)(
+        sqs_worker()
+    )
+    assert handler.report_batch_item_failures
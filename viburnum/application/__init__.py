@@ -1,16 +1,127 @@
-from .base import Application, Handler, Resource, ResourceConnector
-from .connectors import S3Permission, SqsPermission, s3, sqs
-from .handlers import (
-    JobEvent,
-    QueueEvent,
-    Request,
-    Response,
-    S3EventSequence,
-    SqsEventsSequence,
-    SqsFailedEvents,
-    job,
-    route,
-    s3_handler,
-    sqs_handler,
-)
-from .resources import S3, Sqs
+"""
+Public primitives of ``viburnum.application``.
+
+Names are resolved lazily on first attribute access, so importing the package
+from a Lambda handler doesn't pull in ``boto3`` (or any other heavy module)
+until something actually needs it.
+"""
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .base import (
+        ApiType,
+        Application,
+        Architecture,
+        Handler,
+        LambdaConfig,
+        PackageConfig,
+        Resource,
+        ResourceConnector,
+        lambda_config,
+        package_config,
+    )
+    from .cache import ResponseCache, cache_response
+    from .clients import ClientConfig, configure_clients
+    from .codec import JsonCodec, get_json_codec, set_json_codec
+    from .connectors import S3Permission, SqsPermission, s3, sqs
+    from .handlers import (
+        BinaryResponse,
+        JobEvent,
+        MessageInFlight,
+        QueueEvent,
+        RawJsonResponse,
+        Request,
+        Response,
+        S3EventSequence,
+        SqsEventsSequence,
+        SqsFailedEvents,
+        StreamResponse,
+        TextResponse,
+        job,
+        route,
+        s3_handler,
+        sqs_handler,
+    )
+    from .idempotency import (
+        DynamoDbIdempotencyStore,
+        IdempotencyState,
+        IdempotencyStore,
+        MemoryIdempotencyStore,
+        SqliteIdempotencyStore,
+        idempotent,
+    )
+    from .resources import S3, Sqs
+
+
+_LAZY_ATTRIBUTES = {
+    # base
+    "ApiType": ".base",
+    "Application": ".base",
+    "Architecture": ".base",
+    "Handler": ".base",
+    "LambdaConfig": ".base",
+    "PackageConfig": ".base",
+    "Resource": ".base",
+    "ResourceConnector": ".base",
+    "lambda_config": ".base",
+    "package_config": ".base",
+    # cache
+    "ResponseCache": ".cache",
+    "cache_response": ".cache",
+    # clients
+    "ClientConfig": ".clients",
+    "configure_clients": ".clients",
+    # codec
+    "JsonCodec": ".codec",
+    "get_json_codec": ".codec",
+    "set_json_codec": ".codec",
+    # connectors
+    "S3Permission": ".connectors",
+    "SqsPermission": ".connectors",
+    "s3": ".connectors",
+    "sqs": ".connectors",
+    # handlers
+    "BinaryResponse": ".handlers",
+    "JobEvent": ".handlers",
+    "MessageInFlight": ".handlers",
+    "QueueEvent": ".handlers",
+    "RawJsonResponse": ".handlers",
+    "Request": ".handlers",
+    "Response": ".handlers",
+    "S3EventSequence": ".handlers",
+    "SqsEventsSequence": ".handlers",
+    "SqsFailedEvents": ".handlers",
+    "StreamResponse": ".handlers",
+    "TextResponse": ".handlers",
+    "job": ".handlers",
+    "route": ".handlers",
+    "s3_handler": ".handlers",
+    "sqs_handler": ".handlers",
+    # idempotency
+    "DynamoDbIdempotencyStore": ".idempotency",
+    "IdempotencyState": ".idempotency",
+    "IdempotencyStore": ".idempotency",
+    "MemoryIdempotencyStore": ".idempotency",
+    "SqliteIdempotencyStore": ".idempotency",
+    "idempotent": ".idempotency",
+    # resources
+    "S3": ".resources",
+    "Sqs": ".resources",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # Cache value in module namespace, so next lookups skip `__getattr__`
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
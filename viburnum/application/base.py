@@ -1,5 +1,16 @@
+import asyncio
+import enum
+import inspect
+import logging
+import os
+import threading
 import weakref
-from typing import Callable
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, fields, replace
+from types import MappingProxyType
+from typing import Any, Callable, ContextManager, Iterable, Iterator, Mapping, Optional
+
+logger = logging.getLogger(__name__)
 
 # __________________ Resource Connector ___________________
 
@@ -10,15 +21,139 @@ class ResourceConnector:
         handler: "Handler",
         resource_name: str,
     ) -> None:
-        handler.resources.add(self)
         self.handler = weakref.proxy(handler)
         self.resource_name = resource_name
         self._client = None
+        # NOTE: handler could build client right away, so child classes
+        # must set their attributes before calling `super().__init__`
+        handler.add_resource(self)
 
     def get_resource_client(self):
         """Return resource client or None"""
         return None
 
+    def set_client(self, client: Any) -> None:
+        """Replace resource client, e.g. with local stand-in."""
+        self._client = client
+
+    def after_invocation(self, failed: bool = False) -> None:
+        """
+        Called after each handler invocation, `failed` is True
+        if handler raised an exception.
+        """
+
+    def record_scope(self) -> ContextManager[None]:
+        """Context of processing single record by `per_record` handler."""
+        return nullcontext()
+
+
+# __________________________ Lambda config ___________________________
+
+
+class Architecture(enum.Enum):
+    """Instruction set of Lambda, `arm64` runs on cheaper Graviton processors."""
+
+    x86_64 = "x86_64"
+    arm64 = "arm64"
+
+
+@dataclass(frozen=True)
+class LambdaConfig:
+    """
+    Performance settings of Lambda function, unset values fall back
+    to `Application.lambda_config` and then to AWS defaults.
+
+    :link: https://docs.aws.amazon.com/lambda/latest/dg/configuration-function-common.html
+    """
+
+    # Memory in MB, CPU share is proportional to it
+    memory_size: Optional[int] = None
+    # Timeout in seconds
+    timeout: Optional[int] = None
+    # Size of `/tmp` in MB
+    ephemeral_storage: Optional[int] = None
+    architecture: Optional[Architecture] = None
+    reserved_concurrency: Optional[int] = None
+    # Triggers are connected to `live` alias with provisioned concurrency
+    provisioned_concurrency: Optional[int] = None
+
+    def merge(self, other: Optional["LambdaConfig"]) -> "LambdaConfig":
+        """Return config with values of `other` that are set."""
+        if other is None:
+            return self
+        return replace(
+            self,
+            **{
+                f.name: getattr(other, f.name)
+                for f in fields(other)
+                if getattr(other, f.name) is not None
+            },
+        )
+
+
+def lambda_config(
+    *,
+    memory_size: Optional[int] = None,
+    timeout: Optional[int] = None,
+    ephemeral_storage: Optional[int] = None,
+    architecture: Optional[Architecture] = None,
+    reserved_concurrency: Optional[int] = None,
+    provisioned_concurrency: Optional[int] = None,
+):
+    """Set :class:`LambdaConfig` of handler, used by deployer."""
+    config = LambdaConfig(
+        memory_size,
+        timeout,
+        ephemeral_storage,
+        architecture,
+        reserved_concurrency,
+        provisioned_concurrency,
+    )
+
+    def wrapper(handler: "Handler"):
+        handler.lambda_config = config
+        return handler
+
+    return wrapper
+
+
+# __________________________ Package config ___________________________
+
+
+@dataclass(frozen=True)
+class PackageConfig:
+    """
+    Files of handler folder deployed with Lambda. Glob patterns are matched
+    against file and folder names and against paths relative to the folder,
+    with `include` only matching files are deployed.
+    """
+
+    include: Optional[tuple[str, ...]] = None
+    exclude: tuple[str, ...] = ()
+    # Ship bytecode, so Lambda doesn't compile modules on every cold start,
+    # unset value falls back to `Application.compile_bytecode`
+    compile_bytecode: Optional[bool] = None
+
+
+def package_config(
+    *,
+    include: Optional[Iterable[str]] = None,
+    exclude: Iterable[str] = (),
+    compile_bytecode: Optional[bool] = None,
+):
+    """Set :class:`PackageConfig` of handler, used by deployer."""
+    config = PackageConfig(
+        None if include is None else tuple(include),
+        tuple(exclude),
+        compile_bytecode,
+    )
+
+    def wrapper(handler: "Handler"):
+        handler.package_config = config
+        return handler
+
+    return wrapper
+
 
 # ___________________ Handler ____________________________
 
@@ -35,29 +170,141 @@ class LambdaOutput:
         return {}
 
 
+_loops = threading.local()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return event loop that is created once and reused by all invocations
+    of warm execution environment (one loop per thread).
+    """
+    loop = getattr(_loops, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _loops.loop = loop
+    return loop
+
+
+def run_coroutine(coro) -> Any:
+    """Run awaitable on the shared event loop and return its result."""
+    return get_event_loop().run_until_complete(coro)
+
+
+def is_lambda_environment() -> bool:
+    """Return True if code is running inside AWS Lambda execution environment."""
+    return "AWS_LAMBDA_FUNCTION_NAME" in os.environ
+
+
+class ApplicationLoaded(Exception):
+    """
+    Raised by `AppStack` while `app.py` is imported by local runtime,
+    so import stops before stack is built or synthesized.
+    """
+
+    def __init__(self, app: "Application") -> None:
+        super().__init__(f"Application '{app.name}' is loaded by local runtime")
+        self.app = app
+
+
+# Flag of current process only, child processes (e.g. `cdk synth`) build stack
+_local_load = False
+
+
+@contextmanager
+def local_load() -> Iterator[None]:
+    """Make `AppStack` raise :class:`ApplicationLoaded` inside the context."""
+    global _local_load
+    _local_load = True
+    try:
+        yield
+    finally:
+        _local_load = False
+
+
+def is_local_load() -> bool:
+    """Return True if application is loaded by local runtime (`viburnum bench`)."""
+    return _local_load
+
+
 class Handler:
     event_class = LambdaInput
 
     def __init__(
         self,
         func: Callable,
+        eager_clients: bool = False,
     ) -> None:
         self.name = f"{func.__name__}{self._name_suffix()}"
         self.func = func
         self.resources: set[ResourceConnector] = set()
         self.extra_kwargs: dict = {}  # DEPRECATED: useless
+        self.eager_clients = eager_clients
+        self.lambda_config: Optional[LambdaConfig] = None
+        self.package_config: Optional[PackageConfig] = None
+        self._resource_kwargs: Optional[Mapping[str, Any]] = None
 
     def __call__(self, event: dict, context: dict) -> dict:
+        resource_kwargs = self._resource_kwargs
+        if resource_kwargs is None:
+            resource_kwargs = self.warm_up()
 
-        response = self.func(
-            self.event_class(event, context), **self._get_resource_clients()
-        )
+        try:
+            response = self._invoke(self.event_class(event, context), resource_kwargs)
+        except Exception:
+            self._after_invocation(failed=True)
+            raise
+        self._after_invocation(failed=False)
         if isinstance(response, LambdaOutput):
             return response.as_response()
         return response
 
-    def _get_resource_clients(self) -> dict:
-        return {r.resource_name: r.get_resource_client() for r in self.resources}
+    def _after_invocation(self, failed: bool) -> None:
+        """
+        Run `after_invocation` of all resources. Their errors don't hide
+        exception of handler and are raised only after successful invocation.
+        """
+        error = None
+        for resource in self.resources:
+            try:
+                resource.after_invocation(failed)
+            except Exception as e:
+                logger.exception(
+                    "After invocation of resource '%s' failed", resource.resource_name
+                )
+                error = error or e
+        if error is not None and not failed:
+            raise error
+
+    def _invoke(self, lambda_input: LambdaInput, resource_kwargs: Mapping[str, Any]):
+        """Call handler function, overload it to change how function is called."""
+        result = self.func(lambda_input, **resource_kwargs)
+        if inspect.isawaitable(result):
+            return run_coroutine(result)
+        return result
+
+    def add_resource(self, connector: ResourceConnector) -> None:
+        self.resources.add(connector)
+        self._resource_kwargs = None
+        # Build clients during Lambda INIT phase, while handler module is imported
+        if self.eager_clients and is_lambda_environment():
+            self.warm_up()
+
+    def warm_up(self) -> Mapping[str, Any]:
+        """
+        Build resource clients and freeze kwargs that are passed into function,
+        so they are reused by all next invocations.
+        """
+        self._resource_kwargs = MappingProxyType(
+            {r.resource_name: r.get_resource_client() for r in self.resources}
+        )
+        return self._resource_kwargs
+
+    def set_resource_clients(self, clients: Mapping[str, Any]) -> None:
+        """Replace clients of all resources, used by local runtime."""
+        for resource in self.resources:
+            resource.set_client(clients[resource.resource_name])
+        self.warm_up()
 
     @staticmethod
     def _name_suffix() -> str:
@@ -79,9 +326,49 @@ class Resource:
 # __________________________ Application ___________________________
 
 
+class ApiType(enum.Enum):
+    """
+    Type of API Gateway, `http` uses payload format version 2.0.
+
+    :link: https://docs.aws.amazon.com/apigateway/latest/developerguide/http-api-vs-rest.html
+    """
+
+    rest = "rest"
+    http = "http"
+
+
 class Application:
-    def __init__(self, name: str) -> None:
+    def __init__(
+        self,
+        name: str,
+        compress_responses: bool = False,
+        compress_min_size: int = 1024,
+        single_function_api: bool = False,
+        binary_media_types: Optional[list[str]] = None,
+        api_type: ApiType = ApiType.rest,
+        api_cache_cluster_size: str = "0.5",
+        lambda_config: Optional[LambdaConfig] = None,
+        package_excludes: Optional[list[str]] = None,
+        compile_bytecode: bool = False,
+    ) -> None:
         self.name: str = name
+        # Glob patterns of files excluded from deployed packages
+        # in addition to caches, tests and hidden files
+        self.package_excludes = package_excludes or []
+        # Default of `PackageConfig.compile_bytecode`
+        self.compile_bytecode = compile_bytecode
+        # Default performance settings of all Lambdas
+        self.lambda_config = lambda_config or LambdaConfig()
+        self.api_type = api_type
+        # Size of REST API cache cluster in GB, used if routes have `cache_ttl`
+        self.api_cache_cluster_size = api_cache_cluster_size
+        # Content types returned by api as binary, e.g. `["image/png"]`
+        self.binary_media_types = binary_media_types
+        # Serve all api handlers with one Lambda and in-process router
+        self.single_function_api = single_function_api
+        # Default compression settings for api handlers
+        self.compress_responses = compress_responses
+        self.compress_min_size = compress_min_size
         self.handlers: list[Handler] = []
         self.resources: dict[str, Resource] = {}
 
@@ -0,0 +1,152 @@
+"""
+In-process cache of API responses, that lives while execution environment is warm.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional
+
+from .handlers import ApiHandler, Request
+
+
+class ResponseCache:
+    """
+    TTL and LRU cache of Lambda proxy responses.
+
+    Cache is bounded by number of entries and by approximate size
+    of cached responses in bytes, so it can't exhaust Lambda memory.
+    Key is built from method, path, path parameters and selected
+    query parameters and headers.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int = 256,
+        max_bytes: int = 16 * 1024 * 1024,
+        query_params: Iterable[str] = (),
+        headers: Iterable[str] = (),
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.query_params = tuple(query_params)
+        self.headers = tuple(headers)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries: OrderedDict[Hashable, tuple[float, int, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, request: Request) -> Hashable:
+        return (
+            request.method,
+            request.path,
+            tuple(sorted(request.path_params.items())),
+            tuple(request.query_params.get(p) for p in self.query_params),
+            tuple(request.headers.get(h) for h in self.headers),
+        )
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, size, response = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return _copy_response(response)
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, response: dict) -> None:
+        size = self._get_size(response)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            # Too large response isn't cached, but replaces outdated one
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (
+                time.monotonic() + self.ttl,
+                size,
+                _copy_response(response),
+            )
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.size,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.size -= size
+
+    @staticmethod
+    def _get_size(response: dict) -> int:
+        size = _byte_size(response.get("body") or b"")
+        for name, value in (response.get("headers") or {}).items():
+            size += _byte_size(name) + _byte_size(value)
+        for name, values in (response.get("multiValueHeaders") or {}).items():
+            size += _byte_size(name) + sum(_byte_size(v) for v in values)
+        return size
+
+
+def _byte_size(value) -> int:
+    if isinstance(value, bytes):
+        return len(value)
+    return len(str(value).encode("utf-8"))
+
+
+def _copy_response(response: dict) -> dict:
+    """Copy response, so handler or caller can't change cached headers."""
+    response = dict(response)
+    for name in ("headers", "multiValueHeaders"):
+        if response.get(name):
+            response[name] = {
+                k: list(v) if isinstance(v, list) else v
+                for k, v in response[name].items()
+            }
+    if response.get("cookies"):
+        response["cookies"] = list(response["cookies"])
+    return response
+
+
+def cache_response(
+    ttl: float,
+    *,
+    max_entries: int = 256,
+    max_bytes: int = 16 * 1024 * 1024,
+    query_params: Iterable[str] = (),
+    headers: Iterable[str] = (),
+):
+    """
+    Cache successful responses of `GET` and `HEAD` requests
+    of :class:`ApiHandler` in memory for `ttl` seconds.
+    """
+
+    def wrapper(handler: ApiHandler):
+        handler.response_cache = ResponseCache(
+            ttl, max_entries, max_bytes, query_params, headers
+        )
+        return handler
+
+    return wrapper
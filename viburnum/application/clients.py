@@ -0,0 +1,139 @@
+"""
+Process-wide registry of boto3 resources and clients.
+
+All connectors share a single boto3 session, and resources are cached by
+service, region and :class:`ClientConfig`, so every handler in execution
+environment reuses one connection pool across warm invocations.
+"""
+import os
+import threading
+from dataclasses import dataclass, replace
+from typing import Any, Optional
+
+# ______________________ Config _______________________________
+
+
+@dataclass(frozen=True)
+class ClientConfig:
+    """
+    Hashable subset of `botocore.config.Config` options.
+
+    :link: https://botocore.amazonaws.com/v1/documentation/api/latest/reference/config.html
+    """
+
+    max_pool_connections: int = 10
+    tcp_keepalive: bool = True
+    max_attempts: int = 3
+    retry_mode: str = "standard"
+    connect_timeout: float = 5
+    read_timeout: float = 60
+
+    def to_botocore(self):
+        from botocore.config import Config
+
+        return Config(
+            max_pool_connections=self.max_pool_connections,
+            tcp_keepalive=self.tcp_keepalive,
+            retries={"max_attempts": self.max_attempts, "mode": self.retry_mode},
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+        )
+
+
+_default_config = ClientConfig()
+
+
+def configure_clients(config: Optional[ClientConfig] = None, **options) -> ClientConfig:
+    """
+    Set default :class:`ClientConfig` used by connectors without explicit config.
+
+    Call it at module level of `handler.py`, before the first client is created.
+    """
+    global _default_config
+    _default_config = replace(config or _default_config, **options)
+    return _default_config
+
+
+def get_default_config() -> ClientConfig:
+    return _default_config
+
+
+# ______________________ Registry _______________________________
+
+
+_lock = threading.Lock()
+_session = None
+_resources: dict[tuple, Any] = {}
+_clients: dict[tuple, Any] = {}
+
+
+def _get_region() -> Optional[str]:
+    return os.environ.get("AWS_REGION") or os.environ.get("AWS_DEFAULT_REGION")
+
+
+def get_session():
+    """Return boto3 session shared by whole process."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                # boto3 is imported lazily, it's quite heavy for Lambda cold start
+                import boto3.session
+
+                _session = boto3.session.Session()
+    return _session
+
+
+def get_resource(
+    service_name: str,
+    region_name: Optional[str] = None,
+    config: Optional[ClientConfig] = None,
+):
+    """Return cached boto3 service resource."""
+    key = (service_name, region_name or _get_region(), config or _default_config)
+    resource = _resources.get(key)
+    if resource is None:
+        session = get_session()
+        with _lock:
+            resource = _resources.get(key)
+            if resource is None:
+                resource = session.resource(
+                    service_name, region_name=key[1], config=key[2].to_botocore()
+                )
+                _resources[key] = resource
+    return resource
+
+
+def get_client(
+    service_name: str,
+    region_name: Optional[str] = None,
+    config: Optional[ClientConfig] = None,
+):
+    """
+    Return cached boto3 low-level client.
+
+    For services that have resources, the client of cached resource is returned,
+    so both share the same connection pool.
+    """
+    key = (service_name, region_name or _get_region(), config or _default_config)
+    client = _clients.get(key)
+    if client is None:
+        session = get_session()
+        if service_name in session.get_available_resources():
+            client = get_resource(*key).meta.client
+        else:
+            with _lock:
+                client = _clients.get(key) or session.client(
+                    service_name, region_name=key[1], config=key[2].to_botocore()
+                )
+        _clients[key] = client
+    return client
+
+
+def reset_clients() -> None:
+    """Drop cached session, resources and clients."""
+    global _session
+    with _lock:
+        _session = None
+        _resources.clear()
+        _clients.clear()
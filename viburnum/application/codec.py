@@ -0,0 +1,106 @@
+"""
+JSON codec used by the framework for requests, responses and queue messages.
+
+`orjson` is used when it's installed, otherwise codec falls back to stdlib `json`.
+Codec could be forced with `VIBURNUM_JSON_CODEC` environment variable
+(`orjson` or `json`) or with :func:`set_json_codec`.
+"""
+import dataclasses
+import json
+import os
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Optional, Union
+
+DefaultType = Callable[[Any], Any]
+
+
+def default_serializer(obj: Any) -> Any:
+    """Serialize objects that aren't supported by json out of the box."""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+class JsonCodec:
+    """Codec based on stdlib `json`."""
+
+    name = "json"
+
+    def __init__(self, default: Optional[DefaultType] = None) -> None:
+        self.default = default or default_serializer
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, default=self.default)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """Codec based on `orjson`, raises ImportError if it isn't installed."""
+
+    name = "orjson"
+
+    def __init__(self, default: Optional[DefaultType] = None) -> None:
+        import orjson
+
+        self._orjson = orjson
+        super().__init__(default)
+
+    def dumps(self, obj: Any) -> str:
+        return self._orjson.dumps(
+            obj, default=self.default, option=self._orjson.OPT_NON_STR_KEYS
+        ).decode("utf-8")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._orjson.loads(data)
+
+
+CODECS: dict[str, type[JsonCodec]] = {
+    JsonCodec.name: JsonCodec,
+    OrjsonCodec.name: OrjsonCodec,
+}
+
+_codec: Optional[JsonCodec] = None
+
+
+def _create_codec(name: Optional[str], default: Optional[DefaultType]) -> JsonCodec:
+    if name:
+        return CODECS[name](default)
+    try:
+        return OrjsonCodec(default)
+    except ImportError:
+        return JsonCodec(default)
+
+
+def set_json_codec(
+    codec: Union[JsonCodec, str, None] = None,
+    default: Optional[DefaultType] = None,
+) -> JsonCodec:
+    """
+    Set codec used by framework, `codec` could be codec instance or its name.
+    If `codec` isn't set the fastest available one is picked.
+    `default` is called for objects that codec can't serialize, it can't be
+    combined with codec instance, pass it to codec constructor instead.
+    """
+    global _codec
+    if isinstance(codec, JsonCodec):
+        if default is not None:
+            raise ValueError("`default` can't be set for codec instance")
+    else:
+        codec = _create_codec(codec, default)
+    _codec = codec
+    return _codec
+
+
+def get_json_codec() -> JsonCodec:
+    if _codec is None:
+        return set_json_codec(os.environ.get("VIBURNUM_JSON_CODEC"))
+    return _codec
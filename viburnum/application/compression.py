@@ -0,0 +1,114 @@
+"""
+Compression of API responses based on request `Accept-Encoding` header.
+
+`gzip` is always available, `br` is used only if `brotli` package is installed.
+"""
+import base64
+import gzip
+from typing import Any, Optional
+
+DEFAULT_MIN_SIZE = 1024
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def get_header(headers: Optional[dict], name: str) -> Optional[str]:
+    """Case-insensitive lookup of header value."""
+    if not headers:
+        return None
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def parse_accept_encoding(header: Optional[str]) -> dict[str, float]:
+    """Return mapping of accepted encodings to their quality values."""
+    encodings = {}
+    for item in (header or "").split(","):
+        encoding, _, params = item.strip().partition(";")
+        if not encoding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[encoding.strip().lower()] = quality
+    return encodings
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Return the best supported encoding accepted by client."""
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    supported = ["br", "gzip"] if _brotli() else ["gzip"]
+    best, best_quality = None, 0.0
+    for encoding in supported:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return _brotli().compress(data, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    raise ValueError(f"Unsupported encoding '{encoding}'")
+
+
+def compress_response(
+    response: Any,
+    accept_encoding: Optional[str],
+    min_size: int = DEFAULT_MIN_SIZE,
+) -> Any:
+    """
+    Return compressed copy of Lambda proxy response,
+    or response itself if it shouldn't be compressed.
+    Handler results that aren't proxy responses are passed as is.
+    """
+    if not isinstance(response, dict):
+        return response
+    body = response.get("body")
+    if (
+        not body
+        or response.get("isBase64Encoded")
+        or response.get("statusCode") in (204, 304)
+        or get_header(response.get("headers"), "Content-Encoding")
+    ):
+        return response
+    data = body.encode("utf-8") if isinstance(body, str) else body
+    if len(data) < min_size:
+        return response
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+    compressed = compress(data, encoding)
+    if len(compressed) >= len(data):
+        return response
+
+    headers = dict(response.get("headers") or {})
+    headers["Content-Encoding"] = encoding
+    vary = get_header(headers, "Vary")
+    headers = {k: v for k, v in headers.items() if k.lower() != "vary"}
+    if vary and "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+    else:
+        headers["Vary"] = vary or "Accept-Encoding"
+    return {
+        **response,
+        "headers": headers,
+        "body": base64.b64encode(compressed).decode("ascii"),
+        "isBase64Encoded": True,
+    }
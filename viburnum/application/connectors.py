@@ -1,9 +1,20 @@
 import enum
+import logging
 import os
-
-import boto3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, ContextManager, Iterator, Optional, Union
 
 from .base import Handler, ResourceConnector
+from .clients import ClientConfig, get_resource
+from .codec import get_json_codec
+from .types import JsonData
+
+logger = logging.getLogger(__name__)
 
 # ______________________ SQS _______________________________
 
@@ -14,24 +25,220 @@ class SqsPermission(enum.Enum):
     full_access = 3
 
 
+class SqsBatchSendError(Exception):
+    def __init__(self, failed: list[dict]) -> None:
+        self.failed = failed
+        super().__init__(f"Failed to send {len(failed)} message(s): {failed}")
+
+
+class SqsBatchWriter:
+    """
+    Buffers messages and sends them with `send_message_batch`.
+
+    Batch is flushed when it reaches 10 entries or 256 KiB of payload,
+    only failed entries are retried. Messages sent inside :meth:`scope`
+    are buffered separately and dropped if the scope fails.
+
+    :link: https://docs.aws.amazon.com/AWSSimpleQueueService/latest/APIReference/API_SendMessageBatch.html
+    """
+
+    max_entries = 10
+    max_batch_size = 256 * 1024
+
+    def __init__(self, queue, max_retries: int = 3, retry_delay: float = 0.1) -> None:
+        self.queue = queue
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._entries: list[dict] = []
+        self._size = 0
+        self._lock = threading.Lock()
+        # Writer of current `scope`, records are processed in threads or tasks
+        self._scoped: ContextVar[Optional[SqsBatchWriter]] = ContextVar(
+            f"sqs_batch_writer_{id(self)}", default=None
+        )
+
+    def send(
+        self,
+        body: JsonData,
+        *,
+        delay_seconds: Optional[int] = None,
+        message_attributes: Optional[dict[str, dict]] = None,
+        message_group_id: Optional[str] = None,
+        message_deduplication_id: Optional[str] = None,
+    ) -> None:
+        """Add message into buffer, not string body is serialized to json."""
+        if not isinstance(body, str):
+            body = get_json_codec().dumps(body)
+        entry: dict[str, Any] = {"MessageBody": body}
+        if delay_seconds is not None:
+            entry["DelaySeconds"] = delay_seconds
+        if message_attributes:
+            entry["MessageAttributes"] = message_attributes
+        if message_group_id is not None:
+            entry["MessageGroupId"] = message_group_id
+        if message_deduplication_id is not None:
+            entry["MessageDeduplicationId"] = message_deduplication_id
+
+        size = self._entry_size(entry)
+        if size > self.max_batch_size:
+            raise ValueError(f"Message size {size} exceeds {self.max_batch_size} bytes")
+        scoped = self._scoped.get()
+        (self if scoped is None else scoped)._add(entry, size)
+
+    @contextmanager
+    def scope(self) -> Iterator[None]:
+        """
+        Buffer messages sent inside the context separately, they are moved
+        into the shared buffer when context exits and dropped if it fails.
+        Batches, that are filled up inside the context, are already sent.
+        """
+        writer = SqsBatchWriter(self.queue, self.max_retries, self.retry_delay)
+        token = self._scoped.set(writer)
+        try:
+            yield
+        except BaseException:
+            dropped = writer.discard()
+            if dropped:
+                logger.warning(
+                    "Dropped %d buffered message(s) of failed record", dropped
+                )
+            raise
+        finally:
+            self._scoped.reset(token)
+        for entry in writer._take_entries():
+            self._add(entry, self._entry_size(entry))
+
+    def _add(self, entry: dict, size: int) -> None:
+        batch = None
+        with self._lock:
+            if (
+                len(self._entries) >= self.max_entries
+                or self._size + size > self.max_batch_size
+            ):
+                batch = self._take_entries()
+            self._entries.append(entry)
+            self._size += size
+        if batch:
+            self._send_batch(batch)
+
+    def flush(self) -> None:
+        """Send all buffered messages."""
+        with self._lock:
+            batch = self._take_entries()
+        if batch:
+            self._send_batch(batch)
+
+    def discard(self) -> int:
+        """Drop buffered messages, return how many were dropped."""
+        with self._lock:
+            return len(self._take_entries())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __enter__(self) -> "SqsBatchWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.flush()
+
+    def _take_entries(self) -> list[dict]:
+        entries, self._entries, self._size = self._entries, [], 0
+        return entries
+
+    def _send_batch(self, entries: list[dict]) -> None:
+        pending = {str(i): entry for i, entry in enumerate(entries)}
+        failed: list[dict] = []
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+            response = self.queue.send_messages(
+                Entries=[{"Id": id_, **entry} for id_, entry in pending.items()]
+            )
+            failed = response.get("Failed", [])
+            # Sender faults (e.g. invalid message) won't succeed on retry
+            sender_faults = [f for f in failed if f.get("SenderFault")]
+            if sender_faults:
+                raise SqsBatchSendError(sender_faults)
+            if not failed:
+                return
+            pending = {f["Id"]: pending[f["Id"]] for f in failed}
+            logger.warning("Retrying %d failed SQS batch entries", len(pending))
+        raise SqsBatchSendError(failed)
+
+    @staticmethod
+    def _entry_size(entry: dict) -> int:
+        size = len(entry["MessageBody"].encode("utf-8"))
+        for name, attribute in entry.get("MessageAttributes", {}).items():
+            size += len(name.encode("utf-8")) + len(attribute["DataType"])
+            if "StringValue" in attribute:
+                size += len(attribute["StringValue"].encode("utf-8"))
+            if "BinaryValue" in attribute:
+                size += len(attribute["BinaryValue"])
+        return size
+
+
+class QueueClient:
+    """
+    Wrapper around boto3 `sqs.Queue`, passed into handler by :class:`SqsConnector`.
+    Unknown attributes are proxied to the queue.
+    """
+
+    def __init__(self, queue) -> None:
+        self.queue = queue
+        self.batch_writer = SqsBatchWriter(queue)
+
+    def __getattr__(self, name: str):
+        return getattr(self.queue, name)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.queue!r})"
+
+
 class SqsConnector(ResourceConnector):
     def __init__(
-        self, handler: Handler, resource_name: str, permission: SqsPermission
+        self,
+        handler: Handler,
+        resource_name: str,
+        permission: SqsPermission,
+        config: Optional[ClientConfig] = None,
     ) -> None:
-        super().__init__(handler, resource_name)
         self.permission = permission
+        self.config = config
+        super().__init__(handler, resource_name)
 
     def get_resource_client(self):
         if not self._client:
             queue_url = os.environ[f"{self.resource_name.upper()}_URL"]
-            sqs = boto3.resource("sqs")
-            self._client = sqs.Queue(queue_url)
+            queue = get_resource("sqs", config=self.config).Queue(queue_url)
+            self._client = QueueClient(queue)
         return self._client
 
+    def after_invocation(self, failed: bool = False) -> None:
+        # Buffered messages are sent when handler returns, messages of failed
+        # invocation are dropped, so SQS retry doesn't send them twice
+        if self._client is None:
+            return
+        if not failed:
+            self._client.batch_writer.flush()
+            return
+        dropped = self._client.batch_writer.discard()
+        if dropped:
+            logger.warning(
+                "Dropped %d buffered message(s) of failed invocation", dropped
+            )
+
+    def record_scope(self) -> ContextManager[None]:
+        # Messages of failed record are dropped, because SQS redelivers it
+        if self._client is None:
+            return super().record_scope()
+        return self._client.batch_writer.scope()
+
 
 def sqs(
     queue_name: str,
     permission: SqsPermission = SqsPermission.read,
+    config: Optional[ClientConfig] = None,
     # *,
     # attr_name: str = None,
 ):
@@ -40,7 +247,7 @@ def sqs(
     def wraper(handler: Handler):
         # FIXME: rework how we pass resources into handler
         # handler.extra_kwargs[attr_name or queue_name] = get_queue(queue_name)
-        SqsConnector(handler, queue_name, permission)
+        SqsConnector(handler, queue_name, permission, config)
         return handler
 
     return wraper
@@ -55,33 +262,191 @@ class S3Permission(enum.Enum):
     full_access = 3
 
 
+class BucketClient:
+    """
+    Wrapper around boto3 `s3.Bucket`, passed into handler by :class:`S3Connector`.
+    Unknown attributes are proxied to the bucket.
+
+    Adds helpers for reading large objects with bounded memory usage,
+    at most `max_memory` bytes of object data are kept in memory at once.
+    """
+
+    def __init__(
+        self,
+        bucket,
+        part_size: int = 8 * 1024 * 1024,
+        max_concurrency: int = 8,
+        max_memory: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.bucket = bucket
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+        self.max_memory = max_memory
+
+    def __getattr__(self, name: str):
+        return getattr(self.bucket, name)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.bucket!r})"
+
+    @property
+    def client(self):
+        return self.bucket.meta.client
+
+    def get_size(self, key: str) -> int:
+        return self.client.head_object(Bucket=self.bucket.name, Key=key)[
+            "ContentLength"
+        ]
+
+    def get_range(self, key: str, start: int, end: int) -> bytes:
+        """Return bytes of object from `start` to `end` (inclusive)."""
+        response = self.client.get_object(
+            Bucket=self.bucket.name, Key=key, Range=f"bytes={start}-{end}"
+        )
+        return response["Body"].read()
+
+    def get_json(self, key: str) -> JsonData:
+        """Read and decode json object."""
+        body = self.client.get_object(Bucket=self.bucket.name, Key=key)["Body"]
+        try:
+            return get_json_codec().loads(body.read())
+        finally:
+            body.close()
+
+    def put_json(self, key: str, data: JsonData, **kwargs) -> None:
+        """Encode `data` and save it as json object."""
+        self.client.put_object(
+            Bucket=self.bucket.name,
+            Key=key,
+            Body=get_json_codec().dumps(data).encode("utf-8"),
+            ContentType="application/json",
+            **kwargs,
+        )
+
+    def iter_chunks(
+        self, key: str, chunk_size: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Iterate over object content with ranged GET requests."""
+        chunk_size = min(chunk_size or self.part_size, self.max_memory)
+        size = self.get_size(key)
+        for start in range(0, size, chunk_size):
+            yield self.get_range(key, start, min(start + chunk_size, size) - 1)
+
+    def iter_lines(
+        self,
+        key: str,
+        encoding: Optional[str] = "utf-8",
+        chunk_size: int = 1024 * 1024,
+    ) -> Iterator[Union[str, bytes]]:
+        """
+        Stream object line by line, lines are decoded if `encoding` is set.
+        """
+        body = self.client.get_object(Bucket=self.bucket.name, Key=key)["Body"]
+        try:
+            for line in body.iter_lines(chunk_size=min(chunk_size, self.max_memory)):
+                yield line.decode(encoding) if encoding else line
+        finally:
+            body.close()
+
+    def download(
+        self,
+        key: str,
+        target: Union[None, str, Path, bytearray, memoryview] = None,
+        *,
+        part_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_memory: Optional[int] = None,
+    ) -> Union[Path, bytearray, memoryview]:
+        """
+        Download object with parallel ranged GET requests.
+
+        `target` could be a file path (object is saved into `/tmp` by default)
+        or writable buffer, that is big enough for the whole object.
+        Number of parts downloaded at once is limited by `max_memory`.
+        """
+        max_memory = max_memory or self.max_memory
+        part_size = min(part_size or self.part_size, max_memory)
+        concurrency = max(
+            1, min(max_concurrency or self.max_concurrency, max_memory // part_size)
+        )
+        size = self.get_size(key)
+        ranges = [
+            (start, min(start + part_size, size) - 1)
+            for start in range(0, size, part_size)
+        ]
+
+        if target is None:
+            target = Path("/tmp", Path(key).name)
+        if isinstance(target, (str, Path)):
+            target = Path(target)
+            fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.ftruncate(fd, size)
+
+                def write_part(start: int, end: int) -> None:
+                    os.pwrite(fd, self.get_range(key, start, end), start)
+
+                self._download_parts(write_part, ranges, concurrency)
+            finally:
+                os.close(fd)
+            return target
+
+        view = memoryview(target)
+        if view.nbytes < size:
+            raise ValueError(f"Buffer size {view.nbytes} is less than object {size}")
+
+        def copy_part(start: int, end: int) -> None:
+            view[start : end + 1] = self.get_range(key, start, end)
+
+        self._download_parts(copy_part, ranges, concurrency)
+        return target
+
+    @staticmethod
+    def _download_parts(
+        download_part, ranges: list[tuple[int, int]], concurrency: int
+    ) -> None:
+        if concurrency == 1 or len(ranges) <= 1:
+            for start, end in ranges:
+                download_part(start, end)
+            return
+        with ThreadPoolExecutor(concurrency) as executor:
+            # `list` re-raises first exception from workers
+            list(executor.map(lambda r: download_part(*r), ranges))
+
+
 class S3Connector(ResourceConnector):
     def __init__(
-        self, handler: "Handler", resource_name: str, permission: S3Permission
+        self,
+        handler: "Handler",
+        resource_name: str,
+        permission: S3Permission,
+        config: Optional[ClientConfig] = None,
     ) -> None:
-        super().__init__(handler, resource_name)
         self.permission = permission
+        self.config = config
+        super().__init__(handler, resource_name)
 
     def get_resource_client(self):
         if not self._client:
             bucket_name = os.environ[f"{self.resource_name.upper()}_NAME"]
-            s3_resource = boto3.resource("s3")
-            self._client = s3_resource.Bucket(bucket_name)
+            bucket = get_resource("s3", config=self.config).Bucket(bucket_name)
+            self._client = BucketClient(bucket)
         return self._client
 
 
 def s3(
     bucket_name: str,
     permission: S3Permission = S3Permission.read,
+    config: Optional[ClientConfig] = None,
     # *,
     # attr_name: str = None,
 ):
-    "Add queue `Sqs` resource for :class:`Handler`"
+    "Add bucket `S3` resource for :class:`Handler`"
 
     def wraper(handler: Handler):
         # FIXME: rework how we pass resources into handler
         # handler.extra_kwargs[attr_name or queue_name] = get_queue(queue_name)
-        S3Connector(handler, bucket_name, permission)
+        S3Connector(handler, bucket_name, permission, config)
         return handler
 
     return wraper
@@ -1,22 +1,80 @@
+import asyncio
+import base64
 import enum
-import json
+import inspect
+import logging
+import os
 from collections import UserList
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
-from typing import Any, Callable, Iterable, Optional
-
-from viburnum.application.base import Handler, LambdaInput, LambdaOutput
+from functools import cached_property
+from typing import IO, Any, Callable, Iterable, Iterator, Mapping, Optional, Union
+from urllib.parse import parse_qs, parse_qsl, unquote_plus
+
+from viburnum.application.base import Handler, LambdaInput, LambdaOutput, run_coroutine
+from viburnum.application.codec import get_json_codec
+from viburnum.application.compression import (
+    DEFAULT_MIN_SIZE,
+    compress_response,
+    get_header,
+)
+from viburnum.application.http import (
+    FormPart,
+    Headers,
+    MultipartError,
+    iter_multipart,
+    parse_cookies,
+    parse_header_params,
+)
 from viburnum.application.types import HeadersType, JsonData, MultiQueryParamsType
 
+logger = logging.getLogger(__name__)
+
 # ___________________ API __________________________
-# Lambda with Rest Api
+# Lambda with Rest Api or Http Api
 # https://docs.aws.amazon.com/lambda/latest/dg/services-apigateway.html#apigateway-example-event
+# https://docs.aws.amazon.com/apigateway/latest/developerguide/http-api-develop-integrations-lambda.html#http-api-develop-integrations-lambda.proxy-format
+
+
+def is_v2_event(event: dict) -> bool:
+    """Return True for events with payload format version 2.0 (Http Api)."""
+    return event.get("version") == "2.0"
+
+
+def to_v2_response(response: dict) -> dict:
+    """
+    Convert response into payload format version 2.0,
+    it doesn't support multi-value headers, cookies are returned separately.
+    """
+    if not isinstance(response, dict):
+        return response
+    multi_value_headers = response.get("multiValueHeaders")
+    if not multi_value_headers:
+        return response
+    response = dict(response)
+    del response["multiValueHeaders"]
+    headers = dict(response.get("headers") or {})
+    cookies = list(response.get("cookies") or [])
+    for name, values in multi_value_headers.items():
+        if name.lower() == "set-cookie":
+            cookies.extend(values)
+        else:
+            headers[name] = ",".join(values)
+    response["headers"] = headers
+    if cookies:
+        response["cookies"] = cookies
+    return response
+
+
+_NOT_PARSED = object()
 
 
 class Request(LambdaInput):
     def __init__(self, event: dict, context: dict) -> None:
         super().__init__(event, context)
-        self._json = None
+        self._json = _NOT_PARSED
+        self._form: Optional[tuple[dict[str, str], dict[str, FormPart]]] = None
 
     @property
     def raw_headers(self) -> HeadersType:
@@ -24,51 +82,218 @@ class Request(LambdaInput):
 
     @property
     def raw_query_params(self) -> MultiQueryParamsType:
+        if self.is_v2:
+            return self.multi_query_params
         return self.event["multiValueQueryStringParameters"]
 
+    @cached_property
+    def is_v2(self) -> bool:
+        return is_v2_event(self.event)
+
+    @cached_property
+    def headers(self) -> Headers:
+        """Case-insensitive headers."""
+        return Headers(self.event.get("headers"), self.event.get("multiValueHeaders"))
+
+    @cached_property
+    def cookies(self) -> dict[str, str]:
+        # Payload 2.0 passes cookies separately from headers
+        return parse_cookies(
+            self.headers.get_all("cookie") + (self.event.get("cookies") or [])
+        )
+
+    @cached_property
+    def query_params(self) -> dict[str, str]:
+        """Query parameters, the last value is used for repeated parameters."""
+        if self.is_v2:
+            return {k: v[-1] for k, v in self.multi_query_params.items()}
+        return self.event.get("queryStringParameters") or {}
+
+    @cached_property
+    def multi_query_params(self) -> MultiQueryParamsType:
+        if self.is_v2:
+            return parse_qs(
+                self.event.get("rawQueryString", ""), keep_blank_values=True
+            )
+        return self.event.get("multiValueQueryStringParameters") or {}
+
     @property
     def method(self) -> str:
+        if self.is_v2:
+            return self.event["requestContext"]["http"]["method"]
         return self.event["httpMethod"]
 
     @property
     def path(self) -> str:
+        if self.is_v2:
+            return self.event["requestContext"]["http"]["path"]
         return self.event["path"]
 
     @property
     def path_params(self) -> dict:
-        return self.event["pathParameters"] or {}
+        return self.event.get("pathParameters") or {}
 
     @property
-    def body(self) -> Optional[str]:
-        return self.event["body"]
+    def content_type(self) -> Optional[str]:
+        return self.headers.get("content-type")
+
+    @cached_property
+    def body_bytes(self) -> bytes:
+        """Raw body, decoded from base64 if required."""
+        body = self.event.get("body")
+        if not body:
+            return b""
+        # Body is base64 encoded if API has binary media types
+        if self.event.get("isBase64Encoded"):
+            return base64.b64decode(body)
+        return body.encode("utf-8")
+
+    @cached_property
+    def body(self) -> Union[str, bytes, None]:
+        """Text body, binary body that isn't valid UTF-8 is returned as `body_bytes`."""
+        body = self.event.get("body")
+        if body and self.event.get("isBase64Encoded"):
+            try:
+                return self.body_bytes.decode("utf-8")
+            except UnicodeDecodeError:
+                return self.body_bytes
+        return body
 
     def json(self) -> JsonData:
-        if not self.body:
-            return None
-        if not self._json:
-            self._json = json.loads(self.body)
+        if self._json is _NOT_PARSED:
+            body = self.body
+            self._json = get_json_codec().loads(body) if body else None
         return self._json
 
+    def form(self) -> dict[str, str]:
+        """
+        Fields of `application/x-www-form-urlencoded`
+        or `multipart/form-data` body.
+        """
+        return self._parse_form()[0]
+
+    def files(self) -> dict[str, FormPart]:
+        """Files of `multipart/form-data` body."""
+        return self._parse_form()[1]
+
+    def iter_multipart(self) -> Iterator[FormPart]:
+        """Lazily iterate over parts of `multipart/form-data` body."""
+        content_type, params = parse_header_params(self.content_type or "")
+        if content_type != "multipart/form-data" or "boundary" not in params:
+            raise MultipartError("Request body isn't multipart/form-data")
+        return iter_multipart(self.body_bytes, params["boundary"])
+
+    def _parse_form(self) -> tuple[dict[str, str], dict[str, FormPart]]:
+        if self._form is None:
+            fields: dict[str, str] = {}
+            files: dict[str, FormPart] = {}
+            content_type, _ = parse_header_params(self.content_type or "")
+            if content_type == "multipart/form-data":
+                for part in self.iter_multipart():
+                    if part.filename is None:
+                        fields[part.name] = part.value
+                    else:
+                        files[part.name] = part
+            elif content_type == "application/x-www-form-urlencoded":
+                fields = dict(parse_qsl(self.body or "", keep_blank_values=True))
+            self._form = (fields, files)
+        return self._form
+
 
 class Response(LambdaOutput):
+    """
+    Response with JSON body, `body` is serialized with framework codec.
+    Child classes change how body is encoded by overloading :meth:`_encode_body`.
+    """
+
+    default_content_type: Optional[str] = None
+
     def __init__(
         self,
         status_code: int,
-        body: dict,
+        body: Any,
         headers: dict = None,
+        multi_value_headers: dict[str, list[str]] = None,
+        content_type: Optional[str] = None,
     ) -> None:
-        # TODO: add support for multivalue headers
+        headers = dict(headers or {})
+        content_type = content_type or self.default_content_type
+        if content_type and not get_header(headers, "Content-Type"):
+            headers["Content-Type"] = content_type
+        encoded_body, is_base64 = self._encode_body(body)
         self.response_data = {
             "statusCode": status_code,
-            "headers": headers or {},
-            "isBase64Encoded": False,
-            "body": json.dumps(body),
+            "headers": headers,
+            "isBase64Encoded": is_base64,
+            "body": encoded_body,
         }
+        if multi_value_headers:
+            self.response_data["multiValueHeaders"] = multi_value_headers
+
+    def _encode_body(self, body: Any) -> tuple[str, bool]:
+        """Return encoded body and whether it's base64 encoded."""
+        return get_json_codec().dumps(body), False
 
     def as_response(self) -> dict:
         return self.response_data
 
 
+class TextResponse(Response):
+    default_content_type = "text/plain; charset=utf-8"
+
+    def _encode_body(self, body: str) -> tuple[str, bool]:
+        return body, False
+
+
+class RawJsonResponse(Response):
+    """Response with already serialized JSON body, it's passed as is."""
+
+    default_content_type = "application/json"
+
+    def _encode_body(self, body: Union[str, bytes]) -> tuple[str, bool]:
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
+        return body, False
+
+
+class BinaryResponse(Response):
+    """
+    Response with binary body, it's returned base64 encoded.
+    API must have matching binary media types (see `Application.binary_media_types`).
+    """
+
+    default_content_type = "application/octet-stream"
+
+    def _encode_body(self, body: bytes) -> tuple[str, bool]:
+        return base64.b64encode(body).decode("ascii"), True
+
+
+class StreamResponse(Response):
+    """
+    Response with body from file-like object or iterator of `bytes` or `str`.
+    Lambda proxy integration doesn't support streaming,
+    so body is read into memory, binary body is returned base64 encoded.
+    """
+
+    default_content_type = "application/octet-stream"
+
+    def _encode_body(
+        self, body: Union[IO, Iterable[Union[bytes, str]]]
+    ) -> tuple[str, bool]:
+        if hasattr(body, "read"):
+            data = body.read()
+        else:
+            chunks = list(body)
+            data = (
+                b"".join(chunks)
+                if chunks and isinstance(chunks[0], bytes)
+                else "".join(chunks)
+            )
+        if isinstance(data, bytes):
+            return base64.b64encode(data).decode("ascii"), True
+        return data, False
+
+
 class ApiHandler(Handler):
     event_class = Request
 
@@ -77,21 +302,99 @@ class ApiHandler(Handler):
         func: Callable,
         path: str,
         methods: Iterable[str],
+        eager_clients: bool = False,
+        compress: Optional[bool] = None,
+        compress_min_size: Optional[int] = None,
+        cache_ttl: Optional[int] = None,
+        cache_key_params: Iterable[str] = (),
     ) -> None:
         self.path: str = path
         self.methods: Iterable[str] = methods
-        super().__init__(func)
+        self.compress = compress
+        self.compress_min_size = compress_min_size
+        # API Gateway cache settings
+        self.cache_ttl = cache_ttl
+        self.cache_key_params = cache_key_params
+        # In-process cache, see `viburnum.application.cache.cache_response`
+        self.response_cache = None
+        super().__init__(func, eager_clients)
+
+    def __call__(self, event: dict, context: dict) -> dict:
+        response = super().__call__(event, context)
+        if is_v2_event(event):
+            response = to_v2_response(response)
+        if self._compression_enabled():
+            response = compress_response(
+                response,
+                get_header(event.get("headers"), "Accept-Encoding"),
+                self._compression_min_size(),
+            )
+        return response
+
+    def _invoke(self, request: Request, resource_kwargs: Mapping[str, Any]) -> Any:
+        cache = self.response_cache
+        if cache is None or request.method not in ("GET", "HEAD"):
+            return super()._invoke(request, resource_kwargs)
+
+        key = cache.make_key(request)
+        response = cache.get(key)
+        if response is not None:
+            return response
+        response = super()._invoke(request, resource_kwargs)
+        if isinstance(response, LambdaOutput):
+            response = response.as_response()
+        # Only proxy responses are cached, handler could return plain data
+        if isinstance(response, dict) and 200 <= response.get("statusCode", 0) < 300:
+            cache.set(key, response)
+        return response
+
+    def _compression_enabled(self) -> bool:
+        if self.compress is None:
+            # Application default is passed by deployer
+            return os.environ.get("VIBURNUM_COMPRESS_RESPONSES") == "1"
+        return self.compress
+
+    def _compression_min_size(self) -> int:
+        if self.compress_min_size is None:
+            return int(os.environ.get("VIBURNUM_COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE))
+        return self.compress_min_size
 
     @staticmethod
     def _name_suffix() -> str:
         return "_api"
 
 
-def route(path: str, methods: Iterable[str] = ("ANY",)):
-    "Wrapper for creating :class:`ApiHandler` resource."
+def route(
+    path: str,
+    methods: Iterable[str] = ("ANY",),
+    *,
+    eager_clients: bool = False,
+    compress: Optional[bool] = None,
+    compress_min_size: Optional[int] = None,
+    cache_ttl: Optional[int] = None,
+    cache_key_params: Iterable[str] = (),
+):
+    """
+    Wrapper for creating :class:`ApiHandler` resource.
+    If `eager_clients` is True resource clients are built during Lambda INIT phase.
+    If `compress` is True response body bigger than `compress_min_size` is
+    compressed according to `Accept-Encoding`, by default application settings are used.
+    If `cache_ttl` is set responses are cached by API Gateway for `cache_ttl` seconds,
+    path parameters and `cache_key_params` (e.g. `page`, `querystring.page`,
+    `header.Accept-Language`) are used as cache key.
+    """
 
     def wraper(func):
-        return ApiHandler(func, path, methods)
+        return ApiHandler(
+            func,
+            path,
+            methods,
+            eager_clients,
+            compress,
+            compress_min_size,
+            cache_ttl,
+            cache_key_params,
+        )
 
     return wraper
 
@@ -110,23 +413,25 @@ class JobEvent(LambdaInput):
 class JobHandler(Handler):
     event_class = JobEvent
 
-    def __init__(self, func: Callable, schedule: str) -> None:
+    def __init__(
+        self, func: Callable, schedule: str, eager_clients: bool = False
+    ) -> None:
         self.schedule = schedule
-        super().__init__(func)
+        super().__init__(func, eager_clients)
 
     @staticmethod
     def _name_suffix() -> str:
         return "_job"
 
 
-def job(schedule: str):
+def job(schedule: str, *, eager_clients: bool = False):
     """
     Wrapper for creating :class:`JobHandler` resource.
     Schedule expression [docs](https://docs.aws.amazon.com/eventbridge/latest/userguide/eb-create-rule-schedule.html)
     """
 
     def wrapper(func):
-        return JobHandler(func, schedule)
+        return JobHandler(func, schedule, eager_clients)
 
     return wrapper
 
@@ -153,8 +458,8 @@ class QueueEvent:
     def body(self) -> JsonData:
         if self._body is None:
             try:
-                self._body = json.loads(self.event["body"])
-            except json.JSONDecodeError:
+                self._body = get_json_codec().loads(self.event["body"])
+            except ValueError:
                 self._body = self.event["body"]
         return self._body
 
@@ -173,7 +478,7 @@ class SqsEventsSequence(LambdaInput, UserList[QueueEvent]):
         self.data = [QueueEvent(e) for e in self.event["Records"]]
 
 
-class SqsFailedEvents:
+class SqsFailedEvents(LambdaOutput):
     # Returns from lambda failed events
     # https://docs.aws.amazon.com/lambda/latest/dg/with-sqs.html#services-sqs-batchfailurereporting
 
@@ -186,32 +491,289 @@ class SqsFailedEvents:
     def as_response(self) -> dict:
         return {
             "batchItemFailures": [
-                {"itemIdentifier": id for id in self.failed_event_ids}
+                {"itemIdentifier": id} for id in self.failed_event_ids
             ]
         }
 
 
+class MessageInFlight(Exception):
+    """Message is being processed by another invocation."""
+
+    def __init__(self, *message_ids: str) -> None:
+        super().__init__(f"Messages {', '.join(message_ids)} are already in flight")
+        self.message_ids = message_ids
+
+
 class SqsHandler(Handler):
+    """
+    Handler for SQS events.
+
+    By default function receives whole :class:`SqsEventsSequence`.
+    With `per_record` function is called for each :class:`QueueEvent` separately,
+    records are processed concurrently (in thread pool or as asyncio tasks
+    for `async` functions) and failed records are reported back to SQS.
+
+    `batch_size`, `max_batching_window` (seconds), `max_concurrency`
+    and `report_batch_item_failures` configure Lambda event source mapping.
+    """
+
     event_class = SqsEventsSequence
+    # Set by `idempotent` decorator
+    idempotency = None
 
     @staticmethod
     def _name_suffix() -> str:
         return "_worker"
 
-    def __init__(self, func: Callable, queue_name: str) -> None:
+    def __init__(
+        self,
+        func: Callable,
+        queue_name: str,
+        eager_clients: bool = False,
+        per_record: bool = False,
+        max_workers: int = 10,
+        batch_size: Optional[int] = None,
+        max_batching_window: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        report_batch_item_failures: Optional[bool] = None,
+    ) -> None:
+        if max_concurrency is not None and not 2 <= max_concurrency <= 1000:
+            raise ValueError("max_concurrency must be between 2 and 1000")
+        if per_record and report_batch_item_failures is False:
+            # Failed records would be deleted from the queue with the whole batch
+            raise ValueError("per_record requires report_batch_item_failures")
         self.queue_name = queue_name
-        super().__init__(func)
+        self.per_record = per_record
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.max_batching_window = max_batching_window
+        self.max_concurrency = max_concurrency
+        self.report_batch_item_failures = (
+            per_record
+            if report_batch_item_failures is None
+            else report_batch_item_failures
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        super().__init__(func, eager_clients)
+
+    def _invoke(
+        self, events: SqsEventsSequence, resource_kwargs: Mapping[str, Any]
+    ) -> Any:
+        if not self.per_record:
+            return self._process_batch(events, resource_kwargs)
+        is_fifo = self._is_fifo(events)
+        if inspect.iscoroutinefunction(self.func):
+            failed_ids = run_coroutine(
+                self._process_async(events, resource_kwargs, is_fifo)
+            )
+        elif is_fifo or self.max_workers <= 1 or len(events) <= 1:
+            failed_ids = self._process_serial(events, resource_kwargs, is_fifo)
+        else:
+            failed_ids = self._process_concurrent(events, resource_kwargs)
+        return SqsFailedEvents(*failed_ids)
 
+    @staticmethod
+    def _is_fifo(events: SqsEventsSequence) -> bool:
+        return bool(events) and "MessageGroupId" in events[0].event.get(
+            "attributes", {}
+        )
 
-def sqs_handler(queue_name: str):
+    def _process_batch(
+        self, events: SqsEventsSequence, resource_kwargs: Mapping[str, Any]
+    ) -> Any:
+        if self.idempotency is None:
+            return super()._invoke(events, resource_kwargs)
+        keys, in_flight_ids = self.idempotency.begin_many(events)
+        for event in events:
+            if event.message_id in in_flight_ids:
+                logger.warning("Message %s is already in flight", event.message_id)
+            elif event.message_id not in keys:
+                logger.info("Skip duplicated message %s", event.message_id)
+        result = None
+        if keys:
+            events.data = [e for e in events.data if e.message_id in keys]
+            try:
+                result = super()._invoke(events, resource_kwargs)
+            except Exception:
+                for key in keys.values():
+                    self.idempotency.release(key)
+                raise
+            failed_ids = (
+                result.failed_event_ids if isinstance(result, SqsFailedEvents) else ()
+            )
+            for message_id, key in keys.items():
+                if message_id in failed_ids:
+                    self.idempotency.release(key)
+                else:
+                    self.idempotency.complete(key)
+        if not in_flight_ids:
+            return result
+        # In-flight messages must be redelivered, in case their worker crashes
+        if not self.report_batch_item_failures:
+            raise MessageInFlight(*in_flight_ids)
+        if isinstance(result, SqsFailedEvents):
+            result.fail(*in_flight_ids)
+            return result
+        return SqsFailedEvents(*in_flight_ids)
+
+    def _process_record(
+        self, event: QueueEvent, resource_kwargs: Mapping[str, Any]
+    ) -> None:
+        if self.idempotency is None:
+            with self._record_scope():
+                self.func(event, **resource_kwargs)
+            return
+        key = self.idempotency.begin(event)
+        if key is None:
+            logger.info("Skip duplicated message %s", event.message_id)
+            return
+        try:
+            with self._record_scope():
+                self.func(event, **resource_kwargs)
+        except Exception:
+            self.idempotency.release(key)
+            raise
+        self.idempotency.complete(key)
+
+    async def _process_record_async(
+        self, event: QueueEvent, resource_kwargs: Mapping[str, Any]
+    ) -> None:
+        if self.idempotency is None:
+            with self._record_scope():
+                await self.func(event, **resource_kwargs)
+            return
+        # Store could do network calls, so it mustn't block event loop
+        loop = asyncio.get_running_loop()
+        key = await loop.run_in_executor(None, self.idempotency.begin, event)
+        if key is None:
+            logger.info("Skip duplicated message %s", event.message_id)
+            return
+        try:
+            with self._record_scope():
+                await self.func(event, **resource_kwargs)
+        except Exception:
+            await loop.run_in_executor(None, self.idempotency.release, key)
+            raise
+        await loop.run_in_executor(None, self.idempotency.complete, key)
+
+    @contextmanager
+    def _record_scope(self) -> Iterator[None]:
+        with ExitStack() as stack:
+            for resource in self.resources:
+                stack.enter_context(resource.record_scope())
+            yield
+
+    def _process_serial(
+        self,
+        events: SqsEventsSequence,
+        resource_kwargs: Mapping[str, Any],
+        is_fifo: bool = False,
+    ) -> list[str]:
+        failed_ids = []
+        for index, event in enumerate(events):
+            try:
+                self._process_record(event, resource_kwargs)
+            except Exception:
+                logger.exception("Failed to process message %s", event.message_id)
+                if is_fifo:
+                    # Records of FIFO queue must be processed in order,
+                    # so all the next records are failed too
+                    return [e.message_id for e in events.data[index:]]
+                failed_ids.append(event.message_id)
+        return failed_ids
+
+    def _process_concurrent(
+        self, events: SqsEventsSequence, resource_kwargs: Mapping[str, Any]
+    ) -> list[str]:
+        if self._executor is None:
+            # Executor is reused by next invocations of warm Lambda
+            self._executor = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix=self.name
+            )
+        futures = [
+            (event, self._executor.submit(self._process_record, event, resource_kwargs))
+            for event in events
+        ]
+        failed_ids = []
+        for event, future in futures:
+            try:
+                future.result()
+            except Exception:
+                logger.exception("Failed to process message %s", event.message_id)
+                failed_ids.append(event.message_id)
+        return failed_ids
+
+    async def _process_async(
+        self,
+        events: SqsEventsSequence,
+        resource_kwargs: Mapping[str, Any],
+        is_fifo: bool = False,
+    ) -> list[str]:
+        if is_fifo:
+            return await self._process_async_serial(events, resource_kwargs)
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def process(event: QueueEvent):
+            async with semaphore:
+                await self._process_record_async(event, resource_kwargs)
+
+        results = await asyncio.gather(
+            *(process(e) for e in events), return_exceptions=True
+        )
+        failed_ids = []
+        for event, result in zip(events, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    "Failed to process message %s",
+                    event.message_id,
+                    exc_info=result,
+                )
+                failed_ids.append(event.message_id)
+        return failed_ids
+
+    async def _process_async_serial(
+        self, events: SqsEventsSequence, resource_kwargs: Mapping[str, Any]
+    ) -> list[str]:
+        for index, event in enumerate(events):
+            try:
+                await self._process_record_async(event, resource_kwargs)
+            except Exception:
+                logger.exception("Failed to process message %s", event.message_id)
+                # Records of FIFO queue must be processed in order
+                return [e.message_id for e in events.data[index:]]
+        return []
+
+
+def sqs_handler(
+    queue_name: str,
+    *,
+    per_record: bool = False,
+    max_workers: int = 10,
+    eager_clients: bool = False,
+    batch_size: Optional[int] = None,
+    max_batching_window: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    report_batch_item_failures: Optional[bool] = None,
+):
     """
-    Wrapper for creating :class:`JobHandler` resource.
+    Wrapper for creating :class:`SqsHandler` resource.
+    With `per_record` function is called for each :class:`QueueEvent`,
+    at most `max_workers` records are processed at once.
+    Lambda receives up to `batch_size` records, waiting for them at most
+    `max_batching_window` seconds, and runs at most `max_concurrency` instances.
     """
 
     def wrapper(func):
         return SqsHandler(
             func,
             queue_name,
+            eager_clients,
+            per_record,
+            max_workers,
+            batch_size,
+            max_batching_window,
+            max_concurrency,
+            report_batch_item_failures,
         )
 
     return wrapper
@@ -263,61 +825,146 @@ class S3EventType(enum.Enum):
     OBJECT_ACL_PUT = "OBJECT_ACL_PUT"
 
 
-@dataclass
 class S3Object:
-    key: str
-    size: int
-    eTag: str
-    sequencer: str
+    """Lazy view over `s3.object` of S3 event record."""
+
+    __slots__ = ("raw", "_key")
+
+    def __init__(self, raw: dict) -> None:
+        self.raw = raw
+        self._key: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        # Object key is URL encoded in event
+        if self._key is None:
+            self._key = unquote_plus(self.raw["key"])
+        return self._key
+
+    @property
+    def size(self) -> Optional[int]:
+        return self.raw.get("size")
+
+    @property
+    def eTag(self) -> Optional[str]:
+        return self.raw.get("eTag")
+
+    @property
+    def version_id(self) -> Optional[str]:
+        return self.raw.get("versionId")
+
+    @property
+    def sequencer(self) -> Optional[str]:
+        return self.raw.get("sequencer")
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, S3Object) and self.raw == other.raw
+
+    def __repr__(self) -> str:
+        return f"S3Object(key={self.key!r}, size={self.size!r})"
 
 
-@dataclass
 class S3Bucket:
-    name: str
-    arn: str
+    """Lazy view over `s3.bucket` of S3 event record."""
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: dict) -> None:
+        self.raw = raw
+
+    @property
+    def name(self) -> str:
+        return self.raw["name"]
+
+    @property
+    def arn(self) -> str:
+        return self.raw["arn"]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, S3Bucket) and self.raw == other.raw
+
+    def __repr__(self) -> str:
+        return f"S3Bucket(name={self.name!r})"
 
 
-@dataclass
 class S3Event:
-    event_name: str
-    event_time: datetime
-    bucket: S3Bucket
-    object: S3Object
+    """
+    Lazy view over S3 event record, nested objects are created
+    and values are parsed only on access.
+    """
+
+    __slots__ = ("raw", "_event_time", "_bucket", "_object")
+
+    def __init__(self, raw: dict) -> None:
+        self.raw = raw
+        self._event_time: Optional[datetime] = None
+        self._bucket: Optional[S3Bucket] = None
+        self._object: Optional[S3Object] = None
+
+    @property
+    def event_name(self) -> Optional[str]:
+        return self.raw.get("eventName")
+
+    @property
+    def event_time(self) -> datetime:
+        if self._event_time is None:
+            self._event_time = datetime.strptime(
+                self.raw["eventTime"], "%Y-%m-%dT%H:%M:%S.%fZ"
+            )
+        return self._event_time
+
+    @property
+    def region(self) -> Optional[str]:
+        return self.raw.get("awsRegion")
+
+    @property
+    def bucket(self) -> S3Bucket:
+        if self._bucket is None:
+            self._bucket = S3Bucket(self.raw["s3"]["bucket"])
+        return self._bucket
+
+    @property
+    def object(self) -> S3Object:
+        if self._object is None:
+            self._object = S3Object(self.raw["s3"]["object"])
+        return self._object
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, S3Event) and self.raw == other.raw
+
+    def __repr__(self) -> str:
+        return (
+            f"S3Event(event_name={self.event_name!r}, "
+            f"bucket={self.bucket!r}, object={self.object!r})"
+        )
 
 
 class S3EventSequence(LambdaInput, UserList[S3Event]):
     def __init__(self, event: dict, context: dict) -> None:
         super().__init__(event, context)
-        self.data = [self._get_s3_event(e) for e in event["Records"]]
-
-    def _get_s3_event(self, raw_event: dict) -> S3Event:
-        bucket = S3Bucket(
-            name=raw_event["s3"]["bucket"]["name"], arn=raw_event["s3"]["bucket"]["arn"]
-        )
-        object_ = S3Object(**raw_event["s3"]["object"])
-        return S3Event(
-            event_name=raw_event.get("eventName"),
-            event_time=datetime.strptime(
-                raw_event.get("eventTime"), "%Y-%m-%dT%H:%M:%S.%fZ"
-            ),
-            bucket=bucket,
-            object=object_,
-        )
+        self.data = [S3Event(e) for e in event["Records"]]
 
 
 class S3Handler(Handler):
     event_class = S3EventSequence
 
     def __init__(
-        self, func: Callable, bucket_name: str, events: list[S3EventType]
+        self,
+        func: Callable,
+        bucket_name: str,
+        events: list[S3EventType],
+        eager_clients: bool = False,
     ) -> None:
-        super().__init__(func)
+        super().__init__(func, eager_clients)
         self.bucket_name = bucket_name
         self.events = events
 
 
 def s3_handler(
-    bucket_name: str, events: Iterable[S3EventType] = (S3EventType.OBJECT_CREATED,)
+    bucket_name: str,
+    events: Iterable[S3EventType] = (S3EventType.OBJECT_CREATED,),
+    *,
+    eager_clients: bool = False,
 ):
     """
     Wrapper for creating :class:`JobHandler` resource.
@@ -328,6 +975,7 @@ def s3_handler(
             func,
             bucket_name,
             events,
+            eager_clients,
         )
 
     return wrapper
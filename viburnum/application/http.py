@@ -0,0 +1,186 @@
+"""
+Helpers for parsing parts of HTTP request: headers, cookies, forms.
+"""
+from typing import Iterator, Mapping, Optional
+from urllib.parse import unquote
+
+# ____________________ Headers _____________________________
+
+
+class Headers(Mapping[str, str]):
+    """
+    Case-insensitive read-only mapping of request headers.
+    Values of multi-value headers are available with :meth:`get_all`.
+    """
+
+    __slots__ = ("_data", "_multi")
+
+    def __init__(
+        self,
+        headers: Optional[Mapping[str, str]] = None,
+        multi_value_headers: Optional[Mapping[str, list[str]]] = None,
+    ) -> None:
+        self._data: dict[str, str] = {k.lower(): v for k, v in (headers or {}).items()}
+        self._multi: dict[str, list[str]] = {
+            k.lower(): v for k, v in (multi_value_headers or {}).items() if v
+        }
+        for key, values in self._multi.items():
+            self._data.setdefault(key, values[-1])
+
+    def __getitem__(self, key: str) -> str:
+        return self._data[key.lower()]
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and key.lower() in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_all(self, key: str) -> list[str]:
+        key = key.lower()
+        if key in self._multi:
+            return self._multi[key]
+        if key in self._data:
+            return [self._data[key]]
+        return []
+
+    def __repr__(self) -> str:
+        return f"Headers({self._data!r})"
+
+
+def parse_header_params(value: str) -> tuple[str, dict[str, str]]:
+    """
+    Split header value into main value and parameters,
+    e.g. `multipart/form-data; boundary=xyz`.
+    """
+    main, *params = value.split(";")
+    parsed = {}
+    for param in params:
+        key, _, val = param.strip().partition("=")
+        if key:
+            parsed[key.lower()] = val.strip().strip('"')
+    return main.strip().lower(), parsed
+
+
+# ____________________ Cookies _____________________________
+
+
+def parse_cookies(cookie_headers: list[str]) -> dict[str, str]:
+    cookies = {}
+    for header in cookie_headers:
+        for item in header.split(";"):
+            name, sep, value = item.strip().partition("=")
+            if sep and name:
+                cookies[name] = unquote(value.strip().strip('"'))
+    return cookies
+
+
+# ____________________ Multipart _____________________________
+
+
+class FormPart:
+    """
+    Part of `multipart/form-data` body, `data` is a view over request body
+    and doesn't copy it.
+    """
+
+    __slots__ = ("name", "filename", "content_type", "headers", "data")
+
+    def __init__(
+        self,
+        name: Optional[str],
+        filename: Optional[str],
+        content_type: Optional[str],
+        headers: Headers,
+        data: memoryview,
+    ) -> None:
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+        self.headers = headers
+        self.data = data
+
+    @property
+    def value(self) -> str:
+        return str(self.data, "utf-8")
+
+    @property
+    def size(self) -> int:
+        return self.data.nbytes
+
+    def __repr__(self) -> str:
+        return (
+            f"FormPart(name={self.name!r}, filename={self.filename!r}, "
+            f"size={self.size})"
+        )
+
+
+class MultipartError(ValueError):
+    pass
+
+
+def iter_multipart(body: bytes, boundary: str) -> Iterator[FormPart]:
+    """Lazily iterate over parts of `multipart/form-data` body."""
+    view = memoryview(body)
+    delimiter = b"--" + boundary.encode("latin-1")
+    position = body.find(delimiter)
+    if position == -1:
+        raise MultipartError("Multipart boundary not found")
+    position += len(delimiter)
+
+    while True:
+        if body.startswith(b"--", position):
+            # Closing delimiter
+            return
+        if not body.startswith(b"\r\n", position):
+            raise MultipartError("Malformed multipart body")
+        start = position + 2
+        end = _find_delimiter(body, delimiter, start)
+        if end == -1:
+            raise MultipartError("Multipart closing boundary not found")
+        if body.startswith(b"\r\n", start):
+            # Part without headers
+            raw_headers, data_start = b"", start + 2
+        else:
+            headers_end = body.find(b"\r\n\r\n", start, end)
+            if headers_end == -1:
+                raise MultipartError("Malformed multipart part headers")
+            raw_headers, data_start = body[start:headers_end], headers_end + 4
+        yield _build_part(raw_headers, view[data_start:end])
+        position = end + 2 + len(delimiter)
+
+
+def _find_delimiter(body: bytes, delimiter: bytes, start: int) -> int:
+    """
+    Return position of CRLF before delimiter, that ends part started at `start`.
+    Delimiter must be followed by CRLF or `--`, otherwise it's part of data.
+    """
+    delimiter = b"\r\n" + delimiter
+    while True:
+        position = body.find(delimiter, start)
+        if position == -1:
+            return -1
+        after = position + len(delimiter)
+        if body.startswith((b"\r\n", b"--"), after):
+            return position
+        start = position + 1
+
+
+def _build_part(raw_headers: bytes, data: memoryview) -> FormPart:
+    parsed = {}
+    for line in raw_headers.decode("utf-8").split("\r\n"):
+        name, sep, value = line.partition(":")
+        if sep:
+            parsed[name.strip()] = value.strip()
+    headers = Headers(parsed)
+    _, disposition = parse_header_params(headers.get("content-disposition", ""))
+    return FormPart(
+        name=disposition.get("name"),
+        filename=disposition.get("filename"),
+        content_type=headers.get("content-type"),
+        headers=headers,
+        data=data,
+    )
@@ -0,0 +1,308 @@
+"""
+Idempotent processing of SQS messages.
+
+SQS delivers messages at least once, so the same message could be received
+by worker several times. Keys of processed messages are saved to
+:class:`IdempotencyStore` and duplicates are skipped before handler function
+is called. Key is `in_flight` while message is processed and `completed`
+after it, both states expire after their TTL. Only completed messages are
+skipped, in-flight ones are reported as failed, so SQS redelivers them
+if worker, that processes them, crashes.
+"""
+import enum
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+from .clients import ClientConfig, get_resource
+from .handlers import MessageInFlight, QueueEvent, SqsHandler
+
+
+class IdempotencyState(enum.Enum):
+    new = "new"
+    in_flight = "in_flight"
+    completed = "completed"
+
+
+IN_FLIGHT = IdempotencyState.in_flight.value
+COMPLETED = IdempotencyState.completed.value
+
+KeyFunction = Callable[[QueueEvent], str]
+
+# ______________________ Stores _______________________________
+
+
+class IdempotencyStore(ABC):
+    """
+    Base class of stores, all methods must be atomic,
+    because the same message could be processed by several workers at once.
+    """
+
+    @abstractmethod
+    def begin(self, key: str, ttl: float) -> IdempotencyState:
+        """
+        Mark key as in-flight for `ttl` seconds and return `new` state.
+        Return current state if key is already in-flight or completed.
+        """
+        ...
+
+    @abstractmethod
+    def complete(self, key: str, ttl: float) -> None:
+        """Mark key as completed for `ttl` seconds."""
+        ...
+
+    @abstractmethod
+    def release(self, key: str) -> None:
+        """Remove in-flight key, so message could be processed again."""
+        ...
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """
+    Store, that lives while execution environment is warm.
+    It only catches duplicates delivered to the same Lambda instance.
+    """
+
+    def __init__(self, max_entries: int = 10000) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def begin(self, key: str, ttl: float) -> IdempotencyState:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                return IdempotencyState(entry[0])
+            self._set(key, IN_FLIGHT, now + ttl)
+            return IdempotencyState.new
+
+    def complete(self, key: str, ttl: float) -> None:
+        with self._lock:
+            self._set(key, COMPLETED, time.time() + ttl)
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == IN_FLIGHT:
+                del self._entries[key]
+
+    def _set(self, key: str, state: str, expires_at: float) -> None:
+        self._entries[key] = (state, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteIdempotencyStore(IdempotencyStore):
+    """
+    Store in SQLite database file, useful for local runs and tests.
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS idempotency "
+            "(key TEXT PRIMARY KEY, state TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def begin(self, key: str, ttl: float) -> IdempotencyState:
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM idempotency WHERE key = ? AND expires_at <= ?", (key, now)
+            )
+            cursor = self._connection.execute(
+                "INSERT OR IGNORE INTO idempotency VALUES (?, ?, ?)",
+                (key, IN_FLIGHT, now + ttl),
+            )
+            if cursor.rowcount == 1:
+                return IdempotencyState.new
+            (state,) = self._connection.execute(
+                "SELECT state FROM idempotency WHERE key = ?", (key,)
+            ).fetchone()
+            return IdempotencyState(state)
+
+    def complete(self, key: str, ttl: float) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO idempotency VALUES (?, ?, ?)",
+                (key, COMPLETED, time.time() + ttl),
+            )
+
+    def release(self, key: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM idempotency WHERE key = ? AND state = ?", (key, IN_FLIGHT)
+            )
+
+
+class DynamoDbIdempotencyStore(IdempotencyStore):
+    """
+    Store in DynamoDB table, that is shared by all Lambda instances.
+
+    Table must have string partition key `key_attribute` and Lambda must have
+    read/write access to it. Enable DynamoDB TTL on `expires_at` attribute
+    to remove expired keys from the table.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        key_attribute: str = "id",
+        config: Optional[ClientConfig] = None,
+    ) -> None:
+        self.table_name = table_name
+        self.key_attribute = key_attribute
+        self.config = config
+
+    @property
+    def table(self):
+        return get_resource("dynamodb", config=self.config).Table(self.table_name)
+
+    def begin(self, key: str, ttl: float) -> IdempotencyState:
+        now = int(time.time())
+        table = self.table
+        try:
+            table.put_item(
+                Item={
+                    self.key_attribute: key,
+                    "state": IN_FLIGHT,
+                    "expires_at": now + int(ttl),
+                },
+                ConditionExpression="attribute_not_exists(#key) OR expires_at <= :now",
+                ExpressionAttributeNames={"#key": self.key_attribute},
+                ExpressionAttributeValues={":now": now},
+            )
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            item = table.get_item(
+                Key={self.key_attribute: key}, ConsistentRead=True
+            ).get("Item")
+            # Key released right after the check is still processed by other worker
+            if item is None:
+                return IdempotencyState.in_flight
+            return IdempotencyState(item["state"])
+        return IdempotencyState.new
+
+    def complete(self, key: str, ttl: float) -> None:
+        self.table.put_item(
+            Item={
+                self.key_attribute: key,
+                "state": COMPLETED,
+                "expires_at": int(time.time() + ttl),
+            }
+        )
+
+    def release(self, key: str) -> None:
+        table = self.table
+        try:
+            table.delete_item(
+                Key={self.key_attribute: key},
+                ConditionExpression="#state = :in_flight",
+                ExpressionAttributeNames={"#state": "state"},
+                ExpressionAttributeValues={":in_flight": IN_FLIGHT},
+            )
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            pass
+
+
+# ______________________ Handler _______________________________
+
+
+def get_message_id(event: QueueEvent) -> str:
+    return event.message_id
+
+
+class Idempotency:
+    """
+    Idempotency settings of :class:`SqsHandler`,
+    keys are prefixed with handler name, so handlers could share one store.
+    """
+
+    def __init__(
+        self,
+        store: IdempotencyStore,
+        key: KeyFunction,
+        ttl: float,
+        in_flight_ttl: float,
+        prefix: str = "",
+    ) -> None:
+        self.store = store
+        self.key = key
+        self.ttl = ttl
+        self.in_flight_ttl = in_flight_ttl
+        self.prefix = prefix
+
+    def begin(self, event: QueueEvent) -> Optional[str]:
+        """
+        Return key of new event, or None if event is already completed.
+        Raise :class:`MessageInFlight` if event is being processed now.
+        """
+        key = f"{self.prefix}{self.key(event)}"
+        state = self.store.begin(key, self.in_flight_ttl)
+        if state is IdempotencyState.in_flight:
+            raise MessageInFlight(event.message_id)
+        if state is IdempotencyState.completed:
+            return None
+        return key
+
+    def begin_many(
+        self, events: Iterable[QueueEvent]
+    ) -> tuple[dict[str, str], list[str]]:
+        """
+        Return keys of new events by their message ids
+        and ids of events, that are in flight.
+        """
+        keys, in_flight_ids = {}, []
+        for event in events:
+            try:
+                key = self.begin(event)
+            except MessageInFlight:
+                in_flight_ids.append(event.message_id)
+                continue
+            if key is not None:
+                keys[event.message_id] = key
+        return keys, in_flight_ids
+
+    def complete(self, key: str) -> None:
+        self.store.complete(key, self.ttl)
+
+    def release(self, key: str) -> None:
+        self.store.release(key)
+
+
+def idempotent(
+    store: Optional[IdempotencyStore] = None,
+    *,
+    key: KeyFunction = get_message_id,
+    ttl: float = 3600,
+    in_flight_ttl: float = 300,
+):
+    """
+    Skip messages of :class:`SqsHandler` that are already processed,
+    messages that are being processed now are reported as failed.
+    Messages are identified by `message_id` or by `key` function.
+    `in_flight_ttl` should be close to queue visibility timeout,
+    so message of crashed invocation can be retried.
+    """
+
+    def wrapper(handler: SqsHandler):
+        handler.idempotency = Idempotency(
+            store or MemoryIdempotencyStore(),
+            key,
+            ttl,
+            in_flight_ttl,
+            prefix=f"{handler.name}:",
+        )
+        return handler
+
+    return wrapper
@@ -1,10 +1,25 @@
+from typing import Optional
+
 from .base import Resource
 
 
 class Sqs(Resource):
-    def __init__(self, name: str, visibility_timeout: int = 360) -> None:
+    """
+    SQS queue. With `max_receive_count` messages, that were received
+    that many times without being deleted, are moved to dead-letter queue.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        visibility_timeout: int = 360,
+        max_receive_count: Optional[int] = None,
+        dead_letter_retention_days: int = 14,
+    ) -> None:
         super().__init__(name)
         self.visibility_timeout = visibility_timeout
+        self.max_receive_count = max_receive_count
+        self.dead_letter_retention_days = dead_letter_retention_days
 
 
 class S3(Resource):
@@ -0,0 +1,167 @@
+"""
+In-process router, that dispatches API Gateway proxy events to :class:`ApiHandler`.
+
+Routes are compiled into a trie of path segments, so cost of dispatching
+depends on the path depth and not on the number of routes.
+"""
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from .handlers import ApiHandler, Request, Response
+
+
+class _Node:
+    __slots__ = ("static", "param", "param_name", "greedy_name", "handlers")
+
+    def __init__(self) -> None:
+        self.static: dict[str, "_Node"] = {}
+        self.param: Optional["_Node"] = None
+        self.param_name: Optional[str] = None
+        # Handlers of greedy `{proxy+}` parameter are stored in the same node
+        self.greedy_name: Optional[str] = None
+        self.handlers: dict[str, dict[str, ApiHandler]] = {}
+
+
+class RouteMatch(NamedTuple):
+    handler: Optional[ApiHandler]
+    path_params: dict[str, str]
+    allowed_methods: Iterable[str]
+
+
+def split_path(path: str) -> list[str]:
+    return [p for p in path.split("/") if p]
+
+
+class ApiRouter:
+    """
+    Routes requests to handlers by `ApiHandler.path` and `ApiHandler.methods`.
+
+    Path parameters `{name}` match single segment and greedy parameters
+    `{name+}` match the rest of the path, static segments take precedence
+    over parameters and parameters over greedy ones, unless method
+    isn't allowed by more specific route.
+    """
+
+    def __init__(self, handlers: Iterable[ApiHandler] = ()) -> None:
+        self._root = _Node()
+        self.handlers: list[ApiHandler] = []
+        for handler in handlers:
+            self.add(handler)
+
+    def add(self, handler: ApiHandler) -> None:
+        node = self._root
+        kind = "static"
+        for part in split_path(handler.path):
+            if part.startswith("{") and part.endswith("+}"):
+                name = part[1:-2]
+                if node.greedy_name not in (None, name):
+                    raise ValueError(f"Conflicting parameter in '{handler.path}'")
+                node.greedy_name = name
+                kind = "greedy"
+                break
+            if part.startswith("{") and part.endswith("}"):
+                name = part[1:-1]
+                if node.param is None:
+                    node.param, node.param_name = _Node(), name
+                elif node.param_name != name:
+                    raise ValueError(f"Conflicting parameter in '{handler.path}'")
+                node = node.param
+            else:
+                node = node.static.setdefault(part, _Node())
+
+        methods = node.handlers.setdefault(kind, {})
+        for method in handler.methods:
+            method = method.upper()
+            if method in methods:
+                raise ValueError(f"Route {method} '{handler.path}' already exists")
+            methods[method] = handler
+        self.handlers.append(handler)
+
+    def match(self, method: str, path: str) -> Optional[RouteMatch]:
+        """
+        Return matched handler and path parameters, handler is None
+        if path exists but method isn't allowed. Return None if path doesn't exist.
+        """
+        parts = split_path(path)
+        return self._match(self._root, parts, 0, method.upper())
+
+    def _match(
+        self, node: _Node, parts: list[str], index: int, method: str
+    ) -> Optional[RouteMatch]:
+        if index == len(parts):
+            return self._match_methods(node.handlers.get("static"), method, {})
+
+        # Branches are tried in order of precedence, the next one is tried
+        # if path exists in the branch but method isn't allowed there
+        not_allowed = None
+        for match in self._match_children(node, parts, index, method):
+            if match is None:
+                continue
+            if match.handler is not None:
+                return match
+            if not_allowed is None:
+                not_allowed = match
+            else:
+                not_allowed = RouteMatch(
+                    None,
+                    not_allowed.path_params,
+                    {*not_allowed.allowed_methods, *match.allowed_methods},
+                )
+        return not_allowed
+
+    def _match_children(
+        self, node: _Node, parts: list[str], index: int, method: str
+    ) -> Iterator[Optional[RouteMatch]]:
+        part = parts[index]
+        child = node.static.get(part)
+        if child is not None:
+            yield self._match(child, parts, index + 1, method)
+        if node.param is not None:
+            match = self._match(node.param, parts, index + 1, method)
+            if match is not None:
+                match.path_params[node.param_name] = part
+            yield match
+        if node.greedy_name is not None:
+            yield self._match_methods(
+                node.handlers.get("greedy"),
+                method,
+                {node.greedy_name: "/".join(parts[index:])},
+            )
+
+    @staticmethod
+    def _match_methods(
+        methods: Optional[dict[str, ApiHandler]], method: str, path_params: dict
+    ) -> Optional[RouteMatch]:
+        if not methods:
+            return None
+        return RouteMatch(
+            methods.get(method) or methods.get("ANY"), path_params, methods.keys()
+        )
+
+    @staticmethod
+    def error_response(match: Optional[RouteMatch]) -> Optional[dict]:
+        """Return 404 or 405 response if request can't be dispatched."""
+        if match is None:
+            return Response(404, {"message": "Not Found"}).as_response()
+        if match.handler is None:
+            allowed = ", ".join(sorted(match.allowed_methods))
+            return Response(
+                405, {"message": "Method Not Allowed"}, {"Allow": allowed}
+            ).as_response()
+        return None
+
+    @staticmethod
+    def route_event(event: dict, match: RouteMatch) -> dict:
+        """Return event with resource and path parameters of matched route."""
+        return {
+            **event,
+            "resource": match.handler.path,
+            "pathParameters": match.path_params or None,
+        }
+
+    def __call__(self, event: dict, context: dict) -> dict:
+        request = Request(event, context)
+        match = self.match(request.method, request.path)
+        response = self.error_response(match)
+        if response is not None:
+            return response
+        return match.handler(self.route_event(event, match), context)
@@ -1,9 +1,13 @@
 import enum
+import json
+import logging
 from pathlib import Path
+from typing import List, Optional
 
 import typer
 
 from viburnum import __version__
+from viburnum.local.modes import ServerMode
 
 from .api_template import api_template
 from .app_template import app_template
@@ -248,5 +252,127 @@ def s3_worker():
 app.add_typer(create_handler_app, name="add")
 
 
+@app.command(help="Benchmark handlers locally with synthetic events")
+def bench(
+    app_path: Path = typer.Option(Path("app.py"), "--app", help="Path to app.py"),
+    handlers: Optional[List[str]] = typer.Option(
+        None, "--handler", help="Handler name, all handlers by default"
+    ),
+    iterations: int = typer.Option(100, min=1, help="Measured invocations"),
+    warmup: int = typer.Option(5, min=0, help="Invocations before measuring"),
+    batch_size: int = typer.Option(10, min=1, help="Records in SQS and S3 events"),
+    body: Optional[str] = typer.Option(
+        None, help="JSON used as request and message body"
+    ),
+    import_runs: int = typer.Option(3, min=1, help="Runs of cold import"),
+    output: Optional[Path] = typer.Option(None, help="Save JSON report to file"),
+):
+    from viburnum.local.bench import run_benchmark
+
+    report = run_benchmark(
+        app_path,
+        handlers or (),
+        iterations=iterations,
+        warmup=warmup,
+        batch_size=batch_size,
+        body=json.loads(body) if body is not None else None,
+        import_runs=import_runs,
+    )
+    data = json.dumps(report, indent=2)
+    if output is None:
+        typer.echo(data)
+        return
+    output.write_text(data, encoding="utf-8")
+    typer.secho(f"Report saved to {output}", fg=typer.colors.BRIGHT_GREEN)
+
+
+@app.command(help="Serve api handlers locally")
+def serve(
+    app_path: Path = typer.Option(Path("app.py"), "--app", help="Path to app.py"),
+    host: str = typer.Option("127.0.0.1"),
+    port: int = typer.Option(3000),
+    mode: ServerMode = typer.Option(
+        ServerMode.thread.value, help="Handle connections in threads or with asyncio"
+    ),
+    workers: int = typer.Option(10, min=1, help="Requests processed at once"),
+    idle_timeout: float = typer.Option(
+        600, help="Seconds after which idle execution environment is dropped"
+    ),
+    quiet: bool = typer.Option(False, help="Don't log requests"),
+):
+    from viburnum.local import LocalApi, create_server, load_application
+
+    logging.basicConfig(
+        level=logging.WARNING if quiet else logging.INFO, format="%(message)s"
+    )
+    local_api = LocalApi(load_application(app_path), idle_timeout=idle_timeout)
+    server = create_server(local_api, host, port, mode, workers)
+    typer.secho(
+        f"Serving {len(local_api.router.handlers)} api handlers "
+        f"on http://{host}:{port} ({mode.value}, {workers} workers)",
+        fg=typer.colors.BRIGHT_CYAN,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        typer.echo(json.dumps(local_api.stats(), indent=2))
+
+
+@app.command(help="Deliver local queue messages and bucket files to workers")
+def pump(
+    app_path: Path = typer.Option(Path("app.py"), "--app", help="Path to app.py"),
+    handlers: Optional[List[str]] = typer.Option(
+        None, "--handler", help="Handler name, all workers by default"
+    ),
+    messages: int = typer.Option(
+        1000, min=0, help="Messages sent to queue of each SQS handler"
+    ),
+    body: Optional[str] = typer.Option(None, help="JSON used as message body"),
+    batch_size: Optional[int] = typer.Option(
+        None, min=1, help="Override batch size of handlers"
+    ),
+    batching_window: Optional[float] = typer.Option(
+        None, min=0, help="Override batching window of handlers, seconds"
+    ),
+    concurrency: Optional[int] = typer.Option(
+        None, min=1, help="Override concurrent invocations of each handler"
+    ),
+    visibility_timeout: Optional[float] = typer.Option(
+        None, min=0, help="Override visibility timeout of queues, seconds"
+    ),
+    root: Optional[Path] = typer.Option(
+        None, help="Directory of local buckets, temporary by default"
+    ),
+    duration: Optional[float] = typer.Option(
+        None, help="Stop after seconds, by default when queues are drained"
+    ),
+    output: Optional[Path] = typer.Option(None, help="Save JSON report to file"),
+):
+    from viburnum.local.pump import run_pump
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    report = run_pump(
+        app_path,
+        handlers or (),
+        messages=messages,
+        body=json.loads(body) if body is not None else None,
+        root=root,
+        duration=duration,
+        batch_size=batch_size,
+        batching_window=batching_window,
+        concurrency=concurrency,
+        visibility_timeout=visibility_timeout,
+    )
+    data = json.dumps(report, indent=2)
+    if output is None:
+        typer.echo(data)
+        return
+    output.write_text(data, encoding="utf-8")
+    typer.secho(f"Report saved to {output}", fg=typer.colors.BRIGHT_GREEN)
+
+
 if __name__ == "__main__":
     app()
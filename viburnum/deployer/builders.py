@@ -1,19 +1,23 @@
 import inspect
 import logging
 import os
-import shutil
 import sys
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Generic, TypeVar
+from typing import Generic, Optional, TypeVar
 
-import pip
 from aws_cdk import (
+    AssetHashType,
+    CfnOutput,
     Duration,
+    Names,
+    Size,
     Stack,
     aws_apigateway,
+    aws_apigatewayv2,
     aws_events,
     aws_events_targets,
+    aws_iam,
     aws_lambda,
     aws_lambda_event_sources,
     aws_s3,
@@ -23,17 +27,31 @@ from constructs import Construct
 
 from viburnum.application import (
     S3,
+    ApiType,
     Application,
+    Architecture,
     Handler,
+    LambdaConfig,
+    PackageConfig,
     Resource,
     ResourceConnector,
     S3Permission,
     Sqs,
     SqsPermission,
 )
+from viburnum.application.base import ApplicationLoaded, is_local_load
 from viburnum.application.connectors import S3Connector, SqsConnector
 from viburnum.application.handlers import ApiHandler, JobHandler, S3Handler, SqsHandler
 
+from .packaging import (
+    DEFAULT_EXCLUDES,
+    ApiRouterPackage,
+    FunctionPackage,
+    LibLayerPackage,
+    SharedLayerPackage,
+    write_size_report,
+)
+
 
 class BuilderException(Exception):
     pass
@@ -49,18 +67,31 @@ def get_builder_class(primitive):
     return getattr(sys.modules[__name__], f"{primitive.__class__.__name__}Builder")
 
 
+LAMBDA_ARCHITECTURES = {
+    Architecture.x86_64: aws_lambda.Architecture.X86_64,
+    Architecture.arm64: aws_lambda.Architecture.ARM_64,
+}
+
+
 class AppStack(Stack):
     def __init__(self, scope: Construct, app: Application, **kwargs) -> None:
+        if is_local_load():
+            # Local runtime needs only application, stack mustn't be synthesized
+            raise ApplicationLoaded(app)
         super().__init__(scope, app.name, **kwargs)
 
         self._app = app
         self._built_resources = {}
-        self.required_layers = []
-
+        self._rest_api = None
+        self._http_api = None
+        self.required_layers: dict[Architecture, list[aws_lambda.ILayerVersion]] = {}
+        # Sizes of function packages by function name
+        self.package_sizes: dict[str, dict[str, int]] = {}
         self._build_layers()
 
         self._build_resources()
         self._build_handlers()
+        write_size_report(self.package_sizes)
 
     def _build_resources(self):
         for resource in self._app.resources.values():
@@ -71,71 +102,254 @@ class AppStack(Stack):
             self._built_resources[resource.name] = builder_class(self, resource).build()
 
     def _build_handlers(self):
-        for handler in self._app.handlers:
+        handlers = self._app.handlers
+        if self._app.single_function_api:
+            api_handlers = [h for h in handlers if isinstance(h, ApiHandler)]
+            handlers = [h for h in handlers if not isinstance(h, ApiHandler)]
+            if api_handlers:
+                ApiRouterBuilder(self, api_handlers).build()
+
+        for handler in handlers:
             handler_class = getattr(
                 sys.modules[__name__], f"{handler.__class__.__name__}Builder"
             )
             handler_class(self, handler).build()
 
+    @property
+    def rest_api(self) -> aws_apigateway.RestApi:
+        if self._rest_api is None:
+            self._rest_api = aws_apigateway.RestApi(
+                self,
+                f"{self._app.name}Api",
+                binary_media_types=self._get_binary_media_types(),
+                deploy_options=self._get_deploy_options(),
+            )
+        return self._rest_api
+
+    def _get_deploy_options(self) -> Optional[aws_apigateway.StageOptions]:
+        cached_handlers = [
+            h
+            for h in self._app.handlers
+            if isinstance(h, ApiHandler) and h.cache_ttl is not None
+        ]
+        if not cached_handlers:
+            return None
+        if self._app.single_function_api:
+            logging.warning("Route cache settings are ignored for single function api")
+            return None
+        method_options = {}
+        for handler in cached_handlers:
+            if not handler.path.strip("/"):
+                logging.warning("Cache settings for root path are not supported")
+                continue
+            for method in handler.methods:
+                method = "*" if method.upper() == "ANY" else method.upper()
+                method_options[
+                    f"{handler.path.rstrip('/')}/{method}"
+                ] = aws_apigateway.MethodDeploymentOptions(
+                    caching_enabled=True,
+                    cache_ttl=Duration.seconds(handler.cache_ttl),
+                )
+        return aws_apigateway.StageOptions(
+            cache_cluster_enabled=True,
+            cache_cluster_size=self._app.api_cache_cluster_size,
+            method_options=method_options,
+        )
+
+    @property
+    def http_api(self) -> aws_apigatewayv2.CfnApi:
+        if self._http_api is None:
+            name = f"{self._app.name}HttpApi"
+            self._http_api = aws_apigatewayv2.CfnApi(
+                self, name, name=name, protocol_type="HTTP"
+            )
+            aws_apigatewayv2.CfnStage(
+                self,
+                f"{name}DefaultStage",
+                api_id=self._http_api.ref,
+                stage_name="$default",
+                auto_deploy=True,
+            )
+            CfnOutput(self, f"{name}Endpoint", value=self._http_api.attr_api_endpoint)
+        return self._http_api
+
+    def add_http_api_routes(
+        self, name: str, lambda_: aws_lambda.IFunction, path: str, methods: list[str]
+    ):
+        """Connect Lambda to Http Api routes with payload format version 2.0"""
+        integration = aws_apigatewayv2.CfnIntegration(
+            self,
+            f"{name}HttpIntegration",
+            api_id=self.http_api.ref,
+            integration_type="AWS_PROXY",
+            integration_uri=lambda_.function_arn,
+            payload_format_version="2.0",
+        )
+        for method in methods:
+            aws_apigatewayv2.CfnRoute(
+                self,
+                f"{name}{method}HttpRoute",
+                api_id=self.http_api.ref,
+                route_key=f"{method} {path}",
+                target=f"integrations/{integration.ref}",
+            )
+        lambda_.add_permission(
+            f"{name}HttpApiPermission",
+            principal=aws_iam.ServicePrincipal("apigateway.amazonaws.com"),
+            source_arn=self.format_arn(
+                service="execute-api",
+                resource=self.http_api.ref,
+                resource_name="*/*",
+            ),
+        )
+
+    def _get_binary_media_types(self) -> Optional[list[str]]:
+        # Compressed responses of any type are returned base64 encoded
+        if self._compression_used():
+            return ["*/*"]
+        return self._app.binary_media_types
+
+    def _compression_used(self) -> bool:
+        return self._app.compress_responses or any(
+            isinstance(h, ApiHandler) and h.compress for h in self._app.handlers
+        )
+
     def _build_layers(self):
         lib_folder = Path("./.layers")
         if not lib_folder.exists():
             os.mkdir(str(lib_folder))
 
+        architectures = self._get_architectures()
+        for architecture in architectures:
+            self.required_layers[architecture] = []
         if Path("./shared").exists():
-            self._prepare_shared_layer()
-            self._build_shared_layer()
-        self._prepare_libraries_layer()
-        self._build_lib_layer()
-
-    def _prepare_shared_layer(self):
-        logging.info("Preparing shared layer")
-        shared_layer_folder = Path("./.layers/shared")
-        if os.path.exists(shared_layer_folder):
-            shutil.rmtree(shared_layer_folder)
-        os.mkdir(shared_layer_folder)
-        shutil.copytree("shared", str(shared_layer_folder.joinpath("python/shared")))
-
-    def _prepare_libraries_layer(self):
-        logging.info("Preparing libraries layer")
-        lib_layer_folder = Path("./.layers/lib")
-        if os.path.exists(lib_layer_folder):
-            shutil.rmtree(lib_layer_folder)
-        os.mkdir(lib_layer_folder)
-        shutil.copy("requirements.txt", str(lib_layer_folder))
+            package = self._prepare_shared_layer()
+            self._build_shared_layer(architectures, package)
+        for architecture in architectures:
+            package = self._prepare_libraries_layer(architecture)
+            self._build_lib_layer(architecture, package)
+
+    def _get_architectures(self) -> list[Architecture]:
+        configs = [self.get_lambda_config(h) for h in self._app.handlers]
+        if self._app.single_function_api:
+            configs.append(self._app.lambda_config)
+        architectures = {c.architecture or Architecture.x86_64 for c in configs}
+        return sorted(architectures or {Architecture.x86_64}, key=lambda a: a.value)
+
+    def _prepare_shared_layer(self) -> SharedLayerPackage:
+        package = SharedLayerPackage(
+            Path("shared"), (*DEFAULT_EXCLUDES, *self._app.package_excludes)
+        )
+        package.prepare()
+        return package
 
+    def _prepare_libraries_layer(self, architecture: Architecture) -> LibLayerPackage:
+        package = LibLayerPackage(Path("requirements.txt"), architecture)
         # TODO: use docker container for building lib layer
-        pip.main(
-            [
-                "install",
-                "-r",
-                "requirements.txt",
-                "--target",
-                str(lib_layer_folder.joinpath("python")),
-            ]
-        )
+        package.prepare()
+        return package
 
-    def _build_shared_layer(self):
+    def _build_shared_layer(
+        self, architectures: list[Architecture], package: SharedLayerPackage
+    ):
+        # Shared code is pure python, so one layer fits all architectures
         self._shared_layer = aws_lambda.LayerVersion(
             self,
             "SharedLayer",
             code=aws_lambda.Code.from_asset(
-                str(Path("./.layers/shared")),
+                str(package.folder),
+                asset_hash_type=AssetHashType.CUSTOM,
+                asset_hash=package.asset_hash,
             ),
             compatible_runtimes=[aws_lambda.Runtime.PYTHON_3_9],
+            compatible_architectures=[LAMBDA_ARCHITECTURES[a] for a in architectures],
         )
-        self.required_layers.append(self._shared_layer)
-
-    def _build_lib_layer(self):
-        self._lib_layer = aws_lambda.LayerVersion(
+        for architecture in architectures:
+            self.required_layers[architecture].append(self._shared_layer)
+
+    def _build_lib_layer(self, architecture: Architecture, package: LibLayerPackage):
+        layer_id = "LibLayer"
+        if architecture is not Architecture.x86_64:
+            layer_id = f"LibLayer{architecture.value.capitalize()}"
+        lib_layer = aws_lambda.LayerVersion(
             self,
-            "LibLayer",
+            layer_id,
+            # Hash of inputs, so CDK doesn't fingerprint all files of libraries
             code=aws_lambda.Code.from_asset(
-                str(Path("./.layers/lib")),
+                str(package.folder),
+                asset_hash_type=AssetHashType.CUSTOM,
+                asset_hash=package.asset_hash,
             ),
             compatible_runtimes=[aws_lambda.Runtime.PYTHON_3_9],
+            compatible_architectures=[LAMBDA_ARCHITECTURES[architecture]],
+        )
+        self.required_layers[architecture].append(lib_layer)
+
+    def get_lambda_config(self, handler: Handler) -> LambdaConfig:
+        return self._app.lambda_config.merge(handler.lambda_config)
+
+    def get_package_excludes(self, config: PackageConfig) -> tuple[str, ...]:
+        return (*DEFAULT_EXCLUDES, *self._app.package_excludes, *config.exclude)
+
+    def build_function_code(self, handler: Handler) -> aws_lambda.Code:
+        """Prepare package of handler folder and return its asset."""
+        config = handler.package_config or PackageConfig()
+        module_file = Path(inspect.getfile(handler.func))
+        package = FunctionPackage(
+            handler.name,
+            module_file.parent,
+            # Module of handler is always deployed
+            None if config.include is None else (*config.include, module_file.name),
+            self.get_package_excludes(config),
+            self._app.compile_bytecode
+            if config.compile_bytecode is None
+            else config.compile_bytecode,
+        )
+        package.prepare()
+        self.package_sizes[handler.name] = package.size
+        return aws_lambda.Code.from_asset(
+            str(package.folder),
+            asset_hash_type=AssetHashType.CUSTOM,
+            asset_hash=package.asset_hash,
+        )
+
+    def build_function(
+        self, id: str, config: LambdaConfig, **kwargs
+    ) -> aws_lambda.Function:
+        """Create Lambda with settings from `config` and layers of its architecture."""
+        architecture = config.architecture or Architecture.x86_64
+        return aws_lambda.Function(
+            self,
+            id,
+            runtime=aws_lambda.Runtime.PYTHON_3_9,
+            architecture=LAMBDA_ARCHITECTURES[architecture],
+            layers=self.required_layers[architecture],
+            memory_size=config.memory_size,
+            timeout=None
+            if config.timeout is None
+            else Duration.seconds(config.timeout),
+            ephemeral_storage_size=(
+                None
+                if config.ephemeral_storage is None
+                else Size.mebibytes(config.ephemeral_storage)
+            ),
+            reserved_concurrent_executions=config.reserved_concurrency,
+            **kwargs,
+        )
+
+    @staticmethod
+    def get_function_target(
+        lambda_: aws_lambda.Function, config: LambdaConfig
+    ) -> aws_lambda.IFunction:
+        """
+        Return function that triggers should invoke, it's `live` alias
+        if Lambda has provisioned concurrency.
+        """
+        if config.provisioned_concurrency is None:
+            return lambda_
+        return lambda_.add_alias(
+            "live", provisioned_concurrent_executions=config.provisioned_concurrency
         )
-        self.required_layers.append(self._lib_layer)
 
     def _build_sqs(self, sqs: Sqs):
         queue = aws_sqs.Queue(
@@ -161,21 +375,20 @@ class HandlerBuilder(Generic[HandlerType]):
         self.context = context
         self.handler = handler
 
-    def _build_lambda(self):
-        dir_ = Path(inspect.getfile(self.handler.func)).parent
+    @property
+    def lambda_config(self) -> LambdaConfig:
+        return self.context.get_lambda_config(self.handler)
 
-        # TODO: add more config options
-        lambda_fn = aws_lambda.Function(
-            self.context,
+    def _build_lambda(self):
+        lambda_fn = self.context.build_function(
             self.handler.name,
-            runtime=aws_lambda.Runtime.PYTHON_3_9,
+            self.lambda_config,
             handler=f"handler.{self.handler.func.__name__}",
-            code=aws_lambda.Code.from_asset(str(dir_)),
+            code=self.context.build_function_code(self.handler),
             environment={
                 "APP_NAME": self.context._app.name,
                 # "AWS_REGION": self.context.region, This variable is reserved
             },
-            layers=self.context.required_layers,
         )
         return lambda_fn
 
@@ -185,30 +398,49 @@ class HandlerBuilder(Generic[HandlerType]):
             get_builder_class(connector)(self.context, connector, lambda_).build()
 
     def build(self):
+        """Build Lambda and return function, that should be connected to triggers."""
         # TODO: rework inheritance
         lambda_ = self._build_lambda()
         self._connect_resources(lambda_)
-        return lambda_
+        return self.context.get_function_target(lambda_, self.lambda_config)
 
 
-class ApiHandlerBuilder(HandlerBuilder[ApiHandler]):
-    _api = None
+def _set_api_environment(context: "AppStack", lambda_: aws_lambda.Function):
+    app = context._app
+    if app.compress_responses:
+        lambda_.add_environment("VIBURNUM_COMPRESS_RESPONSES", "1")
+        lambda_.add_environment(
+            "VIBURNUM_COMPRESS_MIN_SIZE", str(app.compress_min_size)
+        )
+
 
+class ApiHandlerBuilder(HandlerBuilder[ApiHandler]):
     @property
     def api(self) -> aws_apigateway.RestApi:
-        if not self.__class__._api:
-            self.__class__._api = aws_apigateway.RestApi(
-                self.context, f"{self.context._app.name}Api"
-            )
-        return self.__class__._api
+        return self.context.rest_api
 
     def build(self):
         lambda_ = super().build()
         self._build_endpoint(lambda_)
         return lambda_
 
-    def _build_endpoint(self, lambda_: aws_lambda.Function):
-        integration = aws_apigateway.LambdaIntegration(lambda_)
+    def _build_lambda(self):
+        lambda_ = super()._build_lambda()
+        _set_api_environment(self.context, lambda_)
+        return lambda_
+
+    def _build_endpoint(self, lambda_: aws_lambda.IFunction):
+        if self.context._app.api_type is ApiType.http:
+            if self.handler.cache_ttl is not None:
+                logging.warning("Http Api doesn't support caching of routes")
+            self.context.add_http_api_routes(
+                self.handler.name, lambda_, self.handler.path, self.handler.methods
+            )
+            return
+        cache_key_parameters = self._get_cache_key_parameters()
+        integration = aws_apigateway.LambdaIntegration(
+            lambda_, cache_key_parameters=cache_key_parameters or None
+        )
 
         endpoint = self.api.root
         for path_part in (p for p in self.handler.path.split("/") if p):
@@ -216,7 +448,155 @@ class ApiHandlerBuilder(HandlerBuilder[ApiHandler]):
                 path_part
             )
         for method in self.handler.methods:
-            endpoint.add_method(method, integration)
+            endpoint.add_method(
+                method,
+                integration,
+                # Cache key parameters must be declared in method request
+                request_parameters={
+                    p: p.startswith("method.request.path.")
+                    for p in cache_key_parameters
+                }
+                or None,
+            )
+
+    def _get_cache_key_parameters(self) -> list[str]:
+        if self.handler.cache_ttl is None:
+            return []
+        # Greedy `{proxy+}` parameter is mapped as `method.request.path.proxy`
+        parameters = [
+            f"method.request.path.{p[1:-1].rstrip('+')}"
+            for p in self.handler.path.split("/")
+            if p.startswith("{") and p.endswith("}")
+        ]
+        for param in self.handler.cache_key_params:
+            location, _, name = param.partition(".")
+            if not name:
+                location, name = "querystring", param
+            if location == "query":
+                location = "querystring"
+            if location not in ("querystring", "header", "path"):
+                raise BuilderException(f"Wrong cache key parameter '{param}'")
+            if location == "path":
+                name = name.rstrip("+")
+            parameter = f"method.request.{location}.{name}"
+            if parameter not in parameters:
+                parameters.append(parameter)
+        return parameters
+
+
+class ApiRouterBuilder:
+    """
+    Builds single Lambda, that serves all api handlers with in-process
+    :class:`ApiRouter` behind `{proxy+}` integration.
+    """
+
+    module_name = "viburnum_api"
+
+    def __init__(self, context: "AppStack", handlers: list[ApiHandler]) -> None:
+        self.context = context
+        self.handlers = handlers
+        self.name = f"{context._app.name}ApiRouter"
+
+    def build(self):
+        package = self._prepare_code()
+        # Router serves all handlers, so it uses application defaults
+        config = self.context._app.lambda_config
+        if any(h.lambda_config is not None for h in self.handlers):
+            logging.warning(
+                "Lambda config of api handlers is ignored by single function api"
+            )
+        lambda_ = self.context.build_function(
+            self.name,
+            config,
+            handler=f"{self.module_name}.handler",
+            code=aws_lambda.Code.from_asset(
+                str(package.folder),
+                asset_hash_type=AssetHashType.CUSTOM,
+                asset_hash=package.asset_hash,
+            ),
+            environment={
+                "APP_NAME": self.context._app.name,
+            },
+        )
+        _set_api_environment(self.context, lambda_)
+        for handler in self.handlers:
+            for connector in handler.resources:
+                get_builder_class(connector)(self.context, connector, lambda_).build()
+        target = self.context.get_function_target(lambda_, config)
+        self._build_endpoint(target)
+        return target
+
+    def _prepare_code(self) -> ApiRouterPackage:
+        logging.info("Preparing api router code")
+        package = ApiRouterPackage(self.name, self.context._app.compile_bytecode)
+        imports = []
+        for index, handler in enumerate(self.handlers):
+            module = handler.func.__module__
+            self._add_handler_package(package, handler, module)
+            imports.append(
+                f"from {module} import {handler.func.__name__} as handler_{index}"
+            )
+        handlers_list = ", ".join(f"handler_{i}" for i in range(len(self.handlers)))
+        package.add_module(
+            f"{self.module_name}.py",
+            api_router_template.format(
+                imports="\n".join(imports), handlers=handlers_list
+            ),
+        )
+        package.prepare()
+        self.context.package_sizes[self.name] = package.size
+        return package
+
+    def _add_handler_package(
+        self, package: ApiRouterPackage, handler: ApiHandler, module: str
+    ):
+        package_parts = module.split(".")[:-1]
+        if not package_parts:
+            raise BuilderException(
+                f"Handler '{handler.name}' must be imported from a package"
+            )
+        module_file = Path(inspect.getfile(handler.func))
+        source = module_file.parent
+        root = source.parents[len(package_parts) - 1]
+        config = handler.package_config or PackageConfig()
+        package.add_package(
+            "/".join(package_parts),
+            source,
+            None if config.include is None else (*config.include, module_file.name),
+            self.context.get_package_excludes(config),
+        )
+        # Copy `__init__.py` of parent packages
+        for depth in range(1, len(package_parts)):
+            init_file = root.joinpath(*package_parts[:depth], "__init__.py")
+            if init_file.exists():
+                package.add_module(
+                    "/".join((*package_parts[:depth], "__init__.py")),
+                    init_file.read_text(encoding="utf-8"),
+                )
+
+    def _build_endpoint(self, lambda_: aws_lambda.IFunction):
+        if self.context._app.api_type is ApiType.http:
+            self.context.add_http_api_routes(self.name, lambda_, "/", ["ANY"])
+            self.context.add_http_api_routes(
+                f"{self.name}Proxy", lambda_, "/{proxy+}", ["ANY"]
+            )
+            return
+        integration = aws_apigateway.LambdaIntegration(lambda_)
+        api = self.context.rest_api
+        api.root.add_method("ANY", integration)
+        api.root.add_proxy(default_integration=integration, any_method=True)
+
+
+api_router_template = """from viburnum.application.router import ApiRouter
+
+{imports}
+
+router = ApiRouter([{handlers}])
+
+
+def handler(event, context):
+    return router(event, context)
+"""
 
 
 class JobHandlerBuilder(HandlerBuilder[JobHandler]):
@@ -240,11 +620,28 @@ class SqsHandlerBuilder(HandlerBuilder[SqsHandler]):
         self._handler_connect_queue(lambda_)
         return lambda_
 
-    def _handler_connect_queue(self, lambda_: aws_lambda.Function):
+    def _handler_connect_queue(self, lambda_: aws_lambda.IFunction):
         queue: aws_sqs.Queue = self.context.get_built_resource(self.handler.queue_name)
-        # TODO: add more config options including enabling report_batch_item_failure
-        _sqs_event_source = aws_lambda_event_sources.SqsEventSource(queue)
+        max_batching_window = self.handler.max_batching_window
+        _sqs_event_source = aws_lambda_event_sources.SqsEventSource(
+            queue,
+            batch_size=self.handler.batch_size,
+            max_batching_window=(
+                None
+                if max_batching_window is None
+                else Duration.seconds(max_batching_window)
+            ),
+            report_batch_item_failures=self.handler.report_batch_item_failures,
+        )
         lambda_.add_event_source(_sqs_event_source)
+        if self.handler.max_concurrency is not None:
+            # SqsEventSource of used CDK version doesn't support scaling config
+            mapping = lambda_.node.find_child(
+                f"SqsEventSource:{Names.node_unique_id(queue.node)}"
+            )
+            mapping.node.default_child.add_property_override(
+                "ScalingConfig.MaximumConcurrency", self.handler.max_concurrency
+            )
 
 
 class S3HandlerBuilder(HandlerBuilder[S3Handler]):
@@ -252,7 +649,7 @@ class S3HandlerBuilder(HandlerBuilder[S3Handler]):
         lambda_ = super().build()
         self._handler_connect_bucket(lambda_)
 
-    def _handler_connect_bucket(self, lambda_: aws_lambda.Function):
+    def _handler_connect_bucket(self, lambda_: aws_lambda.IFunction):
         bucket = aws_s3.Bucket = self.context.get_built_resource(
             self.handler.bucket_name
         )
@@ -283,14 +680,26 @@ class ResourceBuilder(ABC, Generic[ResourceType]):
 
 class SqsBuilder(ResourceBuilder[Sqs]):
     def build(self):
-        # TODO: add more config options
         queue = aws_sqs.Queue(
             self.context,
             self.resource.name,
             visibility_timeout=Duration.seconds(self.resource.visibility_timeout),
+            dead_letter_queue=self._build_dead_letter_queue(),
         )
         return queue
 
+    def _build_dead_letter_queue(self) -> Optional[aws_sqs.DeadLetterQueue]:
+        if self.resource.max_receive_count is None:
+            return None
+        queue = aws_sqs.Queue(
+            self.context,
+            f"{self.resource.name}DeadLetterQueue",
+            retention_period=Duration.days(self.resource.dead_letter_retention_days),
+        )
+        return aws_sqs.DeadLetterQueue(
+            max_receive_count=self.resource.max_receive_count, queue=queue
+        )
+
 
 class S3Builder(ResourceBuilder[S3]):
     def build(self):
@@ -0,0 +1,633 @@
+"""
+Packaging of Lambda layers and function code.
+
+Layers are cached in `.layers` and function code in `.build` by hash of their
+inputs, so synth rebuilds them only on change and CDK gets the same asset hash
+for unchanged packages.
+"""
+import fnmatch
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import py_compile
+import shutil
+import subprocess
+import sys
+import sysconfig
+import zlib
+from pathlib import Path
+from typing import Iterable, Optional
+
+from viburnum.application import Architecture
+
+LAYERS_FOLDER = Path("./.layers")
+BUILD_FOLDER = Path("./.build")
+
+LAMBDA_RUNTIME = "python3.9"
+LAMBDA_PYTHON_VERSION = "3.9"
+
+# Platform of wheels installed into libraries layer, x86_64 layer is built
+# for the host platform only on linux x86_64 hosts
+PIP_PLATFORMS = {
+    Architecture.x86_64: "manylinux2014_x86_64",
+    Architecture.arm64: "manylinux2014_aarch64",
+}
+
+# Bump to invalidate cached layers after changes of packaging
+CACHE_VERSION = "1"
+
+# Files, that aren't needed in Lambda, patterns are matched against
+# names of files and folders and against paths relative to package root
+DEFAULT_EXCLUDES = (
+    "__pycache__",
+    "*.py[cod]",
+    ".*",
+    "tests",
+    "test_*.py",
+    "*_test.py",
+    "conftest.py",
+)
+# 1980-01-01, the earliest timestamp supported by zip
+NORMALIZED_MTIME = 315532800
+FILE_MODE = 0o644
+EXECUTABLE_MODE = 0o755
+
+
+class PackagingError(Exception):
+    pass
+
+
+def read_requirements(path: Path) -> list[str]:
+    """
+    Return requirements without comments and blank lines,
+    with lines of nested `-r` and `-c` files.
+    """
+    lines = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.split(" #")[0].strip()
+        if not line or line.startswith("#"):
+            continue
+        option, _, value = line.partition(" ")
+        if option in ("-r", "--requirement", "-c", "--constraint"):
+            lines.append(option)
+            lines.extend(read_requirements(path.parent.joinpath(value.strip())))
+        else:
+            lines.append(line)
+    return lines
+
+
+def matches(relative_path: str, patterns: Iterable[str]) -> bool:
+    """Path or any of its parts matches one of glob `patterns`."""
+    parts = relative_path.split("/")
+    return any(
+        fnmatch.fnmatch(relative_path, pattern)
+        or any(fnmatch.fnmatch(part, pattern) for part in parts)
+        for pattern in patterns
+    )
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def can_compile_bytecode() -> bool:
+    """Bytecode is specific to Python version, so it must match the runtime."""
+    return "{}.{}".format(*sys.version_info) == LAMBDA_PYTHON_VERSION
+
+
+def compile_file(path: Path, relative_path: str) -> Path:
+    """
+    Compile module into `__pycache__` next to it and return path of bytecode.
+    Bytecode isn't checked against source, Lambda code is read-only anyway,
+    and has no timestamp, so it's deterministic.
+    """
+    cache_path = Path(importlib.util.cache_from_source(str(path)))
+    py_compile.compile(
+        str(path),
+        cfile=str(cache_path),
+        dfile=relative_path,
+        doraise=True,
+        invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+    )
+    normalize(cache_path.parent)
+    normalize(cache_path)
+    return cache_path
+
+
+def package_size(folder: Path) -> dict[str, int]:
+    """Number of files, size and approximate compressed size in bytes."""
+    files = size = compressed_size = 0
+    for path in folder.rglob("*"):
+        if path.is_file():
+            data = path.read_bytes()
+            files += 1
+            size += len(data)
+            compressed_size += len(zlib.compress(data))
+    return {"files": files, "size": size, "compressed_size": compressed_size}
+
+
+def normalize(path: Path, executable: bool = False) -> None:
+    """Set fixed permissions and mtime, so packaged file is deterministic."""
+    os.chmod(path, EXECUTABLE_MODE if executable or path.is_dir() else FILE_MODE)
+    os.utime(path, (NORMALIZED_MTIME, NORMALIZED_MTIME))
+
+
+def sync_folder(
+    source: Path,
+    target: Path,
+    excludes: Iterable[str] = DEFAULT_EXCLUDES,
+    manifest_path: Optional[Path] = None,
+    includes: Optional[Iterable[str]] = None,
+    compile_bytecode: bool = False,
+) -> str:
+    """
+    Make `target` a normalized copy of `source` without excluded files,
+    copying only files changed by content, and return hash of the content.
+    With `includes` only matching files are copied, with `compile_bytecode`
+    modules are compiled next to their copies.
+
+    `manifest_path` keeps hashes of synced files, so sources with unchanged
+    size and mtime aren't read again.
+    """
+    excludes = tuple(excludes)
+    includes = None if includes is None else tuple(includes)
+    manifest: dict[str, list] = {}
+    if manifest_path is not None and manifest_path.exists() and target.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+    synced: dict[str, list] = {}
+    compiled: set[str] = set()
+    copied = 0
+    for root, dirs, files in os.walk(source):
+        relative_root = Path(root).relative_to(source).as_posix()
+        prefix = "" if relative_root == "." else f"{relative_root}/"
+        dirs[:] = sorted(d for d in dirs if not matches(prefix + d, excludes))
+        for name in sorted(files):
+            relative_path = prefix + name
+            if matches(relative_path, excludes) or (
+                includes is not None and not matches(relative_path, includes)
+            ):
+                continue
+            path = Path(root, name)
+            stat = path.stat()
+            executable = bool(stat.st_mode & 0o111)
+            entry = manifest.get(relative_path)
+            target_path = target.joinpath(relative_path)
+            if (
+                entry is not None
+                and entry[:3] == [stat.st_size, stat.st_mtime_ns, executable]
+                and target_path.exists()
+            ):
+                synced[relative_path] = entry
+                changed = False
+            else:
+                content_hash = file_hash(path)
+                changed = (
+                    entry is None
+                    or entry[3] != content_hash
+                    or not target_path.exists()
+                )
+                if changed:
+                    target_path.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(path, target_path)
+                    copied += 1
+                normalize(target_path, executable)
+                synced[relative_path] = [
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    executable,
+                    content_hash,
+                ]
+            if compile_bytecode and name.endswith(".py"):
+                cache_path = Path(importlib.util.cache_from_source(str(target_path)))
+                if changed or not cache_path.exists():
+                    compile_file(target_path, relative_path)
+                compiled.add(cache_path.relative_to(target).as_posix())
+
+    removed = 0
+    if target.exists():
+        for path in sorted(target.rglob("*"), reverse=True):
+            relative_path = path.relative_to(target).as_posix()
+            if path.is_dir():
+                if not any(path.iterdir()):
+                    path.rmdir()
+            elif relative_path not in synced and relative_path not in compiled:
+                path.unlink()
+                removed += 1
+    target.mkdir(parents=True, exist_ok=True)
+    for path in (target, *(p for p in target.rglob("*") if p.is_dir())):
+        normalize(path)
+    logging.info(
+        "Synced '%s': %s copied, %s removed, %s unchanged",
+        source,
+        copied,
+        removed,
+        len(synced) - copied,
+    )
+
+    if manifest_path is not None:
+        manifest_path.write_text(json.dumps(synced), encoding="utf-8")
+    digest = hashlib.sha256()
+    for relative_path, entry in sorted(synced.items()):
+        digest.update(f"{relative_path}:{entry[2]}:{entry[3]}\n".encode("utf-8"))
+    for relative_path in sorted(compiled):
+        # Bytecode is determined by source and interpreter version
+        digest.update(f"{relative_path}:{LAMBDA_PYTHON_VERSION}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def is_host_build(architecture: Architecture) -> bool:
+    """
+    Return True if libraries for `architecture` could be installed for the host,
+    source distributions included, otherwise only Lambda platform wheels are used.
+    """
+    return (
+        architecture is Architecture.x86_64
+        and sysconfig.get_platform() == "linux-x86_64"
+    )
+
+
+def get_pip_platform(architecture: Architecture) -> str:
+    if not is_host_build(architecture):
+        return PIP_PLATFORMS[architecture]
+    # Host builds depend on the host interpreter too
+    version = "{}.{}".format(*sys.version_info)
+    return f"host-{sysconfig.get_platform()}-{version}"
+
+
+class LibLayerPackage:
+    """
+    Libraries layer of `requirements` for `architecture`.
+
+    Wheels are kept in a local wheelhouse, so rebuild of layer after
+    change of requirements installs already downloaded wheels offline.
+    """
+
+    def __init__(
+        self,
+        requirements: Path = Path("requirements.txt"),
+        architecture: Architecture = Architecture.x86_64,
+        layers_folder: Path = LAYERS_FOLDER,
+    ) -> None:
+        self.requirements = requirements
+        self.architecture = architecture
+        self.host_build = is_host_build(architecture)
+        self.platform = get_pip_platform(architecture)
+        self.layers_folder = layers_folder
+        self._asset_hash: Optional[str] = None
+
+    @property
+    def asset_hash(self) -> str:
+        """Hash of requirements, runtime, architecture and platform."""
+        if self._asset_hash is None:
+            digest = hashlib.sha256()
+            for part in (
+                CACHE_VERSION,
+                LAMBDA_RUNTIME,
+                self.architecture.value,
+                self.platform,
+                *read_requirements(self.requirements),
+            ):
+                digest.update(part.encode("utf-8") + b"\n")
+            self._asset_hash = digest.hexdigest()
+        return self._asset_hash
+
+    @property
+    def folder(self) -> Path:
+        return self.layers_folder.joinpath(
+            "lib", f"{self.architecture.value}-{self.asset_hash[:16]}"
+        )
+
+    @property
+    def wheelhouse(self) -> Path:
+        return self.layers_folder.joinpath("wheelhouse", self.platform)
+
+    def prepare(self) -> Path:
+        """Return folder of layer, it's built if not cached yet."""
+        if self.folder.exists():
+            logging.info(
+                "Libraries layer for %s is up to date", self.architecture.value
+            )
+            return self.folder
+        logging.info("Preparing libraries layer for %s", self.architecture.value)
+        build_folder = self.folder.with_name(f"{self.folder.name}.tmp")
+        # Wheelhouse is filled only if it lacks some of requirements
+        if not self._install_offline(build_folder):
+            self._fill_wheelhouse()
+            if not self._install(build_folder):
+                raise PackagingError(
+                    f"Failed to build libraries layer for {self.architecture.value}"
+                )
+        # Folder appears only when layer is complete
+        build_folder.rename(self.folder)
+        self._prune()
+        return self.folder
+
+    def _platform_options(self) -> list[str]:
+        if self.host_build:
+            return []
+        # Only wheels could be installed for another platform
+        return [
+            "--platform",
+            self.platform,
+            "--implementation",
+            "cp",
+            "--python-version",
+            LAMBDA_PYTHON_VERSION,
+            "--only-binary=:all:",
+        ]
+
+    @staticmethod
+    def _pip(*args: str, capture_output: bool = False) -> bool:
+        result = subprocess.run(
+            [sys.executable, "-m", "pip", *args], capture_output=capture_output
+        )
+        return result.returncode == 0
+
+    def _install_offline(self, build_folder: Path) -> bool:
+        """Try to install from wheelhouse only, its errors aren't shown."""
+        if not any(self.wheelhouse.glob("*.whl")):
+            return False
+        if self._install(build_folder, capture_output=True):
+            return True
+        logging.info("Wheelhouse lacks some of requirements, downloading them")
+        return False
+
+    def _install(self, build_folder: Path, capture_output: bool = False) -> bool:
+        if build_folder.exists():
+            shutil.rmtree(build_folder)
+        build_folder.mkdir(parents=True)
+        return self._pip(
+            "install",
+            "-r",
+            str(self.requirements),
+            "--no-index",
+            "--find-links",
+            str(self.wheelhouse),
+            "--target",
+            str(build_folder.joinpath("python")),
+            # Bytecode has timestamps, so layer wouldn't be deterministic
+            "--no-compile",
+            "--quiet",
+            *self._platform_options(),
+            capture_output=capture_output,
+        )
+
+    def _fill_wheelhouse(self) -> None:
+        self.wheelhouse.mkdir(parents=True, exist_ok=True)
+        if self.host_build:
+            # Source distributions are built into wheels once
+            command = ["wheel", "--wheel-dir"]
+        else:
+            command = ["download", "--dest"]
+        if not self._pip(
+            *command,
+            str(self.wheelhouse),
+            "-r",
+            str(self.requirements),
+            *self._platform_options(),
+        ):
+            raise PackagingError(
+                f"Failed to download requirements for {self.architecture.value}"
+            )
+
+    def _prune(self) -> None:
+        """Remove outdated layers of the same architecture."""
+        for folder in self.folder.parent.glob(f"{self.architecture.value}-*"):
+            if folder != self.folder:
+                shutil.rmtree(folder)
+
+
+class SharedLayerPackage:
+    """
+    Layer of `shared` package. It's synced incrementally into `.layers/shared`
+    and its asset hash depends only on content of packaged files.
+    """
+
+    def __init__(
+        self,
+        source: Path = Path("shared"),
+        excludes: Iterable[str] = DEFAULT_EXCLUDES,
+        layers_folder: Path = LAYERS_FOLDER,
+    ) -> None:
+        self.source = source
+        self.excludes = tuple(excludes)
+        self.layers_folder = layers_folder
+        self.asset_hash: Optional[str] = None
+
+    @property
+    def folder(self) -> Path:
+        return self.layers_folder.joinpath("shared")
+
+    def prepare(self) -> Path:
+        logging.info("Preparing shared layer")
+        content_hash = sync_folder(
+            self.source,
+            self.folder.joinpath("python", self.source.name),
+            self.excludes,
+            self.layers_folder.joinpath("shared.json"),
+        )
+        self.asset_hash = hashlib.sha256(
+            f"{CACHE_VERSION}:{self.source.name}:{content_hash}".encode("utf-8")
+        ).hexdigest()
+        return self.folder
+
+
+class FunctionPackage:
+    """
+    Code of handler, its folder is synced into `.build/functions/<name>`
+    with include and exclude patterns and optionally with bytecode.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        source: Path,
+        includes: Optional[Iterable[str]] = None,
+        excludes: Iterable[str] = DEFAULT_EXCLUDES,
+        compile_bytecode: bool = False,
+        build_folder: Path = BUILD_FOLDER,
+    ) -> None:
+        self.name = name
+        self.source = source
+        self.includes = None if includes is None else tuple(includes)
+        self.excludes = tuple(excludes)
+        self.compile_bytecode = compile_bytecode
+        self.build_folder = build_folder.joinpath("functions")
+        self.asset_hash: Optional[str] = None
+        self.size: Optional[dict[str, int]] = None
+
+    @property
+    def folder(self) -> Path:
+        return self.build_folder.joinpath(self.name)
+
+    def prepare(self) -> Path:
+        compile_bytecode = self.compile_bytecode
+        if compile_bytecode and not can_compile_bytecode():
+            logging.warning(
+                "Bytecode of '%s' isn't compiled, Python %s is required",
+                self.name,
+                LAMBDA_PYTHON_VERSION,
+            )
+            compile_bytecode = False
+        content_hash = sync_folder(
+            self.source,
+            self.folder,
+            self.excludes,
+            self.build_folder.joinpath(f"{self.name}.json"),
+            self.includes,
+            compile_bytecode,
+        )
+        self.asset_hash = hashlib.sha256(
+            f"{CACHE_VERSION}:{content_hash}".encode("utf-8")
+        ).hexdigest()
+        self.size = package_size(self.folder)
+        log_package_size(self.name, self.size)
+        return self.folder
+
+
+class ApiRouterPackage:
+    """
+    Code of single api Lambda. Packages of handlers are synced into
+    `.build/api_router` next to generated modules, so only changed files
+    are copied, written or compiled.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        compile_bytecode: bool = False,
+        build_folder: Path = BUILD_FOLDER,
+    ) -> None:
+        self.name = name
+        self.compile_bytecode = compile_bytecode
+        self.folder = build_folder.joinpath("api_router")
+        self.manifests_folder = build_folder.joinpath("api_router_manifests")
+        self.packages: dict[str, tuple[Path, Optional[tuple], tuple]] = {}
+        self.modules: dict[str, str] = {}
+        self.asset_hash: Optional[str] = None
+        self.size: Optional[dict[str, int]] = None
+
+    def add_package(
+        self,
+        relative_path: str,
+        source: Path,
+        includes: Optional[Iterable[str]] = None,
+        excludes: Iterable[str] = DEFAULT_EXCLUDES,
+    ) -> None:
+        """
+        Sync `source` folder into `relative_path`. Patterns of handlers
+        from the same folder are merged, so each of them keeps its files.
+        """
+        includes = None if includes is None else tuple(includes)
+        excludes = tuple(excludes)
+        if relative_path in self.packages:
+            _, other_includes, other_excludes = self.packages[relative_path]
+            if includes is None or other_includes is None:
+                includes = None
+            else:
+                includes = (*other_includes, *includes)
+            excludes = tuple(e for e in other_excludes if e in excludes)
+        self.packages[relative_path] = (source, includes, excludes)
+
+    def add_module(self, relative_path: str, content: str) -> None:
+        """Add generated or copied module, it's written only when changed."""
+        self.modules[relative_path] = content
+
+    def prepare(self) -> Path:
+        compile_bytecode = self.compile_bytecode
+        if compile_bytecode and not can_compile_bytecode():
+            logging.warning(
+                "Bytecode of '%s' isn't compiled, Python %s is required",
+                self.name,
+                LAMBDA_PYTHON_VERSION,
+            )
+            compile_bytecode = False
+        digest = hashlib.sha256(f"{CACHE_VERSION}\n".encode("utf-8"))
+        manifests = set()
+        self.manifests_folder.mkdir(parents=True, exist_ok=True)
+        for relative_path, (source, includes, excludes) in sorted(
+            self.packages.items()
+        ):
+            manifest_path = self.manifests_folder.joinpath(
+                f"{relative_path.replace('/', '.')}.json"
+            )
+            manifests.add(manifest_path)
+            content_hash = sync_folder(
+                source,
+                self.folder.joinpath(relative_path),
+                excludes,
+                manifest_path,
+                includes,
+                compile_bytecode,
+            )
+            digest.update(f"{relative_path}/:{content_hash}\n".encode("utf-8"))
+
+        kept = set()
+        for relative_path, content in sorted(self.modules.items()):
+            path = self.folder.joinpath(relative_path)
+            data = content.encode("utf-8")
+            changed = not path.exists() or path.read_bytes() != data
+            if changed:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(data)
+            normalize(path)
+            kept.add(relative_path)
+            digest.update(f"{relative_path}:{file_hash(path)}\n".encode("utf-8"))
+            if compile_bytecode:
+                cache_path = Path(importlib.util.cache_from_source(str(path)))
+                if changed or not cache_path.exists():
+                    compile_file(path, relative_path)
+                kept.add(cache_path.relative_to(self.folder).as_posix())
+                digest.update(
+                    f"{relative_path}:{LAMBDA_PYTHON_VERSION}\n".encode("utf-8")
+                )
+
+        self._remove_outdated(kept, manifests)
+        self.asset_hash = digest.hexdigest()
+        self.size = package_size(self.folder)
+        log_package_size(self.name, self.size)
+        return self.folder
+
+    def _remove_outdated(self, kept: set[str], manifests: set[Path]) -> None:
+        """Remove files of removed handlers and modules."""
+        prefixes = tuple(f"{relative_path}/" for relative_path in self.packages)
+        for path in sorted(self.folder.rglob("*"), reverse=True):
+            relative_path = path.relative_to(self.folder).as_posix()
+            if path.is_dir():
+                if not any(path.iterdir()):
+                    path.rmdir()
+            elif relative_path not in kept and not relative_path.startswith(prefixes):
+                path.unlink()
+        for path in self.manifests_folder.glob("*.json"):
+            if path not in manifests:
+                path.unlink()
+        self.folder.mkdir(parents=True, exist_ok=True)
+        for path in (self.folder, *(p for p in self.folder.rglob("*") if p.is_dir())):
+            normalize(path)
+
+
+def log_package_size(name: str, size: dict[str, int]) -> None:
+    logging.info(
+        "Package of '%s': %s files, %.1f KiB, %.1f KiB compressed",
+        name,
+        size["files"],
+        size["size"] / 1024,
+        size["compressed_size"] / 1024,
+    )
+
+
+def write_size_report(
+    sizes: dict[str, dict[str, int]], build_folder: Path = BUILD_FOLDER
+) -> Path:
+    """Save sizes of function packages into `.build/package_sizes.json`."""
+    build_folder.mkdir(parents=True, exist_ok=True)
+    path = build_folder.joinpath("package_sizes.json")
+    path.write_text(json.dumps(sizes, indent=2, sort_keys=True), encoding="utf-8")
+    return path
@@ -0,0 +1,65 @@
+"""
+Local runtime for running and measuring handlers without AWS.
+
+Names are resolved lazily on first attribute access, so CLI could import
+lightweight modules of the package without loading the runtime.
+"""
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .events import make_event
+    from .modes import ServerMode
+    from .pump import BucketWatcher, EventPump, QueuePoller, run_pump
+    from .runtime import (
+        EnvironmentPool,
+        LambdaContext,
+        LocalResources,
+        LocalRunError,
+        create_context,
+        load_application,
+    )
+    from .server import LocalApi, create_server
+    from .stubs import LocalBucket, LocalQueue
+
+
+_LAZY_ATTRIBUTES = {
+    # events
+    "make_event": ".events",
+    # modes
+    "ServerMode": ".modes",
+    # pump
+    "BucketWatcher": ".pump",
+    "EventPump": ".pump",
+    "QueuePoller": ".pump",
+    "run_pump": ".pump",
+    # runtime
+    "EnvironmentPool": ".runtime",
+    "LambdaContext": ".runtime",
+    "LocalResources": ".runtime",
+    "LocalRunError": ".runtime",
+    "create_context": ".runtime",
+    "load_application": ".runtime",
+    # server
+    "LocalApi": ".server",
+    "create_server": ".server",
+    # stubs
+    "LocalBucket": ".stubs",
+    "LocalQueue": ".stubs",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # Cache value in module namespace, so next lookups skip `__getattr__`
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,245 @@
+"""
+Local benchmark of handlers with synthetic events.
+
+Handlers are invoked in the current process with local stand-ins of resources,
+so results show the cost of framework and handler code without network calls.
+"""
+import contextlib
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Iterable, Optional, Union
+
+from viburnum.application.base import Application, Handler
+from viburnum.application.codec import get_json_codec
+from viburnum.application.handlers import ApiHandler, S3Handler
+from viburnum.application.types import JsonData
+
+from .events import make_event, s3_object_key
+from .runtime import LocalResources, create_context, get_handler, load_application
+
+_IMPORT_SCRIPT = """
+import importlib, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(time.perf_counter() - start)
+"""
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Return `q` percentile of sorted `values` with linear interpolation."""
+    position = (len(values) - 1) * q / 100
+    low, high = math.floor(position), math.ceil(position)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def measure_import(module: str, project_dir: Path, runs: int = 3) -> Optional[float]:
+    """
+    Return median time in ms of importing `module` in a fresh interpreter,
+    or None if module can't be imported.
+    """
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            p for p in (str(project_dir), os.environ.get("PYTHONPATH")) if p
+        ),
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", _IMPORT_SCRIPT, module],
+            cwd=project_dir,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return None
+        timings.append(float(result.stdout.strip().splitlines()[-1]) * 1000)
+    return statistics.median(timings)
+
+
+def _count_failures(response: Any) -> int:
+    if not isinstance(response, dict):
+        return 0
+    if response.get("statusCode", 0) >= 500:
+        return 1
+    return len(response.get("batchItemFailures") or ())
+
+
+def _events_count(event: dict) -> int:
+    return len(event.get("Records") or ()) or 1
+
+
+class HandlerBenchmark:
+    """Measures latency, throughput and peak allocations of one handler."""
+
+    def __init__(
+        self,
+        handler: Handler,
+        app: Application,
+        resources: LocalResources,
+        *,
+        iterations: int = 100,
+        warmup: int = 5,
+        batch_size: int = 10,
+        body: Optional[JsonData] = None,
+        memory_iterations: int = 10,
+    ) -> None:
+        self.handler = handler
+        self.app = app
+        self.resources = resources
+        self.iterations = iterations
+        self.warmup = warmup
+        self.batch_size = batch_size
+        self.body = body
+        self.memory_iterations = memory_iterations
+        self.errors = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def _events(self, count: int) -> list[dict]:
+        # Events are generated in advance, so it doesn't affect timings,
+        # and every event has unique ids like real ones
+        return [
+            make_event(
+                self.handler, self.app, body=self.body, batch_size=self.batch_size
+            )
+            for _ in range(count)
+        ]
+
+    def _invoke(self, event: dict) -> None:
+        try:
+            response = self.handler(event, create_context(self.handler, self.app))
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{e.__class__.__name__}: {e}"
+            return
+        self.failures += _count_failures(response)
+
+    def _create_objects(self) -> None:
+        """Create objects, that are referenced by S3 events."""
+        bucket = self.resources.get_bucket(self.handler.bucket_name)
+        for index in range(self.batch_size):
+            body = self.body if self.body is not None else {"id": index}
+            bucket.put_object(
+                Key=s3_object_key(index), Body=get_json_codec().dumps(body)
+            )
+
+    def run(self) -> dict[str, Any]:
+        self.resources.install(self.handler)
+        if isinstance(self.handler, S3Handler):
+            self._create_objects()
+        for event in self._events(self.warmup):
+            self._invoke(event)
+        self.errors = self.failures = 0
+
+        events = self._events(self.iterations)
+        latencies = []
+        started = time.perf_counter()
+        for event in events:
+            start = time.perf_counter_ns()
+            self._invoke(event)
+            latencies.append((time.perf_counter_ns() - start) / 1e6)
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        records = sum(_events_count(e) for e in events)
+        return {
+            "handler": self.handler.name,
+            "type": self.handler.__class__.__name__,
+            "records_per_invocation": records / len(events),
+            "latency_ms": {
+                "min": latencies[0],
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p99": percentile(latencies, 99),
+                "max": latencies[-1],
+                "mean": statistics.fmean(latencies),
+            },
+            "throughput": {
+                "invocations_per_s": len(events) / elapsed,
+                "records_per_s": records / elapsed,
+            },
+            "peak_alloc_kib": self._measure_memory(),
+            "errors": self.errors,
+            "failed_records": self.failures,
+            "last_error": self.last_error,
+        }
+
+    def _measure_memory(self) -> float:
+        """Peak of memory allocated by single invocation."""
+        # Separate pass, because tracing slows down invocations
+        events = self._events(self.memory_iterations)
+        peak = 0
+        tracemalloc.start()
+        try:
+            for event in events:
+                tracemalloc.reset_peak()
+                baseline, _ = tracemalloc.get_traced_memory()
+                self._invoke(event)
+                _, invocation_peak = tracemalloc.get_traced_memory()
+                peak = max(peak, invocation_peak - baseline)
+        finally:
+            tracemalloc.stop()
+        return peak / 1024
+
+
+def run_benchmark(
+    app_path: Union[str, Path] = "app.py",
+    handler_names: Iterable[str] = (),
+    *,
+    iterations: int = 100,
+    warmup: int = 5,
+    batch_size: int = 10,
+    body: Optional[JsonData] = None,
+    import_runs: int = 3,
+) -> dict[str, Any]:
+    """
+    Benchmark handlers of application from `app_path`, all handlers
+    are benchmarked if `handler_names` isn't set. Return JSON serializable report.
+    """
+    if iterations < 1:
+        raise ValueError("At least one iteration is required")
+    app_path = Path(app_path).resolve()
+    app = load_application(app_path)
+    if handler_names:
+        handlers = [get_handler(app, name) for name in handler_names]
+    else:
+        handlers = list(app.handlers)
+    resources = LocalResources()
+
+    results = []
+    # Output of handlers shouldn't mix with report
+    with contextlib.redirect_stdout(sys.stderr):
+        for handler in handlers:
+            result = HandlerBenchmark(
+                handler,
+                app,
+                resources,
+                iterations=iterations,
+                warmup=warmup,
+                batch_size=1 if isinstance(handler, ApiHandler) else batch_size,
+                body=body,
+            ).run()
+            result["cold_import_ms"] = measure_import(
+                handler.func.__module__, app_path.parent, import_runs
+            )
+            results.append(result)
+
+    return {
+        "app": app.name,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "warmup": warmup,
+        "batch_size": batch_size,
+        "handlers": results,
+    }
@@ -0,0 +1,362 @@
+"""
+Synthetic Lambda events of API Gateway, SQS, S3 and EventBridge,
+shaped like events that AWS sends to handlers.
+"""
+import base64
+import hashlib
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+from urllib.parse import quote_plus, urlencode
+
+from viburnum.application.base import ApiType, Application, Handler
+from viburnum.application.codec import get_json_codec
+from viburnum.application.handlers import (
+    ApiHandler,
+    JobHandler,
+    S3EventType,
+    S3Handler,
+    SqsHandler,
+)
+from viburnum.application.types import JsonData
+
+REGION = "us-east-1"
+ACCOUNT_ID = "000000000000"
+
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Host": "localhost",
+    "User-Agent": "viburnum-local",
+    "X-Forwarded-For": "127.0.0.1",
+    "X-Forwarded-Port": "443",
+    "X-Forwarded-Proto": "https",
+}
+
+_PATH_PARAM = re.compile(r"{(\w+)\+?}")
+
+
+def _encode_body(body: Any) -> Optional[str]:
+    if body is None or isinstance(body, str):
+        return body
+    if isinstance(body, bytes):
+        return body.decode("utf-8")
+    return get_json_codec().dumps(body)
+
+
+def _iso_now(milliseconds: bool = True) -> str:
+    now = datetime.now(timezone.utc)
+    if milliseconds:
+        return now.strftime("%Y-%m-%dT%H:%M:%S.") + f"{now.microsecond // 1000:03d}Z"
+    return now.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# ____________________ API Gateway _____________________________
+
+
+def fill_path(route_path: str, value: str = "1") -> tuple[str, dict[str, str]]:
+    """Return request path for route with parameters set to `value`."""
+    path_params = {name: value for name in _PATH_PARAM.findall(route_path)}
+    return _PATH_PARAM.sub(value, route_path), path_params
+
+
+def api_event(
+    path: str,
+    method: str = "GET",
+    *,
+    resource: Optional[str] = None,
+    path_params: Optional[dict[str, str]] = None,
+    query_params: Optional[dict[str, str]] = None,
+    headers: Optional[dict[str, str]] = None,
+    body: Any = None,
+    is_base64_encoded: bool = False,
+    stage: str = "local",
+) -> dict:
+    """
+    API Gateway REST API proxy event (payload format 1.0).
+
+    :link: https://docs.aws.amazon.com/apigateway/latest/developerguide/set-up-lambda-proxy-integrations.html#api-gateway-simple-proxy-for-lambda-input-format
+    """
+    headers = {**DEFAULT_HEADERS, **(headers or {})}
+    body = _encode_body(body)
+    if body is not None and "Content-Type" not in headers:
+        headers["Content-Type"] = "application/json"
+    return {
+        "resource": resource or path,
+        "path": path,
+        "httpMethod": method,
+        "headers": headers,
+        "multiValueHeaders": {k: [v] for k, v in headers.items()},
+        "queryStringParameters": query_params or None,
+        "multiValueQueryStringParameters": (
+            {k: [v] for k, v in query_params.items()} if query_params else None
+        ),
+        "pathParameters": path_params or None,
+        "stageVariables": None,
+        "requestContext": {
+            "accountId": ACCOUNT_ID,
+            "apiId": "local",
+            "httpMethod": method,
+            "identity": {"sourceIp": "127.0.0.1", "userAgent": headers["User-Agent"]},
+            "path": f"/{stage}{path}",
+            "protocol": "HTTP/1.1",
+            "requestId": str(uuid.uuid4()),
+            "requestTimeEpoch": int(time.time() * 1000),
+            "resourcePath": resource or path,
+            "stage": stage,
+        },
+        "body": body,
+        "isBase64Encoded": is_base64_encoded,
+    }
+
+
+def api_v2_event(
+    path: str,
+    method: str = "GET",
+    *,
+    resource: Optional[str] = None,
+    path_params: Optional[dict[str, str]] = None,
+    query_params: Optional[dict[str, str]] = None,
+    headers: Optional[dict[str, str]] = None,
+    body: Any = None,
+    is_base64_encoded: bool = False,
+    stage: str = "$default",
+) -> dict:
+    """
+    API Gateway Http API proxy event (payload format 2.0).
+
+    :link: https://docs.aws.amazon.com/apigateway/latest/developerguide/http-api-develop-integrations-lambda.html
+    """
+    headers = {k.lower(): v for k, v in {**DEFAULT_HEADERS, **(headers or {})}.items()}
+    cookies = headers.pop("cookie", None)
+    body = _encode_body(body)
+    if body is not None:
+        headers.setdefault("content-type", "application/json")
+    event = {
+        "version": "2.0",
+        "routeKey": f"{method} {resource or path}",
+        "rawPath": path,
+        "rawQueryString": urlencode(query_params or {}),
+        "headers": headers,
+        "requestContext": {
+            "accountId": ACCOUNT_ID,
+            "apiId": "local",
+            "domainName": headers["host"],
+            "http": {
+                "method": method,
+                "path": path,
+                "protocol": "HTTP/1.1",
+                "sourceIp": "127.0.0.1",
+                "userAgent": headers["user-agent"],
+            },
+            "requestId": str(uuid.uuid4()),
+            "routeKey": f"{method} {resource or path}",
+            "stage": stage,
+            "timeEpoch": int(time.time() * 1000),
+        },
+        "isBase64Encoded": is_base64_encoded,
+    }
+    if cookies:
+        event["cookies"] = [c.strip() for c in cookies.split(";")]
+    if query_params:
+        event["queryStringParameters"] = dict(query_params)
+    if path_params:
+        event["pathParameters"] = dict(path_params)
+    if body is not None:
+        event["body"] = body
+    return event
+
+
+# ____________________ SQS _____________________________
+
+
+def sqs_record(
+    body: Any,
+    queue_name: str,
+    *,
+    message_id: Optional[str] = None,
+    receive_count: int = 1,
+    sent_timestamp: Optional[float] = None,
+    message_attributes: Optional[dict[str, dict]] = None,
+    message_group_id: Optional[str] = None,
+    message_deduplication_id: Optional[str] = None,
+) -> dict:
+    """
+    Record of SQS event.
+
+    :link: https://docs.aws.amazon.com/lambda/latest/dg/with-sqs.html
+    """
+    body = _encode_body(body) or ""
+    sent_timestamp = int((sent_timestamp or time.time()) * 1000)
+    attributes = {
+        "ApproximateReceiveCount": str(receive_count),
+        "SentTimestamp": str(sent_timestamp),
+        "SenderId": ACCOUNT_ID,
+        "ApproximateFirstReceiveTimestamp": str(int(time.time() * 1000)),
+    }
+    if message_group_id is not None:
+        attributes["MessageGroupId"] = message_group_id
+        attributes["SequenceNumber"] = str(sent_timestamp)
+        attributes["MessageDeduplicationId"] = message_deduplication_id or (
+            hashlib.sha256(body.encode("utf-8")).hexdigest()
+        )
+    message_id = message_id or str(uuid.uuid4())
+    return {
+        "messageId": message_id,
+        "receiptHandle": base64.b64encode(message_id.encode("utf-8")).decode("ascii"),
+        "body": body,
+        "attributes": attributes,
+        "messageAttributes": message_attributes or {},
+        "md5OfBody": hashlib.md5(body.encode("utf-8")).hexdigest(),
+        "eventSource": "aws:sqs",
+        "eventSourceARN": f"arn:aws:sqs:{REGION}:{ACCOUNT_ID}:{queue_name}",
+        "awsRegion": REGION,
+    }
+
+
+def sqs_event(bodies: Iterable[Any], queue_name: str) -> dict:
+    return {"Records": [sqs_record(body, queue_name) for body in bodies]}
+
+
+# ____________________ S3 _____________________________
+
+S3_EVENT_NAMES = {
+    S3EventType.OBJECT_CREATED: "ObjectCreated:Put",
+    S3EventType.OBJECT_CREATED_PUT: "ObjectCreated:Put",
+    S3EventType.OBJECT_CREATED_POST: "ObjectCreated:Post",
+    S3EventType.OBJECT_CREATED_COPY: "ObjectCreated:Copy",
+    S3EventType.OBJECT_CREATED_COMPLETE_MULTIPART_UPLOAD: (
+        "ObjectCreated:CompleteMultipartUpload"
+    ),
+    S3EventType.OBJECT_REMOVED: "ObjectRemoved:Delete",
+    S3EventType.OBJECT_REMOVED_DELETE: "ObjectRemoved:Delete",
+    S3EventType.OBJECT_REMOVED_DELETE_MARKER_CREATED: (
+        "ObjectRemoved:DeleteMarkerCreated"
+    ),
+}
+
+
+def s3_record(
+    bucket_name: str,
+    key: str,
+    *,
+    size: int = 0,
+    etag: Optional[str] = None,
+    event_name: str = "ObjectCreated:Put",
+) -> dict:
+    """
+    Record of S3 event notification.
+
+    :link: https://docs.aws.amazon.com/AmazonS3/latest/userguide/notification-content-structure.html
+    """
+    return {
+        "eventVersion": "2.1",
+        "eventSource": "aws:s3",
+        "awsRegion": REGION,
+        "eventTime": _iso_now(),
+        "eventName": event_name,
+        "userIdentity": {"principalId": ACCOUNT_ID},
+        "requestParameters": {"sourceIPAddress": "127.0.0.1"},
+        "responseElements": {"x-amz-request-id": uuid.uuid4().hex[:16].upper()},
+        "s3": {
+            "s3SchemaVersion": "1.0",
+            "configurationId": "local",
+            "bucket": {
+                "name": bucket_name,
+                "ownerIdentity": {"principalId": ACCOUNT_ID},
+                "arn": f"arn:aws:s3:::{bucket_name}",
+            },
+            "object": {
+                "key": quote_plus(key, safe="/"),
+                "size": size,
+                "eTag": etag or hashlib.md5(key.encode("utf-8")).hexdigest(),
+                "sequencer": f"{time.time_ns():016X}",
+            },
+        },
+    }
+
+
+def s3_object_key(index: int) -> str:
+    """Key of object in synthetic S3 events of handlers."""
+    return f"local/object-{index}.json"
+
+
+def s3_event(
+    bucket_name: str, keys: Iterable[str], event_name: str = "ObjectCreated:Put"
+) -> dict:
+    return {"Records": [s3_record(bucket_name, k, event_name=event_name) for k in keys]}
+
+
+# ____________________ EventBridge _____________________________
+
+
+def scheduled_event(rule_name: str) -> dict:
+    """
+    Event of EventBridge schedule rule.
+
+    :link: https://docs.aws.amazon.com/lambda/latest/dg/services-cloudwatchevents.html
+    """
+    return {
+        "version": "0",
+        "id": str(uuid.uuid4()),
+        "detail-type": "Scheduled Event",
+        "source": "aws.events",
+        "account": ACCOUNT_ID,
+        "time": _iso_now(milliseconds=False),
+        "region": REGION,
+        "resources": [f"arn:aws:events:{REGION}:{ACCOUNT_ID}:rule/{rule_name}"],
+        "detail": {},
+    }
+
+
+# ____________________ Handlers _____________________________
+
+
+def make_event(
+    handler: Handler,
+    app: Optional[Application] = None,
+    *,
+    body: Optional[JsonData] = None,
+    batch_size: int = 1,
+) -> dict:
+    """
+    Build event, that triggers `handler` in deployed application.
+    `body` is used as request body or message body, SQS and S3 events
+    have `batch_size` records.
+    """
+    if isinstance(handler, ApiHandler):
+        methods = [m for m in handler.methods if m.upper() != "ANY"]
+        method = methods[0].upper() if methods else "GET"
+        path, path_params = fill_path(handler.path)
+        if body is None and method in ("POST", "PUT", "PATCH"):
+            body = {"name": "test"}
+        if app is not None and app.api_type is ApiType.http:
+            build_event = api_v2_event
+        else:
+            build_event = api_event
+        return build_event(
+            path,
+            method,
+            resource=handler.path,
+            path_params=path_params,
+            body=body if method not in ("GET", "HEAD") else None,
+        )
+    if isinstance(handler, SqsHandler):
+        return sqs_event(
+            (body if body is not None else {"id": i} for i in range(batch_size)),
+            handler.queue_name,
+        )
+    if isinstance(handler, S3Handler):
+        event_name = S3_EVENT_NAMES.get(
+            next(iter(handler.events), None), "ObjectCreated:Put"
+        )
+        return s3_event(
+            handler.bucket_name,
+            (s3_object_key(i) for i in range(batch_size)),
+            event_name,
+        )
+    if isinstance(handler, JobHandler):
+        return scheduled_event(f"{handler.name}_rule")
+    raise ValueError(f"Events of {handler.__class__.__name__} aren't supported")
@@ -0,0 +1,9 @@
+"""
+Options of local runtime, that are shared with CLI without importing runtime itself.
+"""
+import enum
+
+
+class ServerMode(str, enum.Enum):
+    thread = "thread"
+    asyncio = "asyncio"
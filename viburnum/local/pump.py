@@ -0,0 +1,524 @@
+"""
+Local event sources, that deliver messages of local queues to SQS handlers
+and emit S3 records, when files land in local bucket directories.
+
+Batches, batching window, visibility timeout and `batchItemFailures`
+redelivery follow Lambda event source mapping, so batch sizes and
+concurrency of workers could be tuned without AWS.
+"""
+import contextlib
+import logging
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable, Optional, Union
+
+from viburnum.application.base import Application, Handler
+from viburnum.application.codec import get_json_codec
+from viburnum.application.handlers import S3Handler, SqsHandler
+from viburnum.application.types import JsonData
+
+from .bench import percentile
+from .events import s3_record
+from .runtime import (
+    EnvironmentPool,
+    LocalResources,
+    Throttled,
+    get_handler,
+    load_application,
+)
+from .stubs import LocalBucket, LocalQueue
+
+logger = logging.getLogger(__name__)
+
+# Long polling of pollers, so they notice stop
+POLL_WAIT = 0.2
+# Lambda starts with 5 concurrent pollers of SQS queue
+DEFAULT_CONCURRENCY = 5
+# Retries of failed asynchronous invocation
+ASYNC_RETRIES = 2
+
+
+def _latency_stats(latencies: list[float]) -> Optional[dict[str, float]]:
+    if not latencies:
+        return None
+    latencies = sorted(latencies)
+    return {
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "max": latencies[-1],
+        "mean": statistics.fmean(latencies),
+    }
+
+
+# ____________________ SQS _____________________________
+
+
+class QueuePoller:
+    """
+    Emulated SQS event source mapping of handler.
+
+    `concurrency` pollers receive up to `batch_size` messages, waiting up to
+    `batching_window` seconds to fill the batch, and invoke handler in execution
+    environments. Messages of successful invocation are deleted, messages of
+    failed invocation and reported `batchItemFailures` become visible again
+    after visibility timeout of queue.
+    """
+
+    def __init__(
+        self,
+        handler: SqsHandler,
+        queue: LocalQueue,
+        pool: EnvironmentPool,
+        *,
+        batch_size: Optional[int] = None,
+        batching_window: Optional[float] = None,
+        concurrency: Optional[int] = None,
+    ) -> None:
+        self.handler = handler
+        self.queue = queue
+        self.pool = pool
+        self.batch_size = batch_size or handler.batch_size or 10
+        self.batching_window = (
+            batching_window
+            if batching_window is not None
+            else handler.max_batching_window or 0
+        )
+        self.concurrency = concurrency or handler.max_concurrency or DEFAULT_CONCURRENCY
+        self.invocations = 0
+        self.records = 0
+        self.processed = 0
+        self.failed_records = 0
+        self.errors = 0
+        self.throttles = 0
+        self.latencies: list[float] = []
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        self.started = time.monotonic()
+        self._threads = [
+            threading.Thread(
+                target=self._poll, name=f"{self.handler.name}-poller-{i}", daemon=True
+            )
+            for i in range(self.concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def _poll(self) -> None:
+        while not self._stop.is_set():
+            records = self._receive()
+            if records:
+                self._process(records)
+
+    def _receive(self) -> list[dict]:
+        records = self.queue.receive(self.batch_size, POLL_WAIT)
+        if not records:
+            return records
+        deadline = time.monotonic() + self.batching_window
+        while len(records) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            records.extend(
+                self.queue.receive(
+                    self.batch_size - len(records), min(remaining, POLL_WAIT)
+                )
+            )
+        return records
+
+    def _failed_ids(self, response: Any, records: list[dict]) -> set[str]:
+        if not self.handler.report_batch_item_failures or not isinstance(
+            response, dict
+        ):
+            return set()
+        ids = {r["messageId"] for r in records}
+        failed_ids = {
+            f.get("itemIdentifier") for f in response.get("batchItemFailures") or ()
+        }
+        if not failed_ids <= ids:
+            # Lambda treats unknown identifiers as failure of whole batch
+            return ids
+        return failed_ids
+
+    def _process(self, records: list[dict]) -> None:
+        with self._lock:
+            self.invocations += 1
+            self.records += len(records)
+        try:
+            response, _, _ = self.pool.invoke({"Records": records})
+        except Throttled:
+            # Messages return to queue after visibility timeout
+            with self._lock:
+                self.throttles += 1
+            return
+        except Exception:
+            logger.exception("Handler '%s' failed", self.handler.name)
+            with self._lock:
+                self.errors += 1
+            return
+
+        failed_ids = self._failed_ids(response, records)
+        now = time.time() * 1000
+        latencies = [
+            now - int(r["attributes"]["SentTimestamp"])
+            for r in records
+            if r["messageId"] not in failed_ids
+            and self.queue.delete_message(r["receiptHandle"])
+        ]
+        with self._lock:
+            self.failed_records += len(failed_ids)
+            self.processed += len(latencies)
+            self.latencies.extend(latencies)
+            if latencies:
+                self.finished = time.monotonic()
+
+    def stats(self) -> dict[str, Any]:
+        elapsed = (self.finished or time.monotonic()) - (self.started or 0)
+        return {
+            "handler": self.handler.name,
+            "queue": self.queue.name,
+            "batch_size": self.batch_size,
+            "batching_window": self.batching_window,
+            "concurrency": self.concurrency,
+            "invocations": self.invocations,
+            "mean_batch_size": self.records / self.invocations
+            if self.invocations
+            else 0,
+            "processed": self.processed,
+            "messages_per_s": self.processed / elapsed if elapsed > 0 else 0,
+            "failed_records": self.failed_records,
+            "errors": self.errors,
+            "throttles": self.throttles,
+            "redeliveries": self.queue.redelivered,
+            "dead_letters": len(self.queue.dead_letters),
+            "latency_ms": _latency_stats(self.latencies),
+            "environments": self.pool.stats(),
+        }
+
+
+# ____________________ S3 _____________________________
+
+
+class BucketWatcher:
+    """
+    Polls directory of local bucket every `interval` seconds and invokes
+    handlers with S3 record of every created, modified or removed object.
+
+    Object is reported once it's unchanged for one poll, so partially
+    written files aren't delivered. Like asynchronous invocations, failed
+    invocation is retried twice.
+    """
+
+    def __init__(
+        self,
+        bucket: LocalBucket,
+        handlers: list[S3Handler],
+        pools: dict[str, EnvironmentPool],
+        *,
+        interval: float = 0.5,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ) -> None:
+        self.bucket = bucket
+        self.handlers = handlers
+        self.pools = pools
+        self.interval = interval
+        self.concurrency = concurrency
+        self.events = 0
+        self.invocations = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttles = 0
+        self.latencies: list[float] = []
+        self._snapshot: dict[str, tuple[int, int]] = {}
+        self._pending: dict[str, tuple[int, int]] = {}
+        self._running = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        files = {}
+        for path in self.bucket.root.rglob("*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.is_file():
+                key = path.relative_to(self.bucket.root).as_posix()
+                files[key] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def start(self) -> None:
+        # Objects, that exist before start, aren't reported
+        self._snapshot = self._scan()
+        self._executor = ThreadPoolExecutor(
+            self.concurrency, thread_name_prefix=f"{self.bucket.name}-watcher"
+        )
+        self._thread = threading.Thread(
+            target=self._watch, name=f"{self.bucket.name}-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def is_idle(self) -> bool:
+        with self._lock:
+            return not self._pending and not self._running
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def poll(self) -> None:
+        """Compare directory with previous scan and emit stable changes."""
+        files = self._scan()
+        changed = {
+            key: signature
+            for key, signature in files.items()
+            if self._snapshot.get(key) != signature
+        }
+        for key, signature in changed.items():
+            if self._pending.get(key) == signature:
+                del self._pending[key]
+                self._snapshot[key] = signature
+                self._emit(key, "ObjectCreated:Put", signature)
+            else:
+                self._pending[key] = signature
+        for key in set(self._snapshot) - set(files):
+            del self._snapshot[key]
+            self._pending.pop(key, None)
+            self._emit(key, "ObjectRemoved:Delete", None)
+
+    @staticmethod
+    def _handles(handler: S3Handler, event_name: str) -> bool:
+        # "ObjectCreated:Put" is handled by OBJECT_CREATED and OBJECT_CREATED_PUT
+        prefix = event_name.split(":")[0]
+        return any(
+            e.value.replace("_", "").startswith(prefix.upper()) for e in handler.events
+        )
+
+    def _emit(
+        self, key: str, event_name: str, signature: Optional[tuple[int, int]]
+    ) -> None:
+        size = signature[1] if signature else 0
+        # Latency is counted from file modification, or from noticing removal
+        emitted = signature[0] / 1e9 if signature else time.time()
+        with self._lock:
+            self.events += 1
+        for handler in self.handlers:
+            if self._handles(handler, event_name):
+                event = {
+                    "Records": [
+                        s3_record(
+                            self.bucket.name, key, size=size, event_name=event_name
+                        )
+                    ]
+                }
+                with self._lock:
+                    self._running += 1
+                self._executor.submit(self._invoke, handler, event, emitted)
+
+    def _invoke(self, handler: S3Handler, event: dict, emitted: float) -> None:
+        try:
+            for attempt in range(ASYNC_RETRIES + 1):
+                with self._lock:
+                    self.invocations += 1
+                    if attempt:
+                        self.retries += 1
+                try:
+                    self.pools[handler.name].invoke(event)
+                except Throttled:
+                    with self._lock:
+                        self.throttles += 1
+                    time.sleep(self.interval)
+                except Exception:
+                    logger.exception("Handler '%s' failed", handler.name)
+                    with self._lock:
+                        self.errors += 1
+                else:
+                    with self._lock:
+                        self.latencies.append((time.time() - emitted) * 1000)
+                    return
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "bucket": self.bucket.name,
+            "directory": str(self.bucket.root),
+            "handlers": [h.name for h in self.handlers],
+            "events": self.events,
+            "invocations": self.invocations,
+            "errors": self.errors,
+            "retries": self.retries,
+            "throttles": self.throttles,
+            "latency_ms": _latency_stats(self.latencies),
+            "environments": {h.name: self.pools[h.name].stats() for h in self.handlers},
+        }
+
+
+# ____________________ Pump _____________________________
+
+
+class EventPump:
+    """
+    Pollers of queues of SQS handlers and watchers of buckets of S3 handlers.
+    Options override event source settings of handlers.
+    """
+
+    def __init__(
+        self,
+        app: Application,
+        resources: Optional[LocalResources] = None,
+        handlers: Optional[Iterable[Handler]] = None,
+        *,
+        batch_size: Optional[int] = None,
+        batching_window: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        visibility_timeout: Optional[float] = None,
+        interval: float = 0.5,
+        idle_timeout: float = 600,
+    ) -> None:
+        self.app = app
+        self.resources = resources or LocalResources(app=app)
+        handlers = list(app.handlers if handlers is None else handlers)
+        self.pollers: list[QueuePoller] = []
+        self.watchers: list[BucketWatcher] = []
+
+        s3_handlers: dict[str, list[S3Handler]] = {}
+        pools: dict[str, EnvironmentPool] = {}
+        for handler in handlers:
+            if not isinstance(handler, (SqsHandler, S3Handler)):
+                continue
+            self.resources.install(handler)
+            pools[handler.name] = EnvironmentPool(handler, app, idle_timeout)
+            if isinstance(handler, S3Handler):
+                s3_handlers.setdefault(handler.bucket_name, []).append(handler)
+                continue
+            queue = self.resources.get_queue(handler.queue_name)
+            if visibility_timeout is not None:
+                queue.visibility_timeout = visibility_timeout
+            self.pollers.append(
+                QueuePoller(
+                    handler,
+                    queue,
+                    pools[handler.name],
+                    batch_size=batch_size,
+                    batching_window=batching_window,
+                    concurrency=concurrency,
+                )
+            )
+        for bucket_name, bucket_handlers in s3_handlers.items():
+            self.watchers.append(
+                BucketWatcher(
+                    self.resources.get_bucket(bucket_name),
+                    bucket_handlers,
+                    pools,
+                    interval=interval,
+                    concurrency=concurrency or DEFAULT_CONCURRENCY,
+                )
+            )
+
+    def start(self) -> None:
+        for source in (*self.watchers, *self.pollers):
+            source.start()
+
+    def stop(self) -> None:
+        for source in (*self.pollers, *self.watchers):
+            source.stop()
+
+    def is_drained(self) -> bool:
+        """All queues are empty and no bucket events are pending."""
+        return all(q.is_empty() for q in self.resources.queues.values()) and all(
+            w.is_idle() for w in self.watchers
+        )
+
+    def wait(self, timeout: Optional[float] = None, interval: float = 0.1) -> bool:
+        """Wait until pump is drained, return False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # Handler may send a message between checks of two queues,
+        # so pump must be drained on two checks in a row
+        drained = 0
+        while drained < 2:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+            drained = drained + 1 if self.is_drained() else 0
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queues": [p.stats() for p in self.pollers],
+            "buckets": [w.stats() for w in self.watchers],
+        }
+
+
+def run_pump(
+    app_path: Union[str, Path] = "app.py",
+    handler_names: Iterable[str] = (),
+    *,
+    messages: int = 0,
+    body: Optional[JsonData] = None,
+    root: Union[str, Path, None] = None,
+    duration: Optional[float] = None,
+    **options,
+) -> dict[str, Any]:
+    """
+    Send `messages` to queue of each SQS handler and deliver them until queues
+    are drained, or for `duration` seconds. With S3 handlers and without
+    `duration` pump runs until interrupted. Return JSON serializable report.
+    """
+    app = load_application(Path(app_path).resolve())
+    handlers = [get_handler(app, name) for name in handler_names] or None
+    pump = EventPump(app, LocalResources(root, app), handlers, **options)
+    for poller in pump.pollers:
+        for index in range(messages):
+            poller.queue.send_message(
+                get_json_codec().dumps(body if body is not None else {"id": index})
+            )
+
+    # Output of handlers shouldn't mix with report
+    with contextlib.redirect_stdout(sys.stderr):
+        for watcher in pump.watchers:
+            handlers = ", ".join(h.name for h in watcher.handlers)
+            print(f"Files put into '{watcher.bucket.root}' trigger {handlers}")
+        started = time.monotonic()
+        pump.start()
+        try:
+            if duration is not None:
+                time.sleep(duration)
+            elif pump.watchers:
+                threading.Event().wait()
+            else:
+                pump.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pump.stop()
+    return {
+        "app": app.name,
+        "messages": messages,
+        "elapsed_s": time.monotonic() - started,
+        **pump.stats(),
+    }
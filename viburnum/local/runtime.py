@@ -0,0 +1,251 @@
+"""
+Loading of application for local runs and emulation of Lambda runtime objects.
+"""
+import importlib.util
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from viburnum.application.base import (
+    Application,
+    ApplicationLoaded,
+    Handler,
+    LambdaConfig,
+    local_load,
+)
+from viburnum.application.connectors import (
+    BucketClient,
+    QueueClient,
+    S3Connector,
+    SqsConnector,
+)
+from viburnum.application.resources import Sqs
+
+from .events import ACCOUNT_ID, REGION
+from .stubs import LocalBucket, LocalQueue
+
+
+class LocalRunError(Exception):
+    pass
+
+
+def load_application(app_path: Union[str, Path] = "app.py") -> Application:
+    """
+    Import `app.py` and return its :class:`Application`.
+    Import stops when `AppStack` is created, so stack isn't built or synthesized.
+    """
+    app_path = Path(app_path).resolve()
+    if not app_path.exists():
+        raise LocalRunError(f"File '{app_path}' not found")
+    # Handlers are imported from packages relative to `app.py`
+    project_dir = str(app_path.parent)
+    if project_dir not in sys.path:
+        sys.path.insert(0, project_dir)
+
+    spec = importlib.util.spec_from_file_location("viburnum_local_app", app_path)
+    module = importlib.util.module_from_spec(spec)
+    with local_load():
+        try:
+            spec.loader.exec_module(module)
+        except ApplicationLoaded as e:
+            return e.app
+    for value in vars(module).values():
+        if isinstance(value, Application):
+            return value
+    raise LocalRunError(f"Application not found in '{app_path}'")
+
+
+def get_handler(app: Application, name: str) -> Handler:
+    for handler in app.handlers:
+        if name in (handler.name, handler.func.__name__):
+            return handler
+    raise LocalRunError(f"Handler '{name}' not found")
+
+
+class LambdaContext:
+    """
+    Stand-in of Lambda context object.
+
+    :link: https://docs.aws.amazon.com/lambda/latest/dg/python-context.html
+    """
+
+    def __init__(
+        self,
+        function_name: str,
+        memory_limit_in_mb: int = 128,
+        timeout: float = 3,
+    ) -> None:
+        self.function_name = function_name
+        self.function_version = "$LATEST"
+        self.invoked_function_arn = (
+            f"arn:aws:lambda:{REGION}:{ACCOUNT_ID}:function:{function_name}"
+        )
+        self.memory_limit_in_mb = memory_limit_in_mb
+        self.aws_request_id = str(uuid.uuid4())
+        self.log_group_name = f"/aws/lambda/{function_name}"
+        self.log_stream_name = f"local/[$LATEST]{uuid.uuid4().hex}"
+        self._deadline = time.monotonic() + timeout
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def create_context(
+    handler: Handler, app: Optional[Application] = None
+) -> LambdaContext:
+    """Create context with memory and timeout from handler Lambda config."""
+    defaults = app.lambda_config if app is not None else LambdaConfig()
+    config = defaults.merge(handler.lambda_config)
+    return LambdaContext(handler.name, config.memory_size or 128, config.timeout or 3)
+
+
+class LocalResources:
+    """
+    Local stand-ins of application resources, shared by all handlers,
+    so message sent by one handler is visible for another.
+    Objects of buckets are stored in `root` directory, queues take
+    visibility timeout and max receive count of `app` resources.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path, None] = None,
+        app: Optional[Application] = None,
+    ) -> None:
+        self.root = Path(root or tempfile.mkdtemp(prefix="viburnum-"))
+        self.app = app
+        self.queues: dict[str, LocalQueue] = {}
+        self.buckets: dict[str, LocalBucket] = {}
+
+    def get_queue(self, name: str) -> LocalQueue:
+        if name not in self.queues:
+            resource = self.app.resources.get(name) if self.app is not None else None
+            if isinstance(resource, Sqs):
+                self.queues[name] = LocalQueue(
+                    name, resource.visibility_timeout, resource.max_receive_count
+                )
+            else:
+                self.queues[name] = LocalQueue(name)
+        return self.queues[name]
+
+    def get_bucket(self, name: str) -> LocalBucket:
+        if name not in self.buckets:
+            self.buckets[name] = LocalBucket(name, self.root.joinpath(name))
+        return self.buckets[name]
+
+    def create_client(self, connector) -> Any:
+        if isinstance(connector, SqsConnector):
+            return QueueClient(self.get_queue(connector.resource_name))
+        if isinstance(connector, S3Connector):
+            return BucketClient(self.get_bucket(connector.resource_name))
+        raise LocalRunError(
+            f"{connector.__class__.__name__} isn't supported by local runtime"
+        )
+
+    def install(self, handler: Handler) -> None:
+        """Replace resource clients of handler with local stand-ins."""
+        handler.set_resource_clients(
+            {c.resource_name: self.create_client(c) for c in handler.resources}
+        )
+
+
+# ____________________ Execution environments _____________________________
+
+
+class Throttled(LocalRunError):
+    pass
+
+
+class ExecutionEnvironment:
+    """Emulated Lambda execution environment, that serves one invocation at a time."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.invocations = 0
+        self.last_used = time.monotonic()
+
+    def __repr__(self) -> str:
+        return f"ExecutionEnvironment({self.name!r}, invocations={self.invocations})"
+
+
+class EnvironmentPool:
+    """
+    Warm execution environments of handler.
+
+    Invocation takes an idle environment or starts a new one (cold start)
+    if all of them are busy, environments idle longer than `idle_timeout`
+    seconds are dropped. Number of environments is limited by reserved
+    concurrency of handler. Environments share the process, so module level
+    state of handler is shared too, only concurrency and reuse are emulated.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        app: Optional[Application] = None,
+        idle_timeout: float = 600,
+    ) -> None:
+        self.handler = handler
+        self.app = app
+        self.idle_timeout = idle_timeout
+        defaults = app.lambda_config if app is not None else LambdaConfig()
+        self.max_environments = defaults.merge(
+            handler.lambda_config
+        ).reserved_concurrency
+        self.invocations = 0
+        self.cold_starts = 0
+        self.throttles = 0
+        self._idle: list[ExecutionEnvironment] = []
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> tuple[ExecutionEnvironment, bool]:
+        """Return environment and True if it's a cold start."""
+        now = time.monotonic()
+        with self._lock:
+            self._idle = [
+                e for e in self._idle if now - e.last_used < self.idle_timeout
+            ]
+            if self._idle:
+                self.invocations += 1
+                self._busy += 1
+                # The most recently used environment is reused, like Lambda does
+                return self._idle.pop(), False
+            if (
+                self.max_environments is not None
+                and self._busy >= self.max_environments
+            ):
+                self.throttles += 1
+                raise Throttled(f"Handler '{self.handler.name}' is throttled")
+            self.invocations += 1
+            self._busy += 1
+            self.cold_starts += 1
+            return ExecutionEnvironment(f"{self.handler.name}-{self.cold_starts}"), True
+
+    def release(self, environment: ExecutionEnvironment) -> None:
+        environment.invocations += 1
+        environment.last_used = time.monotonic()
+        with self._lock:
+            self._busy -= 1
+            self._idle.append(environment)
+
+    def invoke(self, event: dict) -> tuple[Any, ExecutionEnvironment, bool]:
+        """Invoke handler in environment, return response, environment and cold start."""
+        environment, cold_start = self.acquire()
+        try:
+            response = self.handler(event, create_context(self.handler, self.app))
+        finally:
+            self.release(environment)
+        return response, environment, cold_start
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "invocations": self.invocations,
+            "cold_starts": self.cold_starts,
+            "throttles": self.throttles,
+            "environments": len(self._idle) + self._busy,
+        }
@@ -0,0 +1,363 @@
+"""
+Local HTTP emulator of API Gateway, that serves api handlers of application.
+
+Requests are translated into proxy events of the application API type,
+dispatched with :class:`ApiRouter` and invoked in emulated execution
+environments, so load generators could be pointed at handlers before deploy.
+"""
+import asyncio
+import base64
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional, Union
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from viburnum.application.base import ApiType, Application
+from viburnum.application.codec import get_json_codec
+from viburnum.application.handlers import ApiHandler, Response
+from viburnum.application.router import ApiRouter
+
+from .events import api_event, api_v2_event
+from .modes import ServerMode
+from .runtime import EnvironmentPool, LocalResources, Throttled
+
+logger = logging.getLogger(__name__)
+
+HeaderList = list[tuple[str, str]]
+
+
+# ____________________ Events _____________________________
+
+
+def _is_binary(content_type: Optional[str], binary_media_types: list[str]) -> bool:
+    if not content_type:
+        return False
+    content_type = content_type.split(";")[0].strip().lower()
+    for media_type in binary_media_types:
+        if media_type == "*/*" or media_type == content_type:
+            return True
+        if media_type.endswith("/*") and content_type.startswith(media_type[:-1]):
+            return True
+    return False
+
+
+def build_event(
+    method: str,
+    target: str,
+    headers: HeaderList,
+    body: bytes,
+    api_type: ApiType = ApiType.rest,
+    binary_media_types: Optional[list[str]] = None,
+) -> dict:
+    """Translate HTTP request into API Gateway proxy event."""
+    url = urlsplit(target)
+    path = unquote(url.path) or "/"
+    multi_headers: dict[str, list[str]] = {}
+    for name, value in headers:
+        multi_headers.setdefault(name, []).append(value)
+    multi_query: dict[str, list[str]] = {}
+    for name, value in parse_qsl(url.query, keep_blank_values=True):
+        multi_query.setdefault(name, []).append(value)
+    content_type = next(
+        (v[-1] for k, v in multi_headers.items() if k.lower() == "content-type"), None
+    )
+
+    text_body: Optional[str] = None
+    is_base64_encoded = False
+    if body:
+        is_base64_encoded = _is_binary(content_type, binary_media_types or [])
+        if not is_base64_encoded:
+            try:
+                text_body = body.decode("utf-8")
+            except UnicodeDecodeError:
+                is_base64_encoded = True
+        if is_base64_encoded:
+            text_body = base64.b64encode(body).decode("ascii")
+
+    if api_type is ApiType.http:
+        event = api_v2_event(
+            path, method, body=text_body, is_base64_encoded=is_base64_encoded
+        )
+        event["rawQueryString"] = url.query
+        event["headers"] = {k.lower(): ",".join(v) for k, v in multi_headers.items()}
+        cookies = event["headers"].pop("cookie", None)
+        if cookies:
+            event["cookies"] = [c.strip() for c in cookies.split(";")]
+        if multi_query:
+            event["queryStringParameters"] = {
+                k: ",".join(v) for k, v in multi_query.items()
+            }
+        return event
+
+    event = api_event(path, method, body=text_body, is_base64_encoded=is_base64_encoded)
+    event["headers"] = {k: v[-1] for k, v in multi_headers.items()}
+    event["multiValueHeaders"] = multi_headers
+    event["queryStringParameters"] = {k: v[-1] for k, v in multi_query.items()} or None
+    event["multiValueQueryStringParameters"] = multi_query or None
+    return event
+
+
+def parse_response(response: Any) -> tuple[int, HeaderList, bytes]:
+    """Translate Lambda proxy response into HTTP status, headers and body."""
+    if not isinstance(response, dict) or "statusCode" not in response:
+        # Http API treats such response as JSON body
+        data = get_json_codec().dumps(response).encode("utf-8")
+        return 200, [("Content-Type", "application/json")], data
+
+    multi_headers = response.get("multiValueHeaders") or {}
+    multi_names = {k.lower() for k in multi_headers}
+    headers = [
+        (k, str(v))
+        for k, v in (response.get("headers") or {}).items()
+        if k.lower() not in multi_names
+    ]
+    headers.extend((k, str(v)) for k, values in multi_headers.items() for v in values)
+    headers.extend(("Set-Cookie", c) for c in response.get("cookies") or ())
+    headers = [h for h in headers if h[0].lower() != "content-length"]
+
+    body = response.get("body") or ""
+    if response.get("isBase64Encoded"):
+        data = base64.b64decode(body)
+    else:
+        data = body.encode("utf-8") if isinstance(body, str) else bytes(body)
+    return int(response["statusCode"]), headers, data
+
+
+# ____________________ Dispatcher _____________________________
+
+
+class LocalApi:
+    """Dispatches HTTP requests to api handlers through execution environments."""
+
+    def __init__(
+        self,
+        app: Application,
+        resources: Optional[LocalResources] = None,
+        idle_timeout: float = 600,
+    ) -> None:
+        self.app = app
+        self.router = ApiRouter(h for h in app.handlers if isinstance(h, ApiHandler))
+        self.resources = resources or LocalResources()
+        self.pools: dict[str, EnvironmentPool] = {}
+        for handler in self.router.handlers:
+            self.resources.install(handler)
+            self.pools[handler.name] = EnvironmentPool(handler, app, idle_timeout)
+        self.binary_media_types = list(app.binary_media_types or ())
+
+    def dispatch(
+        self, method: str, target: str, headers: HeaderList, body: bytes
+    ) -> tuple[int, HeaderList, bytes]:
+        event = build_event(
+            method,
+            target,
+            headers,
+            body,
+            self.app.api_type,
+            self.binary_media_types,
+        )
+        match = self.router.match(method, unquote(urlsplit(target).path) or "/")
+        response = self.router.error_response(match)
+        extra_headers: HeaderList = []
+        if response is None:
+            pool = self.pools[match.handler.name]
+            try:
+                response, environment, cold_start = pool.invoke(
+                    self.router.route_event(event, match)
+                )
+                extra_headers.append(("X-Viburnum-Environment", environment.name))
+                if cold_start:
+                    extra_headers.append(("X-Viburnum-Cold-Start", "1"))
+            except Throttled:
+                response = Response(429, {"message": "Too Many Requests"}).as_response()
+            except Exception:
+                logger.exception("Handler '%s' failed", match.handler.name)
+                response = Response(
+                    502, {"message": "Internal server error"}
+                ).as_response()
+        status, response_headers, data = parse_response(response)
+        return status, response_headers + extra_headers, data
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+
+# ____________________ Servers _____________________________
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "viburnum-local"
+    # Idle keep-alive connections are closed after timeout
+    timeout = 60
+    server: "ThreadPoolHTTPServer"
+
+    def _handle(self) -> None:
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            self.send_error(HTTPStatus.LENGTH_REQUIRED)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status, headers, data = self.server.executor.submit(
+            self.server.api.dispatch,
+            self.command,
+            self.path,
+            list(self.headers.items()),
+            body,
+        ).result()
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = _handle
+
+    def log_message(self, format: str, *args) -> None:
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+class ThreadPoolHTTPServer(ThreadingHTTPServer):
+    """
+    HTTP server, that reads connections in daemon threads and runs
+    at most `workers` handlers at once in a thread pool,
+    so keep-alive connections don't occupy workers while they are idle.
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], api: LocalApi, workers: int) -> None:
+        super().__init__(address, _RequestHandler)
+        self.api = api
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="viburnum")
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.executor.shutdown(wait=False)
+
+
+class AsyncioHTTPServer:
+    """
+    HTTP server on asyncio streams, it keeps any number of connections open
+    and runs at most `workers` handlers at once in a thread pool.
+    """
+
+    def __init__(self, address: tuple[str, int], api: LocalApi, workers: int) -> None:
+        self.host, self.port = address
+        self.api = api
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="viburnum")
+
+    def serve_forever(self) -> None:
+        asyncio.run(self._serve())
+
+    def server_close(self) -> None:
+        self.executor.shutdown(wait=False)
+
+    async def _serve(self) -> None:
+        server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        peer = writer.get_extra_info("peername")
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    self._write(writer, 400, [], b"", False)
+                    break
+                headers = await self._read_headers(reader)
+                lookup = {name.lower(): value for name, value in headers}
+                if "chunked" in lookup.get("transfer-encoding", "").lower():
+                    self._write(writer, 411, [], b"", False)
+                    break
+                body = await reader.readexactly(int(lookup.get("content-length") or 0))
+
+                status, response_headers, data = await loop.run_in_executor(
+                    self.executor, self.api.dispatch, method, target, headers, body
+                )
+                keep_alive = (
+                    version == "HTTP/1.1"
+                    and lookup.get("connection", "").lower() != "close"
+                )
+                self._write(
+                    writer,
+                    status,
+                    response_headers,
+                    data,
+                    keep_alive,
+                    send_body=method != "HEAD",
+                )
+                await writer.drain()
+                logger.info(
+                    '%s - "%s %s %s" %s %s',
+                    peer[0] if peer else "-",
+                    method,
+                    target,
+                    version,
+                    status,
+                    len(data),
+                )
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> HeaderList:
+        headers = []
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers.append((name.strip(), value.strip()))
+
+    @staticmethod
+    def _write(
+        writer: asyncio.StreamWriter,
+        status: int,
+        headers: HeaderList,
+        data: bytes,
+        keep_alive: bool,
+        send_body: bool = True,
+    ) -> None:
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ""
+        lines = [f"HTTP/1.1 {status} {reason}"]
+        lines.extend(f"{name}: {value}" for name, value in headers)
+        lines.append(f"Content-Length: {len(data)}")
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if send_body:
+            writer.write(data)
+
+
+def create_server(
+    api: LocalApi,
+    host: str = "127.0.0.1",
+    port: int = 3000,
+    mode: Union[ServerMode, str] = ServerMode.thread,
+    workers: int = 10,
+):
+    """Create server, that is started with `serve_forever`."""
+    if ServerMode(mode) is ServerMode.asyncio:
+        return AsyncioHTTPServer((host, port), api, workers)
+    return ThreadPoolHTTPServer((host, port), api, workers)
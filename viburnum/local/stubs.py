@@ -0,0 +1,307 @@
+"""
+Local stand-ins of AWS resources, that are wrapped into the same
+`QueueClient` and `BucketClient` as real boto3 resources.
+"""
+import hashlib
+import heapq
+import io
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Iterator, Optional, Union
+
+from .events import ACCOUNT_ID, REGION, sqs_record
+
+# ____________________ SQS _____________________________
+
+
+class LocalQueue:
+    """
+    In-memory stand-in of boto3 `sqs.Queue`.
+
+    Received messages are invisible for `visibility_timeout` seconds and become
+    visible again unless they are deleted. With `max_receive_count` messages,
+    that were received that many times, are moved to `dead_letters`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        visibility_timeout: float = 30,
+        max_receive_count: Optional[int] = None,
+    ) -> None:
+        self.name = name
+        self.url = f"http://localhost/{ACCOUNT_ID}/{name}"
+        self.attributes = {"QueueArn": f"arn:aws:sqs:{REGION}:{ACCOUNT_ID}:{name}"}
+        self.visibility_timeout = visibility_timeout
+        self.max_receive_count = max_receive_count
+        # Records in the shape they are received by Lambda
+        self.messages: deque[dict] = deque()
+        self.dead_letters: list[dict] = []
+        self.sent = 0
+        self.received = 0
+        self.deleted = 0
+        self.redelivered = 0
+        self._delayed: list[tuple[float, int, dict]] = []
+        # Receipt handle -> (time when message is visible again, record)
+        self._in_flight: dict[str, tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+
+    def send_message(
+        self,
+        MessageBody: str,
+        DelaySeconds: int = 0,
+        MessageAttributes: Optional[dict[str, dict]] = None,
+        MessageGroupId: Optional[str] = None,
+        MessageDeduplicationId: Optional[str] = None,
+        **kwargs,
+    ) -> dict:
+        record = sqs_record(
+            MessageBody,
+            self.name,
+            message_attributes=MessageAttributes,
+            message_group_id=MessageGroupId,
+            message_deduplication_id=MessageDeduplicationId,
+        )
+        self._put(record, DelaySeconds)
+        return {
+            "MessageId": record["messageId"],
+            "MD5OfMessageBody": record["md5OfBody"],
+        }
+
+    def send_messages(self, Entries: list[dict]) -> dict:
+        successful = []
+        for entry in Entries:
+            entry = dict(entry)
+            id_ = entry.pop("Id")
+            response = self.send_message(**entry)
+            successful.append({"Id": id_, **response})
+        return {"Successful": successful, "Failed": []}
+
+    def _put(self, record: dict, delay_seconds: int = 0) -> None:
+        with self._lock:
+            if delay_seconds:
+                heapq.heappush(
+                    self._delayed,
+                    (time.monotonic() + delay_seconds, self.sent, record),
+                )
+            else:
+                self.messages.append(record)
+                self._available.notify()
+            self.sent += 1
+
+    def _refresh(self, now: float) -> None:
+        """Make delayed and expired in-flight messages visible."""
+        while self._delayed and self._delayed[0][0] <= now:
+            self.messages.append(heapq.heappop(self._delayed)[2])
+        expired = [h for h, (t, _) in self._in_flight.items() if t <= now]
+        for receipt_handle in expired:
+            self.messages.append(self._in_flight.pop(receipt_handle)[1])
+            self.redelivered += 1
+
+    def _next_change(self) -> Optional[float]:
+        times = [t for t, _ in self._in_flight.values()]
+        if self._delayed:
+            times.append(self._delayed[0][0])
+        return min(times, default=None)
+
+    def receive(self, max_messages: int = 10, wait_time: float = 0) -> list[dict]:
+        """
+        Receive up to `max_messages` records, waiting up to `wait_time` seconds
+        for the first one. Records get new receipt handles on every receive.
+        """
+        deadline = time.monotonic() + wait_time
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refresh(now)
+                if self.messages or now >= deadline:
+                    break
+                next_change = self._next_change()
+                timeout = deadline - now
+                if next_change is not None:
+                    timeout = min(timeout, next_change - now)
+                self._available.wait(max(timeout, 0))
+
+            records = []
+            while self.messages and len(records) < max_messages:
+                record = self.messages.popleft()
+                attributes = record["attributes"]
+                receive_count = int(attributes["ApproximateReceiveCount"])
+                if (
+                    self.max_receive_count is not None
+                    and receive_count > self.max_receive_count
+                ):
+                    self.dead_letters.append(record)
+                    continue
+                receipt_handle = uuid.uuid4().hex
+                self._in_flight[receipt_handle] = (
+                    now + self.visibility_timeout,
+                    record,
+                )
+                if receive_count == 1:
+                    attributes["ApproximateFirstReceiveTimestamp"] = str(
+                        int(time.time() * 1000)
+                    )
+                # Handler gets a copy, so later receives don't change its record
+                records.append(
+                    {
+                        **record,
+                        "receiptHandle": receipt_handle,
+                        "attributes": dict(attributes),
+                    }
+                )
+                attributes["ApproximateReceiveCount"] = str(receive_count + 1)
+            self.received += len(records)
+            return records
+
+    def delete_message(self, receipt_handle: str) -> bool:
+        """Delete received message, return False if receipt handle is expired."""
+        with self._lock:
+            if self._in_flight.pop(receipt_handle, None) is None:
+                return False
+            self.deleted += 1
+            return True
+
+    def change_visibility(self, receipt_handle: str, timeout: float) -> None:
+        with self._lock:
+            _, record = self._in_flight[receipt_handle]
+            self._in_flight[receipt_handle] = (time.monotonic() + timeout, record)
+            if timeout <= 0:
+                self._available.notify()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    @property
+    def delayed(self) -> int:
+        return len(self._delayed)
+
+    def is_empty(self) -> bool:
+        """Queue has neither visible, nor delayed, nor in-flight messages."""
+        with self._lock:
+            return not (self.messages or self._delayed or self._in_flight)
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __repr__(self) -> str:
+        return (
+            f"LocalQueue(name={self.name!r}, messages={len(self)}, "
+            f"in_flight={self.in_flight})"
+        )
+
+
+# ____________________ S3 _____________________________
+
+
+class LocalBody:
+    """Subset of botocore `StreamingBody` over bytes."""
+
+    def __init__(self, data: bytes) -> None:
+        self._stream = io.BytesIO(data)
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self._stream.read(amt)
+
+    def iter_chunks(self, chunk_size: int = 1024) -> Iterator[bytes]:
+        while True:
+            chunk = self._stream.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def iter_lines(
+        self, chunk_size: int = 1024, keepends: bool = False
+    ) -> Iterator[bytes]:
+        pending = b""
+        for chunk in self.iter_chunks(chunk_size):
+            lines = (pending + chunk).splitlines(True)
+            for line in lines[:-1]:
+                yield line.splitlines(keepends)[0]
+            pending = lines[-1]
+        if pending:
+            yield pending.splitlines(keepends)[0]
+
+    def close(self) -> None:
+        self._stream.close()
+
+
+class LocalS3Client:
+    """Subset of boto3 S3 client, that is used by `BucketClient` helpers."""
+
+    def __init__(self, bucket: "LocalBucket") -> None:
+        self.bucket = bucket
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        return {"ContentLength": self.bucket.path(Key).stat().st_size}
+
+    def get_object(
+        self, Bucket: str, Key: str, Range: Optional[str] = None, **kwargs
+    ) -> dict:
+        data = self.bucket.path(Key).read_bytes()
+        if Range:
+            start, _, end = Range[len("bytes=") :].partition("-")
+            data = data[int(start) : int(end) + 1 if end else None]
+        return {"Body": LocalBody(data), "ContentLength": len(data)}
+
+    def put_object(
+        self, Bucket: str, Key: str, Body: Union[bytes, str, Any] = b"", **kwargs
+    ) -> dict:
+        return self.bucket.put_object(Key=Key, Body=Body)
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        self.bucket.path(Key).unlink(missing_ok=True)
+        return {}
+
+
+class LocalBucket:
+    """Stand-in of boto3 `s3.Bucket`, objects are files in `root` directory."""
+
+    def __init__(self, name: str, root: Union[str, Path]) -> None:
+        self.name = name
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.meta = SimpleNamespace(client=LocalS3Client(self))
+
+    def path(self, key: str) -> Path:
+        path = self.root.joinpath(key).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"Wrong object key '{key}'")
+        return path
+
+    def put_object(
+        self, Key: str, Body: Union[bytes, str, Any] = b"", **kwargs
+    ) -> dict:
+        if isinstance(Body, str):
+            Body = Body.encode("utf-8")
+        elif not isinstance(Body, (bytes, bytearray, memoryview)):
+            Body = Body.read()
+        path = self.path(Key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(Body)
+        return {"ETag": f'"{hashlib.md5(Body).hexdigest()}"', "VersionId": "null"}
+
+    def upload_file(self, Filename: str, Key: str, **kwargs) -> None:
+        path = self.path(Key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(Filename, path)
+
+    def download_file(self, Key: str, Filename: str, **kwargs) -> None:
+        shutil.copyfile(self.path(Key), Filename)
+
+    def keys(self) -> list[str]:
+        return sorted(
+            p.relative_to(self.root).as_posix()
+            for p in self.root.rglob("*")
+            if p.is_file()
+        )
+
+    def __repr__(self) -> str:
+        return f"LocalBucket(name={self.name!r}, root='{self.root}')"